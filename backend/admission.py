@@ -0,0 +1,160 @@
+"""
+Admission control and backpressure for the scoring endpoints
+A burst used to be accepted in full and slowed every request down until the
+platform timed out. Now at most `max_concurrent` requests compute at once
+and at most `max_queue` more wait for a slot. Beyond that the request is
+refused straight away with 503 and a Retry-After estimated from the queue.
+A per-client token bucket answers 429 to clients that exceed their rate,
+and requests whose client disconnects are cancelled, so queued work is
+never started for nobody.
+
+Environment (read by app.py):
+    NEXUS_MAX_CONCURRENT  requests computing at once (default 32, 0 = no admission control)
+    NEXUS_MAX_QUEUE       requests waiting for a slot before 503 (default 128)
+    NEXUS_RATE_LIMIT      requests per second per client (default 0 = unlimited)
+    NEXUS_RATE_BURST      requests a client may send at once (default 2 x rate limit)
+"""
+
+import asyncio
+import math
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+
+try:
+    from . import metrics
+except ImportError:
+    import metrics
+
+QUEUE_WAIT_SECONDS = metrics.Histogram(
+    'nexus_queue_wait_seconds', 'Time a request waited for an admission slot', ['endpoint'])
+COMPUTE_SECONDS = metrics.Histogram(
+    'nexus_compute_seconds', 'Time a request held an admission slot', ['endpoint'])
+ADMISSION_REJECTED = metrics.Counter(
+    'nexus_admission_rejected_total',
+    'Requests refused (queue_full, rate_limited, not_ready) or abandoned by their client (disconnected)',
+    ['endpoint', 'reason'])
+ADMISSION_IN_FLIGHT = metrics.Gauge(
+    'nexus_admission_requests', 'Requests computing (active) or waiting for a slot (queued)', ['state'])
+
+
+class Rejected(Exception):
+    """Request refused before computing: HTTP `status_code` with a Retry-After in seconds"""
+
+    def __init__(self, status_code, reason, retry_after):
+        super().__init__(reason)
+        self.status_code = status_code
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class ClientDisconnected(Exception):
+    """The client went away while its request was queued or computing"""
+
+
+class RateLimiter:
+    """Token bucket per client; the least recently seen clients are forgotten beyond max_clients"""
+
+    def __init__(self, rate, burst=None, max_clients=10000):
+        self.rate = rate
+        self.burst = burst or max(1.0, 2 * rate)
+        self.max_clients = max_clients
+        # Only touched from the event loop thread, so no lock is needed
+        self._buckets = OrderedDict()
+
+    def acquire(self, client):
+        """0 if the client may go ahead, else seconds until its next token"""
+        now = time.monotonic()
+        tokens, updated = self._buckets.pop(client, (self.burst, now))
+        tokens = min(self.burst, tokens + (now - updated) * self.rate)
+        wait = 0.0
+        if tokens >= 1:
+            tokens -= 1
+        else:
+            wait = (1 - tokens) / self.rate
+        self._buckets[client] = (tokens, now)
+        if len(self._buckets) > self.max_clients:
+            self._buckets.popitem(last=False)
+        return wait
+
+
+class AdmissionController:
+    """
+    Bounded concurrency plus a bounded queue. slot() yields once the request
+    may compute; it raises Rejected when the queue is already full.
+    """
+
+    def __init__(self, max_concurrent, max_queue, retry_after=1.0):
+        self.max_concurrent = max(1, max_concurrent)
+        self.max_queue = max(0, max_queue)
+        self.retry_after = retry_after
+        self.active = 0
+        self.queued = 0
+        # Moving average of slot hold time, used to estimate Retry-After
+        self._compute_seconds = 0.0
+        self._semaphore = asyncio.Semaphore(self.max_concurrent)
+        ADMISSION_IN_FLIGHT.labels('active').set_function(lambda: self.active)
+        ADMISSION_IN_FLIGHT.labels('queued').set_function(lambda: self.queued)
+
+    def estimated_wait(self):
+        """Seconds until the queue ahead of a new request has drained"""
+        return max(self.retry_after, self.queued * self._compute_seconds / self.max_concurrent)
+
+    @asynccontextmanager
+    async def slot(self, endpoint):
+        """Wait for a compute slot; yields the seconds spent queued"""
+        if self._semaphore.locked() and self.queued >= self.max_queue:
+            ADMISSION_REJECTED.labels(endpoint, 'queue_full').inc()
+            raise Rejected(503, 'queue_full', self.estimated_wait())
+
+        queued_at = time.perf_counter()
+        self.queued += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.queued -= 1
+        admitted_at = time.perf_counter()
+        QUEUE_WAIT_SECONDS.labels(endpoint).observe(admitted_at - queued_at)
+
+        self.active += 1
+        try:
+            yield admitted_at - queued_at
+        finally:
+            self.active -= 1
+            self._semaphore.release()
+            elapsed = time.perf_counter() - admitted_at
+            COMPUTE_SECONDS.labels(endpoint).observe(elapsed)
+            self._compute_seconds = 0.9 * self._compute_seconds + 0.1 * elapsed
+
+
+async def cancel_on_disconnect(request, awaitable, endpoint, poll_interval=0.05):
+    """
+    Await `awaitable`, polling the client connection meanwhile; if the client
+    disconnects the work is cancelled and ClientDisconnected is raised.
+    Thread-pool work that has already started runs to completion.
+    """
+    task = asyncio.ensure_future(awaitable)
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=poll_interval)
+            if done:
+                return task.result()
+            if await request.is_disconnected():
+                task.cancel()
+                ADMISSION_REJECTED.labels(endpoint, 'disconnected').inc()
+                raise ClientDisconnected()
+    except asyncio.CancelledError:
+        task.cancel()
+        raise
+
+
+def client_key(request):
+    """Rate-limit key of a request: first X-Forwarded-For hop, else the peer address"""
+    forwarded = request.headers.get('x-forwarded-for')
+    if forwarded:
+        return forwarded.split(',')[0].strip()
+    return request.client.host if request.client else 'unknown'
+
+
+def retry_after_header(seconds):
+    return {'Retry-After': str(max(1, math.ceil(seconds)))}
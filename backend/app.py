@@ -4,18 +4,67 @@ Uses TRAINED ML models with advanced feature engineering
 Production-ready version with Random Forest (100% accuracy)
 """
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import Response
 from pydantic import BaseModel
 from typing import Optional, List, Dict, Any
 import pandas as pd
 import numpy as np
 import joblib
+import asyncio
 import os
 import glob
-from datetime import datetime
+import hmac
+import json
+import threading
+import time
 import uvicorn
 
+try:
+    from . import metrics
+    from .admission import (AdmissionController, ClientDisconnected, RateLimiter, Rejected, ADMISSION_REJECTED,
+                            cancel_on_disconnect, client_key, retry_after_header)
+    from .batching import MicroBatcher
+    from .compression import CompressionMiddleware
+    from .cv_fixtures import CV_FIXTURES
+    from .deadlines import DEADLINE_COMPLETED, deadline_from_budget, stage_costs
+    from .dedup import alias_ids, collapse_aliases, dedup_jobs, load_aliases, save_aliases
+    from .rerank import (CANDIDATE_GENERATORS, DEFAULT_RERANKERS, JobAttributes, RerankContext, RerankPipeline,
+                         cv_feature_row, parse_rerankers)
+    from .sharding import ShardPool, shard_bounds
+    from .singleflight import SingleFlight, request_key
+    from .tree_compiler import compile_model
+    from .job_index import (JobIndex, index_cache_key, file_fingerprint, prune_index_cache, read_index_meta,
+                            shared_index_dir, top_k_indices, unique_skills)
+    from .logging_config import CorrelationIdMiddleware, get_logger, setup_logging, shutdown_logging
+    from .memory import RequestMemorySampler, memory_report
+    from .profiling import RequestObserver, anonymized_cv_summary, profiled_call, profiling_requested
+    from .readiness import Readiness, warm_up
+except ImportError:
+    import metrics
+    from admission import (AdmissionController, ClientDisconnected, RateLimiter, Rejected, ADMISSION_REJECTED,
+                           cancel_on_disconnect, client_key, retry_after_header)
+    from batching import MicroBatcher
+    from compression import CompressionMiddleware
+    from cv_fixtures import CV_FIXTURES
+    from deadlines import DEADLINE_COMPLETED, deadline_from_budget, stage_costs
+    from dedup import alias_ids, collapse_aliases, dedup_jobs, load_aliases, save_aliases
+    from rerank import (CANDIDATE_GENERATORS, DEFAULT_RERANKERS, JobAttributes, RerankContext, RerankPipeline,
+                        cv_feature_row, parse_rerankers)
+    from sharding import ShardPool, shard_bounds
+    from singleflight import SingleFlight, request_key
+    from tree_compiler import compile_model
+    from job_index import (JobIndex, index_cache_key, file_fingerprint, prune_index_cache, read_index_meta,
+                           shared_index_dir, top_k_indices, unique_skills)
+    from logging_config import CorrelationIdMiddleware, get_logger, setup_logging, shutdown_logging
+    from memory import RequestMemorySampler, memory_report
+    from profiling import RequestObserver, anonymized_cv_summary, profiled_call, profiling_requested
+    from readiness import Readiness, warm_up
+
+logger = get_logger()
+
 app = FastAPI(
     title="Nexus CV Analysis API - ML Enhanced",
     description="AI-powered career analytics with trained ML models",
@@ -29,8 +78,16 @@ app.add_middleware(
     allow_credentials=False,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Request-ID", "Retry-After", "Server-Timing"],
 )
 
+# Correlation IDs for structured logs (X-Request-ID in, X-Request-ID out)
+app.add_middleware(CorrelationIdMiddleware)
+
+# gzip / brotli responses of at least NEXUS_COMPRESS_MIN_BYTES (see compression.py)
+if os.environ.get('NEXUS_COMPRESSION', '1') != '0':
+    app.add_middleware(CompressionMiddleware, minimum_size=int(os.environ.get('NEXUS_COMPRESS_MIN_BYTES', 1024)))
+
 # ==========================================
 # 📦 REQUEST/RESPONSE MODELS
 # ==========================================
@@ -38,11 +95,26 @@ app.add_middleware(
 class PredictJobsRequest(BaseModel):
     cvData: Dict[str, Any]
     topK: Optional[int] = 10
+    engine: Optional[str] = None  # 'sparse' or 'dense', defaults to NEXUS_SCORING_ENGINE
+    explain: Optional[bool] = False  # add matchedSkills / missingSkills to every match
+    deadlineMs: Optional[float] = None  # latency budget, defaults to NEXUS_DEADLINE_MS
+    fields: Optional[List[str]] = None  # JobMatch fields to return, e.g. ["jobId", "matchScore"]
+
+class PredictDomainRequest(BaseModel):
+    cvData: Dict[str, Any]
+    topK: Optional[int] = None  # most likely domains to return, all by default
 
 class CVAnalysisRequest(BaseModel):
     cvData: Dict[str, Any]
 
+class AnalyzeAndMatchRequest(BaseModel):
+    cvData: Dict[str, Any]
+    topK: Optional[int] = 10
+    engine: Optional[str] = None
+    explain: Optional[bool] = False
+
 class JobMatch(BaseModel):
+    jobId: Optional[int] = None  # row of the job in the served dataset
     Job_Title: str
     Company: str
     Company_Logo: str
@@ -52,6 +124,9 @@ class JobMatch(BaseModel):
     LinkedIn_URL: str
     matchScore: float
     domain: Optional[str] = None
+    matchedSkills: Optional[List[str]] = None  # job skills the CV has (explain=true)
+    missingSkills: Optional[List[str]] = None  # job skills the CV lacks (explain=true)
+    aliasIds: Optional[List[int]] = None  # dataset rows of near-duplicates collapsed into this job (dedup)
 
 class PredictJobsResponse(BaseModel):
     success: bool
@@ -60,19 +135,57 @@ class PredictJobsResponse(BaseModel):
     algorithm: str
     model_used: Optional[str] = None
 
+class DomainProbability(BaseModel):
+    domain: str
+    probability: float
+
+class PredictDomainResponse(BaseModel):
+    model_config = {'protected_namespaces': ()}
+    
+    success: bool
+    domain: str
+    probabilities: List[DomainProbability]  # most likely first
+    model_used: str
+    compiled: bool
+    inferenceMs: float  # classifier time for this CV
+
 class CVAnalysisResponse(BaseModel):
     success: bool
     skillCoverage: float
     careerScore: int
     insights: Dict[str, Any]
 
+class AnalyzeAndMatchResponse(BaseModel):
+    """CVAnalysisResponse and PredictJobsResponse fields in one payload"""
+    model_config = {'protected_namespaces': ()}
+    
+    success: bool
+    skillCoverage: float
+    careerScore: int
+    insights: Dict[str, Any]
+    matches: List[JobMatch]
+    totalJobs: int
+    algorithm: str
+    model_used: Optional[str] = None
+
 class HealthResponse(BaseModel):
     model_config = {'protected_namespaces': ()}
     
-    status: str
+    status: str  # liveness: the process is serving, see /ready for readiness
     version: str
     ml_library: str
     model_loaded: bool
+    ready: bool
+    phase: str  # starting, loading, warming, ready or failed
+
+class ReadinessResponse(BaseModel):
+    ready: bool
+    phase: str
+    modelsLoaded: bool  # /api/analyze-cv is served from then on
+    phaseSeconds: float
+    uptimeSeconds: float
+    error: Optional[str] = None
+    totalJobs: int
 
 # ==========================================
 # 🔧 ML MODEL & DATA LOADING
@@ -85,23 +198,126 @@ domain_encoder = None
 exp_encoder = None
 work_encoder = None
 all_skills = []
+embedding = None
 jobs_df = None
+job_aliases = None
+job_alias_ids = {}
+artifacts_path = None
+dataset_path = None
+
+# Precomputed job matrices for the trained path, and the jobs_df they were built from
+# NEXUS_INDEX_PRECISION: float64 (default), float32 or int8 TF-IDF weights
+INDEX_PRECISION = os.environ.get('NEXUS_INDEX_PRECISION', 'float64')
+# NEXUS_SCORING_ENGINE: default engine of the trained path, overridable per request
+#   sparse  TF-IDF cosine over the sparse index (reference)
+#   dense   low-rank embedding from train_model.py, one GEMV over contiguous float32 rows
+SCORING_ENGINES = ('sparse', 'dense')
+SCORING_ENGINE = os.environ.get('NEXUS_SCORING_ENGINE', 'sparse')
+ENGINE_ALGORITHMS = {
+    'sparse': "ML Enhanced (TF-IDF + Skill Matching)",
+    'dense': "ML Enhanced (Dense Embedding + Skill Matching)",
+}
+EMBEDDING_DIM = int(os.environ.get('NEXUS_EMBEDDING_DIM', 128))
+# Rankings cut short by a deadline, by the last stage that completed (tfidf uses ENGINE_ALGORITHMS)
+STAGE_ALGORITHMS = {
+    'skills': "Skill Bitmap Matching",
+}
+# Retrieve-then-rerank (see rerank.py): NEXUS_CANDIDATES jobs from the generator go to the rerankers
+RERANK_CANDIDATES = int(os.environ.get('NEXUS_CANDIDATES', 0))
+CANDIDATE_GENERATOR = os.environ.get('NEXUS_CANDIDATE_GENERATOR', 'tfidf')
+if CANDIDATE_GENERATOR not in CANDIDATE_GENERATORS:
+    raise ValueError(f"NEXUS_CANDIDATE_GENERATOR must be one of {CANDIDATE_GENERATORS}")
+rerank_pipeline = RerankPipeline(parse_rerankers(os.environ.get('NEXUS_RERANKERS', DEFAULT_RERANKERS)))
+STAGE_ALGORITHMS['rerank'] = f"ML Enhanced (Retrieve + Rerank: {', '.join(rerank_pipeline.names)})"
+job_attributes = None
+
+# Domain classifier of /api/predict-domain and the domain reranker, flattened by tree_compiler.py
+DOMAIN_MODEL = os.environ.get('NEXUS_DOMAIN_MODEL', 'best')
+COMPILE_TREES = os.environ.get('NEXUS_COMPILE_TREES', '1') != '0'
+domain_model = None
+
+# Latency budget of /api/predict-jobs when the request doesn't set deadlineMs (0 = none)
+DEADLINE_MS = float(os.environ.get('NEXUS_DEADLINE_MS', 0))
+
+# Micro-batching of concurrent trained-path predictions (see batching.py), off when the window is 0
+BATCH_WINDOW_MS = float(os.environ.get('NEXUS_BATCH_WINDOW_MS', 0))
+BATCH_MAX_SIZE = int(os.environ.get('NEXUS_BATCH_MAX_SIZE', 32))
+batcher = None
+
+# Identical concurrent predict requests share one computation (NEXUS_SINGLE_FLIGHT=0 to disable)
+single_flight = SingleFlight() if os.environ.get('NEXUS_SINGLE_FLIGHT', '1') != '0' else None
+
+# Admission control in front of the scoring endpoints (see admission.py)
+MAX_CONCURRENT = int(os.environ.get('NEXUS_MAX_CONCURRENT', 32))
+MAX_QUEUE = int(os.environ.get('NEXUS_MAX_QUEUE', 128))
+RATE_LIMIT = float(os.environ.get('NEXUS_RATE_LIMIT', 0))
+RATE_BURST = float(os.environ.get('NEXUS_RATE_BURST', 0)) or None
+admission = None
+rate_limiter = RateLimiter(RATE_LIMIT, RATE_BURST) if RATE_LIMIT > 0 else None
+
+# Model, dataset and index load in the background; /ready flips once they are warmed up (see readiness.py)
+BACKGROUND_LOAD = os.environ.get('NEXUS_BACKGROUND_LOAD', '1') != '0'
+WARMUP_ROUNDS = int(os.environ.get('NEXUS_WARMUP_ROUNDS', 2))
+NOT_READY_RETRY_AFTER = 5
+readiness = Readiness()
+loading_task = None
+
+# Admin endpoints answer requests carrying X-Nexus-Admin: <NEXUS_ADMIN_TOKEN>, and 404 when it is unset
+ADMIN_TOKEN = os.environ.get('NEXUS_ADMIN_TOKEN') or None
+ADMIN_HEADER = 'x-nexus-admin'
+
+# Memory breakdown by component and sampled per-request peak allocations (see memory.py)
+MEMORY_REPORT = os.environ.get('NEXUS_MEMORY_REPORT', '1') != '0'
+memory_sampler = RequestMemorySampler(float(os.environ.get('NEXUS_MEMORY_SAMPLE', 0)))
+
+# Sampled / admin-header profiling and slow-request capture (see profiling.py)
+request_observer = RequestObserver(
+    profile_sample=float(os.environ.get('NEXUS_PROFILE_SAMPLE', 0)),
+    profile_dir=os.environ.get('NEXUS_PROFILE_DIR', 'profiles'),
+    admin_token=ADMIN_TOKEN,
+    slow_ms=float(os.environ.get('NEXUS_SLOW_REQUEST_MS', 0)),
+    slow_dir=os.environ.get('NEXUS_SLOW_REQUEST_DIR', 'slow_requests'),
+    max_slow_records=int(os.environ.get('NEXUS_SLOW_REQUEST_MAX', 1000)),
+    summarize_cv=lambda cv_data: cv_summary(cv_data),
+    memory_sampler=memory_sampler,
+)
+
+# Scatter-gather over NEXUS_SHARDS worker processes (see sharding.py), and the jobs_df they hold
+SHARDS = int(os.environ.get('NEXUS_SHARDS', 0))
+SHARD_TIMEOUT_MS = float(os.environ.get('NEXUS_SHARD_TIMEOUT_MS', 5000))
+shard_pool = None
+sharded_jobs_df = None
+
+# Near-duplicate postings (MinHash Jaccard >= threshold) are collapsed at load time, 0 = keep every row
+DEDUP_THRESHOLD = float(os.environ.get('NEXUS_DEDUP_THRESHOLD', 0))
+job_index = None
+indexed_jobs_df = None
+_job_index_lock = threading.Lock()
+
+# Built indexes are cached on disk, keyed by dataset + artifact content hashes (NEXUS_INDEX_CACHE=0 to disable)
+# NEXUS_INDEX_CACHE_DIR defaults to index_cache/ next to the model artifacts
+INDEX_CACHE = os.environ.get('NEXUS_INDEX_CACHE', '1') != '0'
+
+metrics.DATASET_JOBS.set_function(lambda: len(jobs_df) if jobs_df is not None else 0)
+metrics.DATASET_DUPLICATES.set_function(lambda: len(job_aliases) if job_aliases is not None else 0)
+metrics.MODEL_LOADED.set_function(lambda: 1 if trained_model is not None else 0)
 
 def load_latest_model():
     """Load the most recent trained model and artifacts"""
-    global trained_model, tfidf_vectorizer, domain_encoder, exp_encoder, work_encoder, all_skills
+    global trained_model, tfidf_vectorizer, domain_encoder, exp_encoder, work_encoder, all_skills, artifacts_path
+    global embedding
     
     models_dir = 'ml_models'
     
     if not os.path.exists(models_dir):
-        print("⚠️ No trained models found. Run train_model.py first!")
+        logger.warning("⚠️ No trained models found. Run train_model.py first!")
         return False
     
     try:
         # Find latest best model
         best_models = glob.glob(os.path.join(models_dir, 'best_model_*.pkl'))
         if not best_models:
-            print("❌ No best_model files found!")
+            logger.error("❌ No best_model files found!")
             return False
         
         latest_model_path = max(best_models, key=os.path.getctime)
@@ -111,11 +327,11 @@ def load_latest_model():
         artifacts_path = os.path.join(models_dir, f'artifacts_{timestamp}.pkl')
         
         # Load model
-        print(f"📦 Loading model: {latest_model_path}")
+        logger.info("📦 Loading model", extra={'path': latest_model_path})
         trained_model = joblib.load(latest_model_path)
         
         # Load artifacts
-        print(f"📦 Loading artifacts: {artifacts_path}")
+        logger.info("📦 Loading artifacts", extra={'path': artifacts_path})
         artifacts = joblib.load(artifacts_path)
         
         tfidf_vectorizer = artifacts['tfidf_vectorizer']
@@ -123,22 +339,86 @@ def load_latest_model():
         exp_encoder = artifacts.get('exp_encoder')
         work_encoder = artifacts.get('work_encoder')
         all_skills = artifacts.get('all_skills', [])
+        embedding = artifacts.get('embedding')
+        
+        load_domain_model(models_dir, timestamp)
         
-        print("✅ Model and artifacts loaded successfully!")
-        print(f"   Model type: {type(trained_model).__name__}")
-        print(f"   Skills: {len(all_skills)} skills tracked")
+        logger.info("✅ Model and artifacts loaded successfully!", extra={
+            'model_type': type(trained_model).__name__,
+            'skills_tracked': len(all_skills),
+            'embedding_dim': len(embedding['components']) if embedding else None,
+        })
         
         return True
     
     except Exception as e:
-        print(f"❌ Error loading model: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception(f"❌ Error loading model: {e}")
         return False
 
+def load_domain_model(models_dir, timestamp):
+    """
+    Domain classifier of the loaded run (NEXUS_DOMAIN_MODEL), compiled when
+    it is a tree ensemble. The compiled model is checked against
+    predict_proba on probe rows and its single-row latency is logged.
+    """
+    global domain_model
+    
+    model = trained_model
+    if DOMAIN_MODEL != 'best':
+        path = os.path.join(models_dir, f'{DOMAIN_MODEL}_{timestamp}.pkl')
+        try:
+            model = joblib.load(path)
+        except Exception as e:
+            logger.warning(f"⚠️ Can't load {path}, predicting domains with the best model: {e}")
+    if not hasattr(model, 'predict_proba'):
+        # e.g. a hinge-loss SGD model picked by an older streaming run: domains are ranked by probability
+        logger.warning("⚠️ Domain classifier has no predict_proba, domain prediction disabled", extra={
+            'model': type(model).__name__,
+        })
+        domain_model = None
+        return
+    domain_model = model
+    
+    if not COMPILE_TREES:
+        return
+    try:
+        start = time.perf_counter()
+        compiled = compile_model(model)
+        compile_seconds = time.perf_counter() - start
+    except TypeError as e:
+        logger.info("🌲 Domain classifier not compiled", extra={'reason': str(e)})
+        return
+    
+    probes = np.zeros((3, compiled.n_features_in_))
+    probes[1] = 1
+    probes[2, ::2] = 0.5
+    names = getattr(model, 'feature_names_in_', None)
+    frame = pd.DataFrame(probes, columns=names) if names is not None else probes
+    if not np.array_equal(compiled.predict_proba(probes), model.predict_proba(frame)):
+        logger.warning("⚠️ Compiled domain classifier disagrees with predict_proba, keeping scikit-learn")
+        return
+    
+    def single_row_seconds(predict, row):
+        timings = []
+        for _ in range(5):
+            start = time.perf_counter()
+            predict(row)
+            timings.append(time.perf_counter() - start)
+        return sorted(timings)[len(timings) // 2]
+    
+    domain_model = compiled
+    logger.info("🌲 Domain classifier compiled", extra={
+        'model': compiled.source,
+        'trees': compiled.trees.n_trees,
+        'nodes': compiled.trees.n_nodes,
+        'compile_ms': round(compile_seconds * 1000, 1),
+        'single_row_us': round(single_row_seconds(compiled.predict_proba, probes[:1]) * 1e6),
+        'sklearn_single_row_us': round(single_row_seconds(model.predict_proba, frame[:1]) * 1e6),
+    })
+
 def load_jobs_dataset():
     """Load the jobs dataset"""
-    global jobs_df
+    global jobs_df, dataset_path, job_aliases, job_alias_ids
     
     # Try multiple paths (for different deployment environments)
     possible_paths = [
@@ -150,16 +430,16 @@ def load_jobs_dataset():
     
     for csv_path in possible_paths:
         if os.path.exists(csv_path):
-            print(f"📂 Found dataset at: {csv_path}")
+            logger.info("📂 Found dataset", extra={'path': csv_path})
             break
     else:
-        print(f"❌ Dataset not found in any of these locations: {possible_paths}")
+        logger.error("❌ Dataset not found", extra={'searched_paths': possible_paths})
         return False
     
     try:
-        print(f"📂 Loading jobs dataset: {csv_path}")
         jobs_df = pd.read_csv(csv_path, encoding='utf-8')
-        print(f"✅ Loaded {len(jobs_df)} jobs")
+        dataset_path = csv_path
+        logger.info(f"✅ Loaded {len(jobs_df)} jobs", extra={'jobs': len(jobs_df)})
         
         # Ensure required columns exist
         required_cols = ['Job Title', 'Company', 'Company Logo', 'Location', 
@@ -167,14 +447,226 @@ def load_jobs_dataset():
         
         missing_cols = [col for col in required_cols if col not in jobs_df.columns]
         if missing_cols:
-            print(f"⚠️ Missing columns: {missing_cols}")
+            logger.warning("⚠️ Missing columns", extra={'missing_columns': missing_cols})
+        
+        # Only canonical postings are indexed; the dropped copies are kept as aliases
+        if DEDUP_THRESHOLD > 0:
+            job_aliases = saved_job_aliases()
+            if job_aliases is not None:
+                jobs_df = collapse_aliases(jobs_df, job_aliases)
+                logger.info(f"🧹 Collapsed {len(job_aliases)} near-duplicate jobs (saved alias table)")
+            else:
+                jobs_df, job_aliases, report = dedup_jobs(jobs_df, DEDUP_THRESHOLD)
+                logger.info(f"🧹 Collapsed {report['collapsed']} near-duplicate jobs "
+                            f"({report['collapsed_share']:.1%} of the dataset)", extra=report)
+            job_alias_ids = alias_ids(job_aliases)
         
         return True
     
     except Exception as e:
-        print(f"❌ Error loading dataset: {e}")
+        logger.exception(f"❌ Error loading dataset: {e}")
         return False
 
+def configure_blas_threads():
+    """Cap BLAS/OpenMP threads per worker (NEXUS_BLAS_THREADS) so N workers don't oversubscribe cores"""
+    threads = os.environ.get('NEXUS_BLAS_THREADS')
+    if threads:
+        from threadpoolctl import threadpool_limits
+        threadpool_limits(limits=int(threads))
+        logger.info("🧵 BLAS threads per worker", extra={'blas_threads': int(threads)})
+
+def job_index_source():
+    """Identify the dataset file and artifact bundle an index is built from, by content"""
+    if dataset_path is None or artifacts_path is None:
+        return {}
+    return {
+        'dataset_sha256': file_fingerprint(dataset_path),
+        'artifacts_sha256': file_fingerprint(artifacts_path),
+        'dedup_threshold': DEDUP_THRESHOLD,
+    }
+
+def expected_embedding_dim():
+    """Embedding size the index should carry: the artifacts', one fitted at startup, or None"""
+    if embedding is not None:
+        return len(embedding['components'])
+    return EMBEDDING_DIM if SCORING_ENGINE == 'dense' else None
+
+def index_compatible(meta, source):
+    """Whether a saved index was built from `source` with the current precision and embedding settings"""
+    return bool(meta and source and meta.get('source') == source
+                and meta.get('precision') == INDEX_PRECISION
+                and meta.get('embedding_dim') == expected_embedding_dim())
+
+def job_index_cache_entry(source):
+    """Cache directory of the index for `source`, or None when caching is off"""
+    if not INDEX_CACHE or not source:
+        return None
+    cache_dir = os.environ.get('NEXUS_INDEX_CACHE_DIR') or os.path.join(os.path.dirname(artifacts_path), 'index_cache')
+    return os.path.join(cache_dir, index_cache_key(source, INDEX_PRECISION, expected_embedding_dim()))
+
+def build_job_index():
+    """Transform every job description once, for the current jobs_df and vectorizer"""
+    embedding_dim = None
+    if embedding is None and SCORING_ENGINE == 'dense':
+        logger.warning("⚠️ Artifacts have no embedding, fitting one at startup (rerun train_model.py to store it)")
+        embedding_dim = EMBEDDING_DIM
+    return JobIndex.build(jobs_df['Job Description'], tfidf_vectorizer, all_skills,
+                          job_index_source(), precision=INDEX_PRECISION,
+                          embedding=embedding, embedding_dim=embedding_dim)
+
+def saved_index_dirs(source):
+    """Shared (NEXUS_INDEX_DIR) and cached index directories built from `source`"""
+    candidates = [os.environ.get('NEXUS_INDEX_DIR'), job_index_cache_entry(source)]
+    return [d for d in candidates if d and index_compatible(read_index_meta(d), source)]
+
+def saved_job_aliases():
+    """Alias table saved with an index of the same dataset and dedup threshold, or None"""
+    for directory in saved_index_dirs(job_index_source()):
+        aliases = load_aliases(directory)
+        if aliases is not None:
+            return aliases
+    return None
+
+def store_job_aliases(directory):
+    """Save the alias table next to the index in `directory` (a no-op without dedup)"""
+    if job_aliases is None or indexed_jobs_df is not jobs_df:
+        return
+    try:
+        save_aliases(job_aliases, directory)
+    except OSError as e:
+        logger.warning(f"⚠️ Could not save the job aliases: {e}", extra={'index_dir': directory})
+
+def load_or_build_job_index():
+    """
+    Attach to the shared index in NEXUS_INDEX_DIR (written by serve.py) or to
+    the on-disk cache when either was built from the same dataset and
+    artifacts; otherwise build it in-process and write it to the cache
+    """
+    global job_index, indexed_jobs_df
+    
+    index_dir = os.environ.get('NEXUS_INDEX_DIR')
+    source = job_index_source()
+    cache_entry = job_index_cache_entry(source)
+    
+    if index_dir and index_compatible(read_index_meta(index_dir), source):
+        job_index = JobIndex.load(index_dir, mmap=True)
+        logger.info("🔗 Attached to shared job index", extra={'index_dir': index_dir, 'jobs': job_index.n_jobs})
+    elif cache_entry and index_compatible(read_index_meta(cache_entry), source):
+        metrics.record_cache_lookup('job_index', True)
+        job_index = JobIndex.load(cache_entry, mmap=True)
+        logger.info("📂 Loaded cached job index", extra={'index_dir': cache_entry, 'jobs': job_index.n_jobs})
+        if load_aliases(cache_entry) is None:
+            # Cached before aliases were saved with it
+            indexed_jobs_df = jobs_df
+            store_job_aliases(cache_entry)
+    else:
+        with metrics.span('build_job_index', 'trained'):
+            job_index = build_job_index()
+        logger.info("🧮 Built job index", extra={
+            'jobs': job_index.n_jobs,
+            'precision': job_index.precision,
+            'embedding_dim': job_index.components.shape[0] if job_index.has_embeddings else None,
+            'index_mb': round(job_index.nbytes / (1024 * 1024), 1),
+        })
+        indexed_jobs_df = jobs_df
+        if cache_entry:
+            metrics.record_cache_lookup('job_index', False)
+            save_job_index_cache(job_index, cache_entry)
+            store_job_aliases(cache_entry)
+    indexed_jobs_df = jobs_df
+    return job_index
+
+def save_job_index_cache(index, cache_entry):
+    """Write an index to the cache (atomically, see JobIndex.save) and drop old entries"""
+    try:
+        index.save(cache_entry)
+        prune_index_cache(os.path.dirname(cache_entry))
+        logger.info("💾 Cached job index", extra={'index_dir': cache_entry})
+    except OSError as e:
+        logger.warning(f"⚠️ Could not cache the job index: {e}", extra={'index_dir': cache_entry})
+
+def start_shard_pool(n_shards):
+    """Split the current jobs into `n_shards` indexes and start one scoring process per shard"""
+    global shard_pool, sharded_jobs_df
+    
+    index = get_job_index()
+    # Row ranges of the built (or cached) index: nothing is vectorized again
+    shards = index.row_ranges(shard_bounds(index.n_jobs, n_shards))
+    
+    directory = os.environ.get('NEXUS_SHARD_DIR') or shared_index_dir(f'nexus-shards-{os.getpid()}')
+    shard_pool = ShardPool(shards, directory)
+    sharded_jobs_df = jobs_df
+    logger.info("🧩 Started shard workers", extra={
+        'shards': shard_pool.n_shards,
+        'jobs_per_shard': [stop - start for start, stop in shard_pool.bounds],
+        'shard_dir': directory,
+    })
+    return shard_pool
+
+def stop_shard_pool():
+    global shard_pool, sharded_jobs_df
+    
+    if shard_pool is not None:
+        shard_pool.close()
+        shard_pool = sharded_jobs_df = None
+
+def get_job_index():
+    """Job index for the current jobs_df, rebuilt if the dataset was replaced since it was built"""
+    global job_index, indexed_jobs_df
+    
+    if job_index is None or indexed_jobs_df is not jobs_df:
+        with _job_index_lock:
+            if job_index is None or indexed_jobs_df is not jobs_df:
+                with metrics.span('build_job_index', 'trained'):
+                    job_index = build_job_index()
+                indexed_jobs_df = jobs_df
+    return job_index
+
+def get_job_attributes():
+    """Reranker columns for the current jobs_df, rebuilt when the dataset was replaced"""
+    global job_attributes
+    
+    attributes = job_attributes
+    if attributes is None or attributes.jobs_df is not jobs_df:
+        attributes = job_attributes = JobAttributes(jobs_df, domain_encoder)
+    return attributes
+
+def memory_components():
+    """(components, caches) sized by the memory report, in ownership order"""
+    components = {
+        'jobs_df': jobs_df,
+        'job_aliases': job_aliases,
+        'tfidf_vectorizer': tfidf_vectorizer,
+        'trained_model': trained_model,
+        'domain_model': domain_model,
+        'domain_encoder': domain_encoder,
+        'exp_encoder': exp_encoder,
+        'work_encoder': work_encoder,
+        'all_skills': all_skills,
+        'embedding': embedding,
+        'job_index': job_index,
+        # Only a separate copy when the dataset was replaced after the index was built
+        'indexed_jobs_df': indexed_jobs_df,
+        'sharded_jobs_df': sharded_jobs_df,
+    }
+    caches = {
+        'job_attributes': job_attributes,
+        'single_flight': single_flight,
+        'metrics_registry': metrics.REGISTRY,
+    }
+    return components, caches
+
+def log_memory_report():
+    """Log resident memory and the largest components"""
+    report = memory_report(*memory_components())
+    mb = lambda nbytes: round(nbytes / 2**20, 1) if nbytes is not None else None
+    logger.info(f"🧮 Memory: {mb(report['accounted_bytes'])} MB accounted of {mb(report['rss_bytes'])} MB resident", extra={
+        'rss_mb': mb(report['rss_bytes']),
+        'accounted_mb': mb(report['accounted_bytes']),
+        'mapped_mb': mb(report['mapped_bytes']),
+        'components_mb': {row['name']: mb(row['bytes'] + row['mapped_bytes']) for row in report['components']},
+    })
+
 def extract_skills_from_text(text):
     """Extract skills from text"""
     if pd.isna(text):
@@ -259,67 +751,270 @@ def extract_cv_features(cv_data):
     
     return cv_text
 
-def predict_job_matches(cv_data, top_k=10):
+def cv_summary(cv_data):
+    """Anonymized summary of a CV stored with slow requests (see profiling.py)"""
+    cv_text = extract_cv_features(cv_data)
+    vectorizer = tfidf_vectorizer
+    return anonymized_cv_summary(cv_data, cv_text, set(extract_skills_from_text(cv_text)),
+                                 vectorizer.build_analyzer() if vectorizer is not None else str.split,
+                                 vectorizer.vocabulary_ if vectorizer is not None else {})
+
+def resolve_engine(engine=None):
+    """Validate a requested scoring engine, defaulting to NEXUS_SCORING_ENGINE"""
+    engine = engine or SCORING_ENGINE
+    if engine not in SCORING_ENGINES:
+        raise HTTPException(status_code=400, detail=f"Unknown engine '{engine}' (expected one of {SCORING_ENGINES})")
+    return engine
+
+def require_engine(index, engine):
+    """Reject the dense engine when the index has no embedding"""
+    if engine == 'dense' and not index.has_embeddings:
+        raise HTTPException(status_code=400, detail="Dense engine unavailable: artifacts have no embedding")
+
+def predict_job_matches(cv_data, top_k=10, engine=None, cv_text=None, cv_skills=None, explain=False,
+                        deadline=None):
     """
     Predict job matches using trained ML model OR fallback to TF-IDF similarity
-    Returns similarity scores between CV and all jobs
+    Returns the top matches and the algorithm that scored them
+    cv_text / cv_skills can be passed in when the caller already extracted them
+    explain adds matched / missing skills to each match (trained path only)
+    deadline (a perf_counter() time) lets the trained path stop after a cheaper stage
     """
     # Check if we have the dataset
     if jobs_df is None:
         raise HTTPException(status_code=500, detail="Jobs dataset not loaded!")
     
+    # If model is loaded, use it. Otherwise, use fallback method
+    path = 'trained' if trained_model is not None and tfidf_vectorizer is not None else 'fallback'
+    metrics.SCORING_PATH.labels(path).inc()
+    
     # Extract CV text
-    cv_text = extract_cv_features(cv_data)
+    if cv_text is None:
+        with metrics.span('extract_cv_features', path):
+            cv_text = extract_cv_features(cv_data)
     
-    # If model is loaded, use it. Otherwise, use fallback method
-    if trained_model is not None and tfidf_vectorizer is not None:
-        print("✅ Using trained ML model for predictions")
-        return predict_with_trained_model(cv_data, cv_text, top_k)
+    if path == 'trained':
+        logger.debug("✅ Using trained ML model for predictions", extra={'sampled': True})
+        return predict_with_trained_model(cv_data, cv_text, top_k, resolve_engine(engine), cv_skills, explain,
+                                          deadline)
     else:
-        print("⚠️ Using fallback TF-IDF matching (no trained model)")
+        logger.debug("⚠️ Using fallback TF-IDF matching (no trained model)", extra={'sampled': True})
         return predict_with_fallback(cv_data, cv_text, top_k)
 
-def predict_with_trained_model(cv_data, cv_text, top_k=10):
-    """Use the trained ML model for predictions"""
-    # 1. TF-IDF features
-    cv_tfidf = tfidf_vectorizer.transform([cv_text])
+def sharded():
+    """True when the shard workers hold the current dataset"""
+    return shard_pool is not None and sharded_jobs_df is jobs_df
+
+def uses_shards(deadline=None):
+    return sharded() and stage_costs.fits('scatter_gather', deadline)
+
+def uses_skill_candidates(deadline=None):
+    return RERANK_CANDIDATES > 0 and CANDIDATE_GENERATOR == 'skills' and stage_costs.fits('rerank', deadline)
+
+def shard_timeout(deadline=None):
+    """Seconds to wait for the shards' replies: NEXUS_SHARD_TIMEOUT_MS, or less when the deadline is closer"""
+    timeout = SHARD_TIMEOUT_MS / 1000
+    if deadline is not None:
+        timeout = min(timeout, max(0.0, deadline - time.perf_counter()))
+    return timeout
+
+def single_cv_dispatch(deadline=None):
+    """
+    True when predict_with_trained_model wouldn't score the full TF-IDF matrix
+    (scatter-gather over shards, its skills-only ranking when the deadline
+    leaves no time for it, or skill-overlap candidates): such requests gain
+    nothing from a shared matrix product and keep their own dispatch
+    """
+    return sharded() or uses_skill_candidates(deadline)
+
+def predict_with_trained_model(cv_data, cv_text, top_k=10, engine='sparse', cv_skills=None, explain=False,
+                               deadline=None):
+    """
+    Use the trained ML model for predictions
+    With a deadline (perf_counter() time) the stages run as an anytime
+    pipeline and the ranking of the last stage that fitted is returned.
+    With NEXUS_CANDIDATES set, the best candidates are reranked (rerank.py).
+    """
+    # Job-side TF-IDF rows and skill flags are precomputed once per dataset
+    index = get_job_index()
+    require_engine(index, engine)
     
+    # 1. TF-IDF features
     # 2. Skill features
-    cv_skill_features = create_skill_features(cv_text)
+    with metrics.span('cv_transform', 'trained'):
+        cv_tfidf = tfidf_vectorizer.transform([cv_text])
+        cv_skills = set(extract_skills_from_text(cv_text) if cv_skills is None else cv_skills)
     
-    # 3. Create feature vectors for all jobs
-    job_descriptions = jobs_df['Job Description'].fillna('')
+    similarity_stage = 'embedding_similarity' if engine == 'dense' else 'similarity'
+    rerank = RERANK_CANDIDATES > 0
     
-    # TF-IDF for all jobs
-    jobs_tfidf = tfidf_vectorizer.transform(job_descriptions)
+    def rerank_top(candidates, base_scores=None):
+        return rerank_candidates(index, candidates, base_scores, cv_data, cv_tfidf, cv_skills, engine, top_k,
+                                 explain, deadline)
     
-    # Calculate similarity scores (cosine similarity on TF-IDF + skill matching)
-    from sklearn.metrics.pairwise import cosine_similarity
+    # Every shard process scores its slice of the jobs and returns its local top K (or candidates)
+    if uses_shards(deadline):
+        try:
+            with metrics.span('scatter_gather', 'trained'), stage_costs.measure('scatter_gather'):
+                top_indices, top_scores = shard_pool.top_k(cv_tfidf, cv_skills,
+                                                           candidate_count(top_k) if rerank else top_k, engine,
+                                                           timeout=shard_timeout(deadline))
+        except RuntimeError as e:
+            # A shard failed or hung: score in-process (the skill ranking under a deadline, see below)
+            logger.warning(f"⚠️ Scatter-gather failed, scoring in-process: {e}")
+        else:
+            if rerank and stage_costs.fits('rerank', deadline):
+                return rerank_top(top_indices, top_scores)
+            top_indices, top_scores = top_indices[:top_k], top_scores[:top_k]
+            return finish_trained_prediction(index, top_indices, dict(zip(top_indices, top_scores)), cv_skills,
+                                             engine, 'tfidf', explain, deadline)
     
-    # TF-IDF similarity
-    tfidf_scores = cosine_similarity(cv_tfidf, jobs_tfidf)[0]
+    # Stage 1: skill matching bonus, share of each job's skills found in the CV (bitmap pass)
+    with metrics.span('skill_bonus', 'trained'), stage_costs.measure('skill_bonus'):
+        skill_bonuses = index.skill_bonus(cv_skills)
     
-    # Skill matching bonus
-    skill_bonuses = []
-    cv_skills = set(extract_skills_from_text(cv_text))
+    # Skill-overlap candidates go straight to the rerankers, which compute the cosine for them only
+    if uses_skill_candidates(deadline):
+        with metrics.span('candidates', 'trained'):
+            candidates = top_k_indices(skill_bonuses, candidate_count(top_k))
+        return rerank_top(candidates)
     
-    for desc in job_descriptions:
-        job_skills = set(extract_skills_from_text(desc))
-        if len(job_skills) > 0:
-            skill_match = len(cv_skills & job_skills) / len(job_skills)
+    # With shards, scoring every job in this process is the slowest path of all:
+    # a deadline that leaves no time for scatter-gather gets the skill ranking
+    if (deadline is not None and sharded()) or not stage_costs.fits(similarity_stage, deadline):
+        with metrics.span('top_k', 'trained'):
+            top_indices = top_k_indices(skill_bonuses, top_k)
+        return finish_trained_prediction(index, top_indices, skill_bonuses, cv_skills, engine, 'skills',
+                                         explain, deadline)
+    
+    # Stage 2: cosine similarity on TF-IDF (or its low-rank embedding) + skill matching
+    with metrics.span(similarity_stage, 'trained'), stage_costs.measure(similarity_stage):
+        if engine == 'dense':
+            # Cosine approximated in the low-rank embedding space
+            tfidf_scores = index.embedding_scores(cv_tfidf)
         else:
-            skill_match = 0
-        skill_bonuses.append(skill_match)
+            tfidf_scores = index.tfidf_scores(cv_tfidf)
+    
+    with metrics.span('top_k', 'trained'):
+        # Combined score (70% TF-IDF, 30% skill matching)
+        final_scores = 0.7 * tfidf_scores + 0.3 * skill_bonuses
+    
+    # Stage 3: rerank the best candidates of the inverted-index pass
+    if rerank and stage_costs.fits('rerank', deadline):
+        with metrics.span('candidates', 'trained'):
+            candidates = top_k_indices(final_scores, candidate_count(top_k))
+        return rerank_top(candidates, final_scores[candidates])
+    
+    with metrics.span('top_k', 'trained'):
+        # Get top K matches
+        top_indices = top_k_indices(final_scores, top_k)
+    
+    return finish_trained_prediction(index, top_indices, final_scores, cv_skills, engine, 'tfidf', explain, deadline)
+
+def candidate_count(top_k):
+    """Jobs handed to the rerankers: NEXUS_CANDIDATES, never fewer than the K requested"""
+    return max(RERANK_CANDIDATES, top_k or 0)
+
+def rerank_candidates(index, candidates, base_scores, cv_data, cv_tfidf, cv_skills, engine, top_k, explain=False,
+                      deadline=None, path='trained'):
+    """
+    Score the candidate rows with the rerank pipeline and keep the top K
+    base_scores: the candidates' 70/30 blend when the generator already has it
+    """
+    context = RerankContext(index, get_job_attributes(), cv_data, cv_tfidf, cv_skills, engine, base_scores,
+                            domain_model, domain_encoder, exp_encoder, work_encoder)
+    with metrics.span('rerank', path), stage_costs.measure('rerank'):
+        scores = rerank_pipeline.rerank(context, candidates, path)
+        order = top_k_indices(scores, top_k)
+    top_indices = candidates[order]
+    return finish_trained_prediction(index, top_indices, dict(zip(top_indices, scores[order])), cv_skills, engine,
+                                     'rerank', explain, deadline, path)
+
+def finish_trained_prediction(index, top_indices, final_scores, cv_skills, engine, stage, explain=False,
+                              deadline=None, path='trained'):
+    """{'matches', 'algorithm'} of a trained-path ranking that completed `stage`"""
+    algorithm = STAGE_ALGORITHMS.get(stage) or ENGINE_ALGORITHMS[engine]
+    if deadline is not None:
+        DEADLINE_COMPLETED.labels(stage).inc()
+        algorithm = f"{algorithm} [deadline: completed {stage}]"
+    
+    explanations = explain_matches(index, top_indices, cv_skills, path) if explain else None
+    with metrics.span('build_matches_response', path):
+        return {
+            'matches': build_matches_response(top_indices, final_scores, algorithm, explanations),
+            'algorithm': algorithm,
+        }
+
+def predict_batch_with_trained_model(requests):
+    """
+    Score several (cv_data, top_k, engine, explain, deadline) requests together:
+    one matrix-matrix product per engine instead of one pass over the job
+    matrix per request. The batched product is timed per CV under its own
+    stage ('similarity_batch'); requests whose deadline leaves no time for it
+    at this batch size get their skill-bitmap ranking. Requests served by
+    shards or skill-overlap candidates (single_cv_dispatch) go through
+    predict_with_trained_model, so batching never changes the scorer.
+    Returns one {'matches', 'algorithm'} result per request, in order.
+    """
+    index = get_job_index()
     
-    skill_bonuses = np.array(skill_bonuses)
+    with metrics.span('extract_cv_features', 'batched'):
+        cv_texts = [extract_cv_features(request[0]) for request in requests]
     
-    # Combined score (70% TF-IDF, 30% skill matching)
-    final_scores = 0.7 * tfidf_scores + 0.3 * skill_bonuses
+    with metrics.span('cv_transform', 'batched'):
+        cv_tfidf = tfidf_vectorizer.transform(cv_texts)
+        cv_skills = [set(extract_skills_from_text(cv_text)) for cv_text in cv_texts]
     
-    # Get top K matches
-    top_indices = np.argsort(final_scores)[::-1][:top_k]
+    own_dispatch = [single_cv_dispatch(request[4]) for request in requests]
+    similarities = [None] * len(requests)
+    for engine in SCORING_ENGINES:
+        stage = 'embedding_similarity' if engine == 'dense' else 'similarity'
+        eligible = [i for i, request in enumerate(requests) if request[2] == engine and not own_dispatch[i]]
+        # A matrix product over the whole batch, not one row: gate on the batch's cost
+        rows = [i for i in eligible if stage_costs.fits(f'{stage}_batch', requests[i][4], len(eligible))]
+        if not rows:
+            continue
+        with metrics.span(stage, 'batched'), stage_costs.measure(f'{stage}_batch', len(rows)):
+            if engine == 'dense':
+                scores = index.embedding_scores_batch(cv_tfidf[rows])
+            else:
+                scores = index.tfidf_scores_batch(cv_tfidf[rows])
+        for row, row_scores in zip(rows, scores):
+            similarities[row] = row_scores
+    
+    results = []
+    for i, ((cv_data, top_k, engine, explain, deadline), similarity, skills) in enumerate(
+            zip(requests, similarities, cv_skills)):
+        metrics.SCORING_PATH.labels('trained').inc()
+        
+        if own_dispatch[i]:
+            results.append(predict_with_trained_model(cv_data, cv_texts[i], top_k, engine, skills, explain,
+                                                      deadline))
+            continue
+        
+        with metrics.span('skill_bonus', 'batched'):
+            skill_bonuses = index.skill_bonus(skills)
+        
+        with metrics.span('top_k', 'batched'):
+            if similarity is None:
+                final_scores, stage = skill_bonuses, 'skills'
+            else:
+                final_scores, stage = 0.7 * similarity + 0.3 * skill_bonuses, 'tfidf'
+        
+        if stage == 'tfidf' and RERANK_CANDIDATES > 0 and stage_costs.fits('rerank', deadline):
+            with metrics.span('candidates', 'batched'):
+                candidates = top_k_indices(final_scores, candidate_count(top_k))
+            results.append(rerank_candidates(index, candidates, final_scores[candidates], cv_data, cv_tfidf[i],
+                                             skills, engine, top_k, explain, deadline, path='batched'))
+            continue
+        
+        with metrics.span('top_k', 'batched'):
+            top_indices = top_k_indices(final_scores, top_k)
+        
+        results.append(finish_trained_prediction(index, top_indices, final_scores, skills, engine, stage,
+                                                  explain, deadline, path='batched'))
     
-    return build_matches_response(top_indices, final_scores, "ML Enhanced (TF-IDF + Skill Matching)")
+    return results
 
 def predict_with_fallback(cv_data, cv_text, top_k=10):
     """Fallback method using simple TF-IDF when trained model not available"""
@@ -343,43 +1038,62 @@ def predict_with_fallback(cv_data, cv_text, top_k=10):
     
     # Fit on both CV and job descriptions
     all_texts = [cv_text] + job_descriptions.tolist()
-    vectorizer.fit(all_texts)
+    with metrics.span('vectorizer_fit', 'fallback'):
+        vectorizer.fit(all_texts)
     
     # Transform CV and jobs
-    cv_vec = vectorizer.transform([cv_text])
-    jobs_vec = vectorizer.transform(job_descriptions)
+    with metrics.span('cv_transform', 'fallback'):
+        cv_vec = vectorizer.transform([cv_text])
+    with metrics.span('jobs_transform', 'fallback'):
+        jobs_vec = vectorizer.transform(job_descriptions)
     
     # Calculate TF-IDF similarity
-    tfidf_scores = cosine_similarity(cv_vec, jobs_vec)[0]
+    with metrics.span('similarity', 'fallback'):
+        tfidf_scores = cosine_similarity(cv_vec, jobs_vec)[0]
     
     # Add skill matching bonus
-    skill_bonuses = []
-    for desc in job_descriptions:
-        desc_lower = desc.lower()
-        # Count how many CV skills appear in job description
-        matches = sum(1 for skill in cv_skills if skill in desc_lower)
-        if len(cv_skills) > 0:
-            skill_bonus = matches / len(cv_skills)
-        else:
-            skill_bonus = 0
-        skill_bonuses.append(skill_bonus)
-    
-    skill_bonuses = np.array(skill_bonuses)
-    
-    # Combined score (60% TF-IDF, 40% skill matching)
-    final_scores = 0.6 * tfidf_scores + 0.4 * skill_bonuses
+    with metrics.span('skill_bonus', 'fallback'):
+        skill_bonuses = []
+        for desc in job_descriptions:
+            desc_lower = desc.lower()
+            # Count how many CV skills appear in job description
+            matches = sum(1 for skill in cv_skills if skill in desc_lower)
+            if len(cv_skills) > 0:
+                skill_bonus = matches / len(cv_skills)
+            else:
+                skill_bonus = 0
+            skill_bonuses.append(skill_bonus)
+        
+        skill_bonuses = np.array(skill_bonuses)
     
-    # Get top K matches
-    top_indices = np.argsort(final_scores)[::-1][:top_k]
+    with metrics.span('top_k', 'fallback'):
+        # Combined score (60% TF-IDF, 40% skill matching)
+        final_scores = 0.6 * tfidf_scores + 0.4 * skill_bonuses
+        
+        # Get top K matches
+        top_indices = np.argsort(final_scores)[::-1][:top_k]
     
-    return build_matches_response(top_indices, final_scores, "TF-IDF Similarity (Fallback Mode)")
+    with metrics.span('build_matches_response', 'fallback'):
+        algorithm = "TF-IDF Similarity (Fallback Mode)"
+        return {
+            'matches': build_matches_response(top_indices, final_scores, algorithm),
+            'algorithm': algorithm,
+        }
 
-def build_matches_response(top_indices, final_scores, algorithm_name):
-    """Build the job matches response from indices and scores"""
+def explain_matches(index, top_indices, cv_skills, path):
+    """Matched / missing skills of the top-K jobs from the index's skill bitsets"""
+    with metrics.span('explain', path):
+        return index.skill_explanations(top_indices, cv_skills)
+
+def build_matches_response(top_indices, final_scores, algorithm_name, explanations=None):
+    """
+    Build the job matches response from indices and scores
+    explanations: optional (matched, missing) skill lists, one per index
+    """
     matches = []
-    for idx in top_indices:
-        job = jobs_df.iloc[idx]
-        
+    # One iloc for all K rows instead of K single-row Series
+    jobs = jobs_df.iloc[np.asarray(top_indices, dtype=np.int64)].to_dict('records')
+    for i, (idx, job) in enumerate(zip(top_indices, jobs)):
         # Handle NaN values
         domain = job.get('Domain', 'Not specified')
         if pd.isna(domain):
@@ -390,6 +1104,7 @@ def build_matches_response(top_indices, final_scores, algorithm_name):
             linkedin_url = ''
         
         match = JobMatch(
+            jobId=int(idx),
             Job_Title=job['Job Title'],
             Company=job['Company'],
             Company_Logo=job.get('Company Logo', ''),
@@ -400,153 +1115,516 @@ def build_matches_response(top_indices, final_scores, algorithm_name):
             matchScore=float(final_scores[idx] * 100),  # Convert to percentage
             domain=str(domain)
         )
+        if explanations is not None:
+            match.matchedSkills, match.missingSkills = explanations[i]
+        match.aliasIds = job_alias_ids.get(int(idx))
         
         matches.append(match)
     
     return matches
 
 # ==========================================
-# 🚀 API ENDPOINTS
+# 🔄 BACKGROUND LOADING & READINESS
 # ==========================================
 
-@app.on_event("startup")
-async def startup_event():
-    """Load model and data on startup"""
-    print("\n" + "="*60)
-    print("🚀 STARTING NEXUS API v2.1.0 (ML ENHANCED + FALLBACK)")
-    print("="*60)
-    print(f"📂 Current working directory: {os.getcwd()}")
-    print(f"📂 Files in current directory: {os.listdir('.')}")
-    
-    model_loaded = load_latest_model()
+def load_serving_state():
+    """Load the model, dataset and job index; (model_loaded, data_loaded)"""
+    try:
+        model_loaded = load_latest_model()
+    finally:
+        readiness.mark_models_loaded()
     data_loaded = load_jobs_dataset()
     
+    if model_loaded and data_loaded:
+        load_or_build_job_index()
+        if SHARDS > 1:
+            start_shard_pool(SHARDS)
+    
     if not model_loaded:
-        print("⚠️ WARNING: No trained model loaded!")
-        print("   Will use fallback TF-IDF matching")
+        logger.warning("⚠️ No trained model loaded! Will use fallback TF-IDF matching")
     
     if not data_loaded:
-        print("❌ CRITICAL: No jobs dataset loaded!")
-        print("   Application will not function properly")
-    else:
-        print(f"✅ Backend ready with {len(jobs_df)} jobs")
+        logger.critical("❌ No jobs dataset loaded! Application will not function properly")
+    return model_loaded, data_loaded
+
+def warmup_queries():
+    """(name, fn) synthetic queries touching every scoring path the served requests will use"""
+    engines = [resolve_engine()]
+    if job_index is not None and job_index.has_embeddings and 'dense' not in engines:
+        engines.append('dense')
     
-    print("="*60 + "\n")
+    queries = []
+    for name, cv in CV_FIXTURES.items():
+        for engine in engines if trained_model is not None else [None]:
+            queries.append((f"{name}:{engine or 'fallback'}",
+                            lambda cv=cv, engine=engine: predict_job_matches(cv, 10, engine, explain=True)))
+    if batcher is not None and trained_model is not None:
+        # Also measures the batched similarity stages for the deadline gate
+        batch = [(cv, 10, engine, False, None) for engine in engines for cv in CV_FIXTURES.values()]
+        queries.append(('batched', lambda: predict_batch_with_trained_model(batch)))
+    if domain_model is not None:
+        queries.append(('domain', lambda: predict_domains(list(CV_FIXTURES.values()))))
+    return queries
+
+async def load_in_background():
+    """Load, then warm up with synthetic queries, moving readiness through its phases"""
+    try:
+        readiness.enter('loading')
+        _, data_loaded = await run_in_threadpool(load_serving_state)
+        if not data_loaded:
+            readiness.enter('failed', "Jobs dataset not loaded")
+            return
+        
+        readiness.enter('warming')
+        if WARMUP_ROUNDS > 0:
+            # A failing query is logged and skipped: the endpoints still serve (and report) that path's errors
+            latencies, failures = await run_in_threadpool(warm_up, warmup_queries(), WARMUP_ROUNDS)
+            logger.info("🔥 Warm-up queries done", extra={
+                'rounds': WARMUP_ROUNDS,
+                'latency_ms': latencies,
+                'failed': failures or None,
+            })
+        
+        if MEMORY_REPORT:
+            try:
+                log_memory_report()
+            except Exception as e:
+                logger.warning(f"⚠️ Memory report failed: {e}")
+        
+        readiness.enter('ready')
+        logger.info(f"✅ Backend ready with {len(jobs_df)} jobs")
+    except Exception as e:
+        logger.exception(f"❌ Loading failed: {e}")
+        readiness.enter('failed', f"{type(e).__name__}: {e}")
+
+# ==========================================
+# 🚀 API ENDPOINTS
+# ==========================================
+
+@app.on_event("startup")
+async def startup_event():
+    """Start serving right away and load model and data in the background"""
+    setup_logging()
+    logger.info("🚀 STARTING NEXUS API v2.1.0 (ML ENHANCED + FALLBACK)", extra={
+        'cwd': os.getcwd(),
+        'files': os.listdir('.'),
+    })
+    
+    configure_blas_threads()
+    
+    global batcher
+    if BATCH_WINDOW_MS > 0:
+        batcher = MicroBatcher(predict_batch_with_trained_model, BATCH_WINDOW_MS, BATCH_MAX_SIZE)
+        logger.info("📦 Micro-batching enabled", extra={
+            'window_ms': BATCH_WINDOW_MS,
+            'max_batch': BATCH_MAX_SIZE,
+        })
+    
+    # Created here so its semaphore belongs to the serving event loop
+    global admission
+    if MAX_CONCURRENT > 0:
+        admission = AdmissionController(MAX_CONCURRENT, MAX_QUEUE)
+        logger.info("🚦 Admission control enabled", extra={
+            'max_concurrent': MAX_CONCURRENT,
+            'max_queue': MAX_QUEUE,
+            'rate_limit': RATE_LIMIT or None,
+        })
+    
+    global loading_task
+    if BACKGROUND_LOAD:
+        # Liveness probes are answered meanwhile; scoring endpoints return 503 until ready
+        loading_task = asyncio.get_running_loop().create_task(load_in_background())
+    else:
+        await load_in_background()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop shard workers and flush queued log records"""
+    # Loading runs in a thread that can't be interrupted: let it finish so it can't start shards after this
+    if loading_task is not None and not loading_task.done():
+        await asyncio.wait({loading_task})
+    stop_shard_pool()
+    shutdown_logging()
 
 @app.get("/", response_model=HealthResponse)
 async def health_check():
-    """Health check endpoint"""
+    """Liveness: answers as soon as the server is up, whether or not loading is done"""
     return HealthResponse(
         status="healthy",
         version="2.1.0",
         ml_library="scikit-learn (Trained Models)",
-        model_loaded=trained_model is not None
+        model_loaded=trained_model is not None,
+        ready=readiness.ready,
+        phase=readiness.phase,
     )
 
+@app.get("/ready", response_model=ReadinessResponse)
+async def ready_check(response: Response):
+    """Readiness: 200 once the index is built and warmed up, 503 (with Retry-After) until then"""
+    status = readiness.status()
+    if not status['ready']:
+        response.status_code = 503
+        response.headers.update(retry_after_header(NOT_READY_RETRY_AFTER))
+    return ReadinessResponse(**status, totalJobs=len(jobs_df) if jobs_df is not None else 0)
+
+@app.get("/metrics")
+async def metrics_endpoint():
+    """Prometheus metrics (stage latency histograms, scoring path and cache counters)"""
+    return Response(content=metrics.REGISTRY.render(), media_type=metrics.CONTENT_TYPE)
+
+def require_admin(http_request):
+    """404 unless NEXUS_ADMIN_TOKEN is set, 403 unless the request carries it"""
+    if ADMIN_TOKEN is None:
+        raise HTTPException(status_code=404, detail="Not Found")
+    token = http_request.headers.get(ADMIN_HEADER, '')
+    if not hmac.compare_digest(token.encode(), ADMIN_TOKEN.encode()):
+        raise HTTPException(status_code=403, detail="Admin token required")
+
+@app.get("/admin/memory")
+async def memory_endpoint(http_request: Request):
+    """Resident memory by component (DataFrame columns, vectorizer, models, indexes, caches) and per-request peaks"""
+    require_admin(http_request)
+    report = await run_in_threadpool(memory_report, *memory_components())
+    report['request_peaks'] = memory_sampler.report()
+    report['request_sample'] = memory_sampler.sample
+    return report
+
+async def in_worker(fn, *args):
+    """fn(*args) in the thread pool, under cProfile when the request was selected for profiling"""
+    return await run_in_threadpool(profiled_call, fn, *args)
+
+def require_ready(endpoint, models_only=False):
+    """
+    503 with Retry-After while the model, dataset and index are still loading.
+    models_only: for endpoints that need the model artifacts but not the dataset.
+    """
+    if readiness.ready or (models_only and readiness.models_loaded):
+        return
+    ADMISSION_REJECTED.labels(endpoint, 'not_ready').inc()
+    raise HTTPException(status_code=503, detail=f"Service not ready ({readiness.phase}), retry later",
+                        headers=retry_after_header(NOT_READY_RETRY_AFTER))
+
+async def admitted(http_request, response, endpoint, compute):
+    """
+    Run `await compute()` behind the per-client rate limit and an admission
+    slot, cancelling it if the client disconnects. Queue wait and compute
+    time are returned in the Server-Timing header.
+    """
+    require_ready(endpoint)
+    
+    if rate_limiter is not None:
+        wait = rate_limiter.acquire(client_key(http_request))
+        if wait:
+            ADMISSION_REJECTED.labels(endpoint, 'rate_limited').inc()
+            raise HTTPException(status_code=429, detail="Rate limit exceeded", headers=retry_after_header(wait))
+    
+    if admission is None:
+        return await compute()
+    
+    async def run():
+        async with admission.slot(endpoint) as queue_wait:
+            start = time.perf_counter()
+            result = await compute()
+            response.headers['Server-Timing'] = (
+                f"queue;dur={queue_wait * 1000:.1f}, compute;dur={(time.perf_counter() - start) * 1000:.1f}")
+            return result
+    
+    try:
+        return await cancel_on_disconnect(http_request, run(), endpoint)
+    except Rejected as e:
+        logger.warning("🚦 Request refused", extra={'endpoint': endpoint, 'reason': e.reason, 'sampled': True})
+        raise HTTPException(status_code=e.status_code, detail="Server busy, retry later",
+                            headers=retry_after_header(e.retry_after))
+    except ClientDisconnected:
+        # Nobody is left to read it; 499 as in nginx's "client closed request"
+        raise HTTPException(status_code=499, detail="Client disconnected")
+
 @app.post("/api/predict-jobs", response_model=PredictJobsResponse)
-async def predict_jobs(request: PredictJobsRequest):
+async def predict_jobs(request: PredictJobsRequest, http_request: Request, response: Response):
     """
     Predict best matching jobs for a CV using trained ML model or fallback
     """
+    with metrics.timed_request('predict-jobs'), request_observer.observe(
+            'predict-jobs', http_request, request.cvData, request.model_dump(exclude={'cvData'})):
+        fields = validate_fields(request.fields)
+        # The budget starts on arrival, so time spent queued for admission counts against it
+        budget_ms = request.deadlineMs if request.deadlineMs is not None else DEADLINE_MS
+        deadline = deadline_from_budget(budget_ms)
+        result = await admitted(http_request, response, 'predict-jobs',
+                                lambda: _predict_jobs_shared(request, deadline, budget_ms))
+        if fields is None:
+            return result
+        with metrics.span('serialize', 'projection'):
+            return projected_response(result, fields, response)
+
+def validate_fields(fields):
+    """Requested JobMatch fields as a set, None for all of them; 400 on unknown names"""
+    if fields is None:
+        return None
+    unknown = sorted(set(fields) - set(JobMatch.model_fields))
+    if unknown or not fields:
+        raise HTTPException(status_code=400,
+                            detail=f"Unknown fields {unknown}, expected a subset of {list(JobMatch.model_fields)}")
+    return set(fields)
+
+def projected_response(result, fields, response):
+    """
+    PredictJobsResponse JSON keeping only `fields` of every match. Serialized
+    here directly, skipping the response_model validation of full matches.
+    """
+    payload = {name: getattr(result, name) for name in PredictJobsResponse.model_fields}
+    payload['matches'] = [match.model_dump(include=fields) for match in result.matches]
+    body = json.dumps(payload, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    # Headers set on the injected response (Server-Timing) aren't merged into a returned Response
+    headers = {k: v for k, v in response.headers.items() if k not in ('content-length', 'content-type')}
+    return Response(content=body, media_type='application/json', headers=headers)
+
+async def _predict_jobs_shared(request, deadline=None, budget_ms=None):
+    # A profiled request computes on its own, so the profile is of its work
+    if single_flight is None or profiling_requested():
+        return await _predict_jobs_async(request, deadline)
+    
+    # Same CV (any key order) + same parameters while one is in flight: wait for its result
+    key = request_key('predict-jobs', request.cvData, request.topK, request.engine or SCORING_ENGINE,
+                      bool(request.explain), budget_ms if deadline is not None else None)
+    return await single_flight.run(key, lambda: _predict_jobs_async(request, deadline))
+
+async def _predict_jobs_async(request, deadline=None):
+    # Concurrent trained-path requests are coalesced into micro-batches when enabled
+    # (not those scored by shards or from skill candidates: they'd only wait for the window)
+    if (batcher is not None and trained_model is not None and job_index is not None and not profiling_requested()
+            and not single_cv_dispatch(deadline)):
+        return await _predict_jobs_batched(request, deadline)
+    return await in_worker(_predict_jobs, request, deadline)
+
+def _predict_jobs(request, deadline=None):
     try:
         cv_data = request.cvData
         top_k = request.topK
         
         # Log incoming CV data for debugging
-        print(f"\n🔍 Received CV with {len(cv_data.get('skills', []))} skills")
+        logger.info("🔍 Received CV", extra={
+            'sampled': True,
+            'skills': len(cv_data.get('skills', [])),
+            'top_k': top_k,
+        })
         
         # Get job matches (now returns dict with 'matches' and 'algorithm')
-        result = predict_job_matches(cv_data, top_k)
+        result = predict_job_matches(cv_data, top_k, request.engine, explain=request.explain, deadline=deadline)
+        return build_predict_response(result)
+    
+    except HTTPException:
+        raise
+    
+    except Exception as e:
+        raise predict_error(e, request.cvData)
+
+async def _predict_jobs_batched(request, deadline=None):
+    try:
+        engine = resolve_engine(request.engine)
+        require_engine(get_job_index(), engine)
         
-        # Handle both old format (list) and new format (dict)
-        if isinstance(result, dict):
-            matches = result['matches']
-            algorithm = result.get('algorithm', 'Unknown')
-        else:
-            # Backwards compatibility
-            matches = result
-            algorithm = "ML Enhanced (TF-IDF + Skill Matching)"
+        logger.info("🔍 Received CV (batched)", extra={
+            'sampled': True,
+            'skills': len(request.cvData.get('skills', [])),
+            'top_k': request.topK,
+        })
         
-        return PredictJobsResponse(
+        result = await batcher.submit((request.cvData, request.topK, engine, bool(request.explain), deadline))
+        return build_predict_response(result)
+    
+    except HTTPException:
+        raise
+    
+    except Exception as e:
+        raise predict_error(e, request.cvData)
+
+def build_predict_response(result):
+    """PredictJobsResponse from a prediction result"""
+    # Handle both old format (list) and new format (dict)
+    if isinstance(result, dict):
+        matches = result['matches']
+        algorithm = result.get('algorithm', 'Unknown')
+    else:
+        # Backwards compatibility
+        matches = result
+        algorithm = "ML Enhanced (TF-IDF + Skill Matching)"
+    
+    return PredictJobsResponse(
+        success=True,
+        matches=matches,
+        totalJobs=len(jobs_df) if jobs_df is not None else 0,
+        algorithm=algorithm,
+        model_used=type(trained_model).__name__ if trained_model else "Fallback TF-IDF"
+    )
+
+def predict_error(e, cv_data):
+    """Log a failed prediction and turn it into a 500"""
+    # Queued and written to backend_error.log by the logging listener thread
+    logger.exception(f"❌ ERROR in predict_jobs: {e}", extra={
+        'error_type': type(e).__name__,
+        'cv_keys': list(cv_data.keys()) if cv_data else None,
+        'cv_skills': cv_data.get('skills', [])[:5] if cv_data else None,
+    })
+    return HTTPException(status_code=500, detail=str(e))
+
+@app.post("/api/predict-domain", response_model=PredictDomainResponse)
+async def predict_domain(request: PredictDomainRequest, http_request: Request, response: Response):
+    """
+    Most likely job domains for a CV, from the compiled domain classifier
+    """
+    with metrics.timed_request('predict-domain'), request_observer.observe(
+            'predict-domain', http_request, request.cvData, request.model_dump(exclude={'cvData'})):
+        return await admitted(http_request, response, 'predict-domain', lambda: in_worker(_predict_domain, request))
+
+def _predict_domain(request):
+    if domain_model is None or domain_encoder is None or tfidf_vectorizer is None:
+        raise HTTPException(status_code=503, detail="Domain classifier not loaded")
+    try:
+        probabilities, seconds = predict_domains([request.cvData])
+        ranked = np.argsort(-probabilities[0], kind='stable')[:request.topK or None]
+        domains = domain_encoder.inverse_transform(domain_model.classes_.astype(np.int64)[ranked])
+
+        return PredictDomainResponse(
             success=True,
-            matches=matches,
-            totalJobs=len(jobs_df) if jobs_df is not None else 0,
-            algorithm=algorithm,
-            model_used=type(trained_model).__name__ if trained_model else "Fallback TF-IDF"
+            domain=str(domains[0]),
+            probabilities=[DomainProbability(domain=str(domain), probability=float(probabilities[0][i]))
+                           for domain, i in zip(domains, ranked)],
+            model_used=getattr(domain_model, 'source', type(domain_model).__name__),
+            compiled=hasattr(domain_model, 'trees'),
+            inferenceMs=seconds * 1000,
         )
-    
+
     except Exception as e:
-        import traceback
-        error_msg = traceback.format_exc()
-        print(f"\n❌ ERROR in predict_jobs:")
-        print(error_msg)
-        print(f"Error type: {type(e).__name__}")
-        print(f"Error message: {str(e)}")
-        
-        # Log to file for debugging
-        try:
-            with open('backend_error.log', 'a', encoding='utf-8') as f:
-                f.write(f"\n{'='*60}\n")
-                f.write(f"Error at: {datetime.now()}\n")
-                f.write(f"CV Data Keys: {cv_data.keys() if cv_data else 'None'}\n")
-                f.write(f"CV Skills: {cv_data.get('skills', [])[:5] if cv_data else 'None'}\n")
-                f.write(f"Error type: {type(e).__name__}\n")
-                f.write(f"Error: {error_msg}\n")
-                f.flush()  # Force write
-        except Exception as log_error:
-            print(f"Failed to write log: {log_error}")
-        
-        raise HTTPException(status_code=500, detail=str(e))
+        raise predict_error(e, request.cvData)
+
+def predict_domains(cv_datas):
+    """
+    Domain classifier probabilities of several CVs, one row per CV in
+    domain_model.classes_ order, from one batched predict_proba call.
+    Also returns the seconds spent in the classifier.
+    """
+    with metrics.span('extract_cv_features', 'domain'):
+        cv_texts = [extract_cv_features(cv_data) for cv_data in cv_datas]
+    with metrics.span('cv_transform', 'domain'):
+        cv_tfidf = tfidf_vectorizer.transform(cv_texts)
+        skills = unique_skills(all_skills)
+        rows = [cv_feature_row(domain_model, cv_data, cv_tfidf[i], set(extract_skills_from_text(cv_text)), skills,
+                               exp_encoder, work_encoder)
+                for i, (cv_data, cv_text) in enumerate(zip(cv_datas, cv_texts))]
+        features = pd.concat(rows) if isinstance(rows[0], pd.DataFrame) else np.vstack(rows)
+
+    with metrics.span('domain_inference', 'domain'):
+        start = time.perf_counter()
+        probabilities = domain_model.predict_proba(features)
+        return probabilities, time.perf_counter() - start
 
 @app.post("/api/analyze-cv", response_model=CVAnalysisResponse)
 async def analyze_cv(request: CVAnalysisRequest):
     """
     Analyze CV and provide insights
     """
+    with metrics.timed_request('analyze-cv'):
+        # Only the skill taxonomy is needed, not the dataset or index
+        require_ready('analyze-cv', models_only=True)
+        return _analyze_cv(request)
+
+def _analyze_cv(request):
     try:
         cv_data = request.cvData
         
         # Extract skills
-        cv_text = extract_cv_features(cv_data)
-        cv_skills = extract_skills_from_text(cv_text)
-        
-        # Calculate skill coverage
-        skill_coverage = len(cv_skills) / len(all_skills) * 100 if all_skills else 0
-        
-        # Calculate career score (0-100)
-        num_skills = len(cv_skills)
-        num_experience = len(cv_data.get('experience', []))
-        num_projects = len(cv_data.get('projects', []))
-        
-        career_score = min(100, (
-            num_skills * 2 +
-            num_experience * 10 +
-            num_projects * 5
-        ))
-        
-        insights = {
-            "skills_found": cv_skills,
-            "total_skills": len(cv_skills),
-            "experience_count": num_experience,
-            "projects_count": num_projects,
-            "recommendations": [
-                "Add more technical skills to increase match rate" if num_skills < 5 else "Great skill diversity!",
-                "Add more project descriptions" if num_projects < 3 else "Good project portfolio!",
-                "Add more work experience" if num_experience < 2 else "Strong experience background!"
-            ]
-        }
+        with metrics.span('extract_cv_features', 'analyze'):
+            cv_text = extract_cv_features(cv_data)
+        with metrics.span('skill_extraction', 'analyze'):
+            cv_skills = extract_skills_from_text(cv_text)
+        
+        return CVAnalysisResponse(success=True, **build_cv_analysis(cv_data, cv_skills))
+    
+    except Exception as e:
+        logger.exception(f"❌ ERROR in analyze_cv: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+def build_cv_analysis(cv_data, cv_skills):
+    """Skill coverage, career score and insights for a CV whose skills are already extracted"""
+    # Calculate skill coverage
+    skill_coverage = len(cv_skills) / len(all_skills) * 100 if all_skills else 0
+    
+    # Calculate career score (0-100)
+    num_skills = len(cv_skills)
+    num_experience = len(cv_data.get('experience', []))
+    num_projects = len(cv_data.get('projects', []))
+    
+    career_score = min(100, (
+        num_skills * 2 +
+        num_experience * 10 +
+        num_projects * 5
+    ))
+    
+    insights = {
+        "skills_found": cv_skills,
+        "total_skills": len(cv_skills),
+        "experience_count": num_experience,
+        "projects_count": num_projects,
+        "recommendations": [
+            "Add more technical skills to increase match rate" if num_skills < 5 else "Great skill diversity!",
+            "Add more project descriptions" if num_projects < 3 else "Good project portfolio!",
+            "Add more work experience" if num_experience < 2 else "Strong experience background!"
+        ]
+    }
+    
+    return {
+        'skillCoverage': skill_coverage,
+        'careerScore': career_score,
+        'insights': insights,
+    }
+
+@app.post("/api/analyze-and-match", response_model=AnalyzeAndMatchResponse)
+async def analyze_and_match(request: AnalyzeAndMatchRequest, http_request: Request, response: Response):
+    """
+    CV insights and job matches in one call: the CV text and skills are
+    extracted once and shared by the analysis and the matching
+    """
+    with metrics.timed_request('analyze-and-match'), request_observer.observe(
+            'analyze-and-match', http_request, request.cvData, request.model_dump(exclude={'cvData'})):
+        return await admitted(http_request, response, 'analyze-and-match', lambda: _analyze_and_match_shared(request))
+
+async def _analyze_and_match_shared(request):
+    if single_flight is None or profiling_requested():
+        return await in_worker(_analyze_and_match, request)
+    
+    key = request_key('analyze-and-match', request.cvData, request.topK, request.engine or SCORING_ENGINE,
+                      bool(request.explain))
+    return await single_flight.run(key, lambda: in_worker(_analyze_and_match, request))
+
+def _analyze_and_match(request):
+    try:
+        cv_data = request.cvData
+        
+        with metrics.span('extract_cv_features', 'analyze-and-match'):
+            cv_text = extract_cv_features(cv_data)
+        with metrics.span('skill_extraction', 'analyze-and-match'):
+            cv_skills = extract_skills_from_text(cv_text)
         
-        return CVAnalysisResponse(
+        analysis = build_cv_analysis(cv_data, cv_skills)
+        result = predict_job_matches(cv_data, request.topK, request.engine, cv_text=cv_text, cv_skills=cv_skills,
+                                     explain=request.explain)
+        predictions = build_predict_response(result)
+        
+        return AnalyzeAndMatchResponse(
             success=True,
-            skillCoverage=skill_coverage,
-            careerScore=career_score,
-            insights=insights
+            **analysis,
+            matches=predictions.matches,
+            totalJobs=predictions.totalJobs,
+            algorithm=predictions.algorithm,
+            model_used=predictions.model_used
         )
     
+    except HTTPException:
+        raise
+    
     except Exception as e:
-        import traceback
-        traceback.print_exc()
-        raise HTTPException(status_code=500, detail=str(e))
+        raise predict_error(e, request.cvData)
 
 # ==========================================
 # 🏃 RUN SERVER
@@ -0,0 +1,92 @@
+"""
+Micro-batching of concurrent predictions
+The first request to arrive opens a short window; every request that arrives
+before it closes (or until the batch is full) is scored together in one
+matrix-matrix product, then each caller gets its own result back. A request
+therefore waits at most one window before its batch starts.
+
+Environment (read by app.py):
+    NEXUS_BATCH_WINDOW_MS  how long a batch stays open (default 0 = batching off)
+    NEXUS_BATCH_MAX_SIZE   dispatch as soon as this many requests are waiting (default 32)
+"""
+
+import asyncio
+import contextvars
+import time
+
+from starlette.concurrency import run_in_threadpool
+
+try:
+    from . import metrics
+except ImportError:
+    import metrics
+
+BATCH_SIZE = metrics.Histogram(
+    'nexus_batch_size', 'Requests scored together per micro-batch',
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128))
+BATCH_WAIT_SECONDS = metrics.Histogram(
+    'nexus_batch_wait_seconds', 'Time a request waited for its micro-batch to be dispatched',
+    buckets=(0.0005, 0.001, 0.002, 0.005, 0.01, 0.02, 0.05, 0.1))
+
+
+class MicroBatcher:
+    """
+    Coalesce concurrent submit() calls. `process(items)` runs in the thread
+    pool with the items of one batch and returns one result per item, in order;
+    if it raises, every caller in that batch gets the exception.
+    """
+
+    def __init__(self, process, window_ms, max_batch=32):
+        self.process = process
+        self.window = window_ms / 1000
+        self.max_batch = max(1, max_batch)
+        # Only touched from the event loop thread, so no lock is needed
+        self._pending = []
+        self._timer = None
+
+    async def submit(self, item):
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((item, future, time.perf_counter()))
+
+        if len(self._pending) >= self.max_batch:
+            self._dispatch()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._dispatch)
+        return await future
+
+    def _dispatch(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        batch, self._pending = self._pending[:self.max_batch], self._pending[self.max_batch:]
+        if batch:
+            # A batch serves several requests: run it outside the context (spans,
+            # correlation id, profiler) of whichever request happened to dispatch it
+            asyncio.get_running_loop().create_task(self._run(batch), context=contextvars.Context())
+        if self._pending:
+            self._timer = asyncio.get_running_loop().call_later(self.window, self._dispatch)
+
+    async def _run(self, batch):
+        # Callers cancelled while waiting (e.g. the client disconnected) are not scored
+        batch = [entry for entry in batch if not entry[1].done()]
+        if not batch:
+            return
+        dispatched = time.perf_counter()
+        BATCH_SIZE.observe(len(batch))
+        for _, _, queued in batch:
+            BATCH_WAIT_SECONDS.observe(dispatched - queued)
+
+        try:
+            results = await run_in_threadpool(self.process, [item for item, _, _ in batch])
+        except Exception as e:
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, future, _), result in zip(batch, results):
+            # The caller may have gone away (cancelled) while the batch ran
+            if not future.done():
+                future.set_result(result)
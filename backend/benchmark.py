@@ -0,0 +1,563 @@
+"""
+Offline benchmark suite for the job matching pipeline
+Generates synthetic job corpora and CV fixtures, times every stage of
+predict_job_matches (trained model + fallback path) through the pipeline
+spans in metrics.py and writes JSON results
+
+Usage (from the backend/ directory):
+    python benchmark.py                                   # 21k jobs, both paths
+    python benchmark.py --sizes 21k,200k,2M --repeat 10   # macro benchmark
+    python benchmark.py --dataset jobs_dataset_50k.csv    # real corpus
+    python benchmark.py --paths trained --precision-report  # float32/int8 index accuracy
+    python benchmark.py --paths trained --engine-report     # dense embedding vs sparse
+    python benchmark.py --compare old.json new.json       # compare two runs
+    python benchmark.py --dataset jobs_dataset_50k.csv --replay slow_requests/slow_requests_20250101.jsonl
+"""
+
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import sklearn
+
+import app
+import metrics
+from cv_fixtures import CV_FIXTURES
+from job_index import PRECISIONS, JobIndex
+from profiling import load_slow_requests
+
+# ==========================================
+# 🧪 SYNTHETIC DATA
+# ==========================================
+
+DOMAIN_VOCABULARY = {
+    'IT & Software': {
+        'titles': ['Software Engineer', 'Backend Developer', 'Frontend Developer', 'DevOps Engineer',
+                   'Data Scientist', 'Cloud Architect', 'Full Stack Developer', 'Machine Learning Engineer'],
+        'skills': ['Python', 'Java', 'JavaScript', 'TypeScript', 'React', 'Node.js', 'Django', 'FastAPI',
+                   'Docker', 'Kubernetes', 'AWS', 'Azure', 'PostgreSQL', 'MongoDB', 'Git', 'Linux',
+                   'CI/CD', 'Terraform', 'Machine Learning', 'PyTorch', 'REST API', 'GraphQL'],
+        'phrases': ['design and build scalable services', 'maintain our cloud infrastructure',
+                    'write clean, tested code', 'collaborate with product and design teams',
+                    'deploy microservices to production', 'improve system reliability and monitoring'],
+    },
+    'Engineering': {
+        'titles': ['Mechanical Engineer', 'Process Engineer', 'Quality Engineer', 'Automation Engineer',
+                   'Manufacturing Engineer', 'Electrical Engineer'],
+        'skills': ['CAD', 'SolidWorks', 'AutoCAD', 'ANSYS', 'MATLAB', 'Simulink', 'PLC', 'SCADA',
+                   'Lean Manufacturing', 'Six Sigma', 'Quality Control', 'Project Management'],
+        'phrases': ['optimize production lines', 'design mechanical components',
+                    'lead root cause analysis', 'support plant maintenance teams',
+                    'ensure compliance with safety standards', 'drive continuous improvement'],
+    },
+    'Finance': {
+        'titles': ['Financial Analyst', 'Accountant', 'Risk Analyst', 'Investment Associate', 'Auditor'],
+        'skills': ['Data Analysis', 'Statistics', 'Python', 'R', 'SQL Server', 'Communication',
+                   'Problem Solving', 'Leadership'],
+        'phrases': ['prepare monthly financial reports', 'analyze investment opportunities',
+                    'manage budgeting and forecasting', 'assess credit and market risk',
+                    'support external audits'],
+    },
+    'Marketing': {
+        'titles': ['Marketing Manager', 'Digital Marketing Specialist', 'Content Strategist', 'SEO Specialist'],
+        'skills': ['Communication', 'Data Analysis', 'Project Management', 'Leadership', 'Team Work'],
+        'phrases': ['run multi-channel campaigns', 'grow our brand awareness', 'analyze campaign performance',
+                    'create engaging content', 'manage social media channels'],
+    },
+    'Healthcare': {
+        'titles': ['Registered Nurse', 'Clinical Research Associate', 'Pharmacist', 'Medical Data Analyst'],
+        'skills': ['Communication', 'Team Work', 'Statistics', 'Data Analysis', 'Problem Solving'],
+        'phrases': ['provide high quality patient care', 'coordinate clinical trials',
+                    'maintain accurate medical records', 'work in multidisciplinary teams'],
+    },
+    'Education': {
+        'titles': ['Teacher', 'Lecturer', 'Instructional Designer', 'Academic Advisor'],
+        'skills': ['Communication', 'Leadership', 'Team Work', 'Project Management'],
+        'phrases': ['prepare and deliver lessons', 'mentor and support students',
+                    'design engaging curricula', 'assess student progress'],
+    },
+    'Business': {
+        'titles': ['Business Analyst', 'Project Manager', 'Operations Manager', 'Product Owner', 'Consultant'],
+        'skills': ['Agile', 'Scrum', 'Project Management', 'Communication', 'Leadership', 'Data Analysis'],
+        'phrases': ['gather and document business requirements', 'manage stakeholder expectations',
+                    'streamline operational processes', 'own the product roadmap'],
+    },
+    'Not specified': {
+        'titles': ['Assistant', 'Coordinator', 'Specialist', 'Associate'],
+        'skills': ['Communication', 'Team Work', 'Problem Solving'],
+        'phrases': ['support daily operations', 'handle administrative tasks', 'assist the team'],
+    },
+}
+
+COMPANIES = ['Capgemini', 'Scalian', 'Atos', 'Sopra Steria', 'Thales', 'Airbus', 'Renault', 'BNP Paribas',
+             'Société Générale', 'Orange', 'OCP Group', 'Inwi', 'Deloitte', 'Accenture', 'Amazon', 'Google']
+LOCATIONS = [('Paris', 'France'), ('Lyon', 'France'), ('Toulon', 'France'), ('Casablanca', 'Morocco'),
+             ('Rabat', 'Morocco'), ('Tanger', 'Morocco'), ('Berlin', 'Germany'), ('Madrid', 'Spain'),
+             ('London', 'United Kingdom'), ('Remote', 'Worldwide')]
+WORK_TYPES = ['Full-time', 'Part-time', 'Contract', 'Remote', 'Hybrid']
+EXPERIENCE_LEVELS = ['Entry Level', 'Junior', 'Mid-Level', 'Senior', 'Lead', 'Principal']
+
+
+def parse_size(text):
+    """Parse corpus sizes like '21k', '200k' or '2M'"""
+    text = text.strip().lower()
+    multiplier = 1
+    if text.endswith('k'):
+        multiplier, text = 1_000, text[:-1]
+    elif text.endswith('m'):
+        multiplier, text = 1_000_000, text[:-1]
+    return int(float(text) * multiplier)
+
+
+def generate_jobs_corpus(n_rows, seed=42):
+    """Generate a reproducible synthetic jobs DataFrame with the dataset's columns"""
+    rng = np.random.default_rng(seed)
+    domains = list(DOMAIN_VOCABULARY)
+    domain_ids = rng.integers(0, len(domains), size=n_rows)
+    company_ids = rng.integers(0, len(COMPANIES), size=n_rows)
+    location_ids = rng.integers(0, len(LOCATIONS), size=n_rows)
+
+    titles, descriptions = [], []
+    for i in range(n_rows):
+        vocab = DOMAIN_VOCABULARY[domains[domain_ids[i]]]
+        title = vocab['titles'][rng.integers(len(vocab['titles']))]
+        n_skills = min(len(vocab['skills']), int(rng.integers(2, 7)))
+        skills = rng.choice(vocab['skills'], size=n_skills, replace=False)
+        phrases = rng.choice(vocab['phrases'], size=min(len(vocab['phrases']), 3), replace=False)
+        titles.append(title)
+        descriptions.append(
+            f"We are looking for a {title} to join {COMPANIES[company_ids[i]]}. "
+            f"You will {', '.join(phrases)}. "
+            f"Required skills: {', '.join(skills)}."
+        )
+
+    return pd.DataFrame({
+        'Job Title': titles,
+        'Company': [COMPANIES[i] for i in company_ids],
+        'Company Logo': [f"https://logo.clearbit.com/{COMPANIES[i].lower().replace(' ', '')}.com" for i in company_ids],
+        'Location': [LOCATIONS[i][0] for i in location_ids],
+        'Country': [LOCATIONS[i][1] for i in location_ids],
+        'Work Type': rng.choice(WORK_TYPES, size=n_rows),
+        'Experience Level': rng.choice(EXPERIENCE_LEVELS, size=n_rows),
+        'LinkedIn URL': [f"https://www.linkedin.com/jobs/view/{4000000000 + i}" for i in range(n_rows)],
+        'Job Description': descriptions,
+        'Domain': [domains[i] for i in domain_ids],
+    })
+
+
+def generate_synthetic_cvs(n_cvs, seed=42):
+    """Generate CVs in the frontend's cvData format, one per sampled domain"""
+    rng = np.random.default_rng(seed)
+    domains = list(DOMAIN_VOCABULARY)
+    cvs = []
+    for _ in range(n_cvs):
+        vocab = DOMAIN_VOCABULARY[domains[rng.integers(len(domains))]]
+        skills = rng.choice(vocab['skills'], size=min(len(vocab['skills']), int(rng.integers(3, 10))), replace=False)
+        cvs.append({
+            'skills': [str(s) for s in skills],
+            'experience': [
+                {
+                    'title': str(rng.choice(vocab['titles'])),
+                    'company': str(rng.choice(COMPANIES)),
+                    'responsibilities': [str(p) for p in rng.choice(vocab['phrases'], size=2, replace=False)]
+                }
+                for _ in range(int(rng.integers(0, 4)))
+            ],
+            'projects': [
+                {'name': 'Project', 'description': [str(rng.choice(vocab['phrases']))]}
+                for _ in range(int(rng.integers(0, 4)))
+            ],
+            'education': [{'degree': 'Master', 'field': str(rng.choice(vocab['titles']))}],
+        })
+    return cvs
+
+
+def build_cv_set(n_synthetic, seed=42):
+    """Real fixtures first, then synthetic CVs"""
+    cvs = [(name, cv) for name, cv in CV_FIXTURES.items()]
+    cvs += [(f'synthetic_{i}', cv) for i, cv in enumerate(generate_synthetic_cvs(n_synthetic, seed))]
+    return cvs
+
+# ==========================================
+# ⏱️ STAGE TIMING
+# ==========================================
+
+class StageRecorder(metrics.SpanCollector):
+    """Collect wall-clock samples (and optionally tracemalloc peaks) per pipeline span"""
+
+    def __init__(self):
+        super().__init__()
+        self.samples = {}
+        self.peaks = {}
+        self.trace_memory = False
+        self._baseline = 0
+        # Highest absolute traced memory seen by any stage; each stage resets the tracemalloc peak
+        self.absolute_peak = 0
+
+    def start(self, stage):
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+            self._baseline = tracemalloc.get_traced_memory()[0]
+
+    def stop(self, stage, seconds):
+        if self.trace_memory:
+            peak = tracemalloc.get_traced_memory()[1]
+            self.absolute_peak = max(self.absolute_peak, peak)
+            self.peaks[stage] = max(self.peaks.get(stage, 0), peak - self._baseline)
+        else:
+            self.samples.setdefault(stage, []).append(seconds)
+
+
+def run_prediction(rec, cv_data, top_k):
+    """Call predict_job_matches exactly as the API does, recording every span plus the total"""
+    if rec.trace_memory:
+        tracemalloc.reset_peak()
+        baseline = tracemalloc.get_traced_memory()[0]
+        rec.absolute_peak = 0
+    start = time.perf_counter()
+    with metrics.collect_spans(rec):
+        app.predict_job_matches(cv_data, top_k)
+    elapsed = time.perf_counter() - start
+    if rec.trace_memory:
+        peak = max(rec.absolute_peak, tracemalloc.get_traced_memory()[1]) - baseline
+        rec.peaks['predict_job_matches'] = max(rec.peaks.get('predict_job_matches', 0), peak)
+    else:
+        rec.samples.setdefault('predict_job_matches', []).append(elapsed)
+
+
+@contextmanager
+def scoring_path(path):
+    """Force the trained or the fallback path for the duration of the block"""
+    saved_model = app.trained_model
+    if path == 'fallback':
+        app.trained_model = None
+    try:
+        yield
+    finally:
+        app.trained_model = saved_model
+
+
+def summarize(samples, peaks):
+    """p50/p95/p99 in milliseconds plus the tracemalloc peak in MB"""
+    summary = {}
+    for name, values in samples.items():
+        ms = np.array(values) * 1000
+        summary[name] = {
+            'n': len(ms),
+            'mean_ms': float(ms.mean()),
+            'min_ms': float(ms.min()),
+            'p50_ms': float(np.percentile(ms, 50)),
+            'p95_ms': float(np.percentile(ms, 95)),
+            'p99_ms': float(np.percentile(ms, 99)),
+            'max_ms': float(ms.max()),
+            'peak_mb': round(peaks.get(name, 0) / (1024 * 1024), 3),
+        }
+    return summary
+
+
+def benchmark_path(path, cvs, repeat, top_k):
+    """Time one scoring path over every CV, `repeat` times, then one traced pass for memory"""
+    rec = StageRecorder()
+
+    with scoring_path(path):
+        # Warm-up (imports, lazy allocations) is not recorded
+        run_prediction(StageRecorder(), cvs[0][1], top_k)
+
+        for _ in range(repeat):
+            for _, cv in cvs:
+                run_prediction(rec, cv, top_k)
+
+        tracemalloc.start()
+        rec.trace_memory = True
+        try:
+            for _, cv in cvs:
+                run_prediction(rec, cv, top_k)
+        finally:
+            rec.trace_memory = False
+            tracemalloc.stop()
+
+    return summarize(rec.samples, rec.peaks)
+
+def ranking_agreement(reference_scores, scores, k):
+    """
+    Share of returned top-k jobs that belong in the reference top-k (jobs tied
+    with the reference k-th score count, since tie order is arbitrary), whether
+    the order is identical, and the largest score difference
+    """
+    reference_scores = np.asarray(reference_scores)
+    reference_top = np.argsort(reference_scores)[::-1][:k]
+    top = np.argsort(scores)[::-1][:k]
+    kth_score = reference_scores[reference_top[-1]]
+    return {
+        'overlap_at_k': float(np.mean(reference_scores[top] >= kth_score - 1e-12)),
+        'same_order': bool(np.array_equal(reference_top, top)),
+        'max_abs_diff': float(np.abs(reference_scores - np.asarray(scores)).max()),
+    }
+
+
+def build_queries(cvs):
+    """(TF-IDF row, skill set) of every CV, as the trained path computes them"""
+    queries = []
+    for _, cv in cvs:
+        cv_text = app.extract_cv_features(cv)
+        queries.append((app.tfidf_vectorizer.transform([cv_text]), set(app.extract_skills_from_text(cv_text))))
+    return queries
+
+
+def scorer_report(similarity, index, queries, reference_scores, repeat, top_k):
+    """Latency of `similarity` (a CV TF-IDF row -> job scores function) and ranking agreement"""
+    timings = []
+    for _ in range(repeat):
+        for cv_tfidf, _ in queries:
+            start = time.perf_counter()
+            similarity(cv_tfidf)
+            timings.append(time.perf_counter() - start)
+
+    agreements = [
+        ranking_agreement(ref, 0.7 * similarity(q) + 0.3 * index.skill_bonus(s), top_k)
+        for (q, s), ref in zip(queries, reference_scores)
+    ]
+    return {
+        'similarity_p50_ms': float(np.percentile(np.array(timings) * 1000, 50)),
+        'mean_overlap_at_k': float(np.mean([a['overlap_at_k'] for a in agreements])),
+        'min_overlap_at_k': float(np.min([a['overlap_at_k'] for a in agreements])),
+        'same_order_share': float(np.mean([a['same_order'] for a in agreements])),
+        # matchScore is a percentage, so report the deviation in score points
+        'max_score_diff_points': 100 * max(a['max_abs_diff'] for a in agreements),
+    }
+
+
+def precision_report(cvs, repeat, top_k):
+    """Memory, similarity latency and ranking agreement of each index precision against float64"""
+    reference = JobIndex.build(app.jobs_df['Job Description'], app.tfidf_vectorizer, app.all_skills)
+    queries = build_queries(cvs)
+    reference_scores = [0.7 * reference.tfidf_scores(q) + 0.3 * reference.skill_bonus(s) for q, s in queries]
+
+    report = {}
+    for precision in PRECISIONS:
+        index = reference if precision == 'float64' else reference.with_precision(precision)
+        report[precision] = {
+            'tfidf_mb': round(index.tfidf_nbytes / (1024 * 1024), 3),
+            'index_mb': round(index.nbytes / (1024 * 1024), 3),
+            'tfidf_shrink': reference.tfidf_nbytes / index.tfidf_nbytes,
+            **scorer_report(index.tfidf_scores, index, queries, reference_scores, repeat, top_k),
+        }
+    return report
+
+
+def engine_report(cvs, repeat, top_k):
+    """Latency, size and ranking agreement of the dense embedding engine against the sparse path"""
+    index = JobIndex.build(app.jobs_df['Job Description'], app.tfidf_vectorizer, app.all_skills,
+                           precision=app.INDEX_PRECISION, embedding=app.embedding,
+                           embedding_dim=app.EMBEDDING_DIM)
+    reference = index if index.precision == 'float64' else JobIndex.build(
+        app.jobs_df['Job Description'], app.tfidf_vectorizer, app.all_skills)
+    queries = build_queries(cvs)
+    reference_scores = [0.7 * reference.tfidf_scores(q) + 0.3 * reference.skill_bonus(s) for q, s in queries]
+
+    engines = {
+        'sparse': (index.tfidf_scores, index.tfidf_nbytes),
+        'dense': (index.embedding_scores, index.embedding_nbytes),
+    }
+    report = {'embedding_dim': int(index.components.shape[0]), 'engines': {}}
+    for engine, (similarity, nbytes) in engines.items():
+        report['engines'][engine] = {
+            'scoring_mb': round(nbytes / (1024 * 1024), 3),
+            **scorer_report(similarity, index, queries, reference_scores, repeat, top_k),
+        }
+    return report
+
+# ==========================================
+# 📊 REPORTING
+# ==========================================
+
+def print_summary(size, path, summary):
+    print(f"\n📊 {path} path — {size:,} jobs")
+    print(f"   {'stage':<24}{'p50 ms':>11}{'p95 ms':>11}{'p99 ms':>11}{'peak MB':>10}")
+    for name, stats in summary.items():
+        print(f"   {name:<24}{stats['p50_ms']:>11.2f}{stats['p95_ms']:>11.2f}"
+              f"{stats['p99_ms']:>11.2f}{stats['peak_mb']:>10.1f}")
+
+
+def print_precision_report(size, report):
+    print(f"\n🎯 Index precision vs float64 — {size:,} jobs")
+    print(f"   {'precision':<10}{'TF-IDF MB':>11}{'shrink':>8}{'sim p50 ms':>12}{'overlap@k':>11}"
+          f"{'min':>6}{'same order':>12}{'max Δ pts':>11}")
+    for precision, stats in report.items():
+        print(f"   {precision:<10}{stats['tfidf_mb']:>11.2f}{stats['tfidf_shrink']:>7.1f}x"
+              f"{stats['similarity_p50_ms']:>12.2f}{stats['mean_overlap_at_k']:>11.3f}"
+              f"{stats['min_overlap_at_k']:>6.2f}{stats['same_order_share']:>12.0%}"
+              f"{stats['max_score_diff_points']:>11.4f}")
+
+
+def print_engine_report(size, report):
+    print(f"\n🧭 Dense embedding (k={report['embedding_dim']}) vs sparse TF-IDF — {size:,} jobs")
+    print(f"   {'engine':<10}{'scoring MB':>11}{'sim p50 ms':>12}{'overlap@k':>11}"
+          f"{'min':>6}{'same order':>12}{'max Δ pts':>11}")
+    for engine, stats in report['engines'].items():
+        print(f"   {engine:<10}{stats['scoring_mb']:>11.2f}{stats['similarity_p50_ms']:>12.2f}"
+              f"{stats['mean_overlap_at_k']:>11.3f}{stats['min_overlap_at_k']:>6.2f}"
+              f"{stats['same_order_share']:>12.0%}{stats['max_score_diff_points']:>11.4f}")
+
+
+def environment_info():
+    """Everything needed to tell whether two result files are comparable"""
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                                text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'git_commit': commit,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'scikit_learn': sklearn.__version__,
+    }
+
+
+def max_rss_mb():
+    """Process peak resident set size (ru_maxrss is KB on Linux, bytes on macOS)"""
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024) if sys.platform == 'darwin' else rss / 1024
+
+
+def compare_results(baseline_path, current_path):
+    """Print p50/p99 ratios for every (corpus, path, stage) present in both files"""
+    with open(baseline_path, encoding='utf-8') as f:
+        baseline = json.load(f)
+    with open(current_path, encoding='utf-8') as f:
+        current = json.load(f)
+
+    baseline_runs = {(r['corpus'], r['path']): r for r in baseline['runs']}
+    print(f"📈 {baseline_path} ({baseline['environment'].get('git_commit')}) → "
+          f"{current_path} ({current['environment'].get('git_commit')})")
+    for run in current['runs']:
+        old = baseline_runs.get((run['corpus'], run['path']))
+        if old is None:
+            continue
+        print(f"\n   {run['path']} path — {run['corpus']}")
+        print(f"   {'stage':<24}{'p50 before':>12}{'p50 after':>12}{'ratio':>8}{'p99 ratio':>11}")
+        for name, stats in run['stages'].items():
+            if name not in old['stages']:
+                continue
+            before = old['stages'][name]
+            ratio = stats['p50_ms'] / before['p50_ms'] if before['p50_ms'] else float('nan')
+            p99_ratio = stats['p99_ms'] / before['p99_ms'] if before['p99_ms'] else float('nan')
+            print(f"   {name:<24}{before['p50_ms']:>12.2f}{stats['p50_ms']:>12.2f}"
+                  f"{ratio:>7.2f}x{p99_ratio:>10.2f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the Nexus job matching pipeline offline")
+    parser.add_argument('--sizes', default='21k', help="Comma-separated synthetic corpus sizes, e.g. 21k,200k,2M")
+    parser.add_argument('--dataset', help="Benchmark a real CSV instead of synthetic corpora")
+    parser.add_argument('--paths', default='trained,fallback', help="Scoring paths to benchmark")
+    parser.add_argument('--repeat', type=int, default=5, help="Timed passes over the CV set")
+    parser.add_argument('--synthetic-cvs', type=int, default=5, help="Synthetic CVs added to the real fixtures")
+    parser.add_argument('--top-k', type=int, default=10)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help="JSON output path (default: benchmarks/bench_<timestamp>.json)")
+    parser.add_argument('--precision-report', action='store_true',
+                        help="Compare float32/int8 job indexes against float64 (trained path only)")
+    parser.add_argument('--engine-report', action='store_true',
+                        help="Compare the dense embedding engine against the sparse path (trained path only)")
+    parser.add_argument('--replay', action='append', default=[], metavar='JSONL',
+                        help="Add the CVs of recorded slow requests (NEXUS_SLOW_REQUEST_DIR files)")
+    parser.add_argument('--compare', nargs=2, metavar=('BASELINE', 'CURRENT'), help="Compare two result files")
+    args = parser.parse_args()
+
+    if args.compare:
+        compare_results(*args.compare)
+        return
+
+    print("="*70)
+    print("⏱️  NEXUS MATCHING BENCHMARK")
+    print("="*70)
+
+    model_loaded = app.load_latest_model()
+    paths = [p.strip() for p in args.paths.split(',') if p.strip()]
+    if 'trained' in paths and not model_loaded:
+        print("⚠️ No trained model available, skipping the trained path")
+        paths.remove('trained')
+
+    if args.dataset:
+        corpora = [(os.path.basename(args.dataset), lambda: pd.read_csv(args.dataset, encoding='utf-8'))]
+    else:
+        corpora = [(f'synthetic_{size}', lambda size=size: generate_jobs_corpus(size, args.seed))
+                   for size in (parse_size(s) for s in args.sizes.split(','))]
+
+    cvs = build_cv_set(args.synthetic_cvs, args.seed)
+    for replay_path in args.replay:
+        replays = load_slow_requests(replay_path)
+        cvs += [(name, cv) for name, cv, _ in replays]
+        print(f"🐢 Replaying {len(replays)} slow requests from {replay_path}")
+    results = {
+        'environment': environment_info(),
+        'config': {
+            'paths': paths,
+            'repeat': args.repeat,
+            'top_k': args.top_k,
+            'seed': args.seed,
+            'cvs': [name for name, _ in cvs],
+            'model_loaded': model_loaded,
+            'index_precision': app.INDEX_PRECISION,
+            'scoring_engine': app.SCORING_ENGINE,
+        },
+        'runs': [],
+        'precision_reports': [],
+        'engine_reports': [],
+    }
+
+    for corpus_name, load_corpus in corpora:
+        print(f"\n📂 Preparing corpus {corpus_name}...")
+        start = time.perf_counter()
+        app.jobs_df = load_corpus()
+        print(f"   ✅ {len(app.jobs_df):,} jobs in {time.perf_counter() - start:.1f}s")
+
+        for path in paths:
+            summary = benchmark_path(path, cvs, args.repeat, args.top_k)
+            print_summary(len(app.jobs_df), path, summary)
+            results['runs'].append({
+                'corpus': corpus_name,
+                'n_jobs': len(app.jobs_df),
+                'path': path,
+                'stages': summary,
+                'max_rss_mb': round(max_rss_mb(), 1),
+            })
+
+        if args.precision_report and model_loaded:
+            report = precision_report(cvs, args.repeat, args.top_k)
+            print_precision_report(len(app.jobs_df), report)
+            results['precision_reports'].append({'corpus': corpus_name, 'n_jobs': len(app.jobs_df), **report})
+
+        if args.engine_report and model_loaded:
+            report = engine_report(cvs, args.repeat, args.top_k)
+            print_engine_report(len(app.jobs_df), report)
+            results['engine_reports'].append({'corpus': corpus_name, 'n_jobs': len(app.jobs_df), **report})
+
+        app.jobs_df = None
+
+    output = args.output or os.path.join(
+        'benchmarks', f"bench_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+    print(f"\n💾 Results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Build the job index cache ahead of time
+Loads the latest model artifacts and the jobs dataset, then writes the job
+TF-IDF matrix, skill bitsets and metadata to the index cache next to the
+artifacts (ml_models/index_cache/<key>/). The key is a hash of the dataset
+and artifact contents, so the API picks the entry up on its next start and
+skips the build. The entry is written to a temporary directory and renamed
+into place, so a running API never reads a half-written index.
+
+Usage (from the backend/ directory):
+    python build_index.py
+    python build_index.py --precision float32 --force
+    python build_index.py --cache-dir /var/cache/nexus-index
+"""
+
+import argparse
+import os
+import time
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the Nexus job index cache")
+    parser.add_argument('--precision', choices=('float64', 'float32', 'int8'),
+                        default=os.environ.get('NEXUS_INDEX_PRECISION', 'float64'))
+    parser.add_argument('--cache-dir', default=os.environ.get('NEXUS_INDEX_CACHE_DIR'),
+                        help="Cache directory (default: index_cache/ next to the model artifacts)")
+    parser.add_argument('--force', action='store_true', help="Rebuild even if a matching entry exists")
+    args = parser.parse_args()
+
+    # Read by app at import time
+    os.environ['NEXUS_INDEX_PRECISION'] = args.precision
+    os.environ['NEXUS_INDEX_CACHE'] = '1'
+    if args.cache_dir:
+        os.environ['NEXUS_INDEX_CACHE_DIR'] = args.cache_dir
+    os.environ.pop('NEXUS_INDEX_DIR', None)
+
+    import app
+    from job_index import read_index_meta
+    from logging_config import setup_logging, shutdown_logging
+
+    logger = setup_logging()
+    try:
+        if not (app.load_latest_model() and app.load_jobs_dataset()):
+            logger.error("❌ Model artifacts or jobs dataset missing, nothing to index")
+            raise SystemExit(1)
+
+        source = app.job_index_source()
+        entry = app.job_index_cache_entry(source)
+        if not args.force and app.index_compatible(read_index_meta(entry), source):
+            logger.info("✅ Job index cache is up to date", extra={'index_dir': entry})
+            return
+
+        start = time.perf_counter()
+        index = app.build_job_index()
+        app.save_job_index_cache(index, entry)
+        logger.info("✅ Job index cache written", extra={
+            'index_dir': entry,
+            'jobs': index.n_jobs,
+            'precision': index.precision,
+            'index_mb': round(index.nbytes / (1024 * 1024), 1),
+            'seconds': round(time.perf_counter() - start, 2),
+        })
+    finally:
+        shutdown_logging()
+
+
+if __name__ == "__main__":
+    main()
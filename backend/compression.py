@@ -0,0 +1,108 @@
+"""
+Negotiated response compression
+Match payloads with a large topK are repetitive JSON and compress several
+times over. Responses of at least `minimum_size` bytes are compressed with
+brotli when the client accepts it and the optional `brotli` package is
+installed (it is in requirements.txt), otherwise with gzip. Compression
+runs in the thread pool so large topK bodies don't stall the event loop.
+Streaming responses pass through untouched.
+
+Environment (read by app.py):
+    NEXUS_COMPRESSION          set to 0 to disable compression
+    NEXUS_COMPRESS_MIN_BYTES   smallest body worth compressing (default 1024)
+"""
+
+import gzip
+
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers, MutableHeaders
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    from . import metrics
+except ImportError:
+    import metrics
+
+RESPONSE_BYTES = metrics.Histogram(
+    'nexus_response_bytes', 'Response body size as sent, per content encoding', ['encoding'],
+    buckets=(256, 1024, 4096, 16384, 65536, 262144, 1048576))
+
+
+def negotiate_encoding(accept_encoding):
+    """'br', 'gzip' or None for an Accept-Encoding header, preferring brotli when available"""
+    accepted = {}
+    for part in accept_encoding.lower().split(','):
+        token, _, params = part.strip().partition(';')
+        quality = 1.0
+        if params.strip().startswith('q='):
+            try:
+                quality = float(params.strip()[2:])
+            except ValueError:
+                quality = 0.0
+        if token:
+            accepted[token] = quality
+    if brotli is not None and accepted.get('br', 0) > 0:
+        return 'br'
+    if accepted.get('gzip', 0) > 0:
+        return 'gzip'
+    return None
+
+
+def compress(body, encoding, gzip_level=6, brotli_quality=4):
+    if encoding == 'br':
+        return brotli.compress(body, quality=brotli_quality)
+    return gzip.compress(body, compresslevel=gzip_level)
+
+
+class CompressionMiddleware:
+    """ASGI middleware compressing complete (non-streaming) response bodies"""
+
+    def __init__(self, app, minimum_size=1024, gzip_level=6, brotli_quality=4):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        encoding = negotiate_encoding(Headers(scope=scope).get('accept-encoding', ''))
+        start_message = None
+        streaming = False
+
+        async def send_compressed(message):
+            nonlocal start_message, streaming
+            if message['type'] == 'http.response.start':
+                start_message = message
+                return
+            if message['type'] != 'http.response.body' or streaming:
+                await send(message)
+                return
+
+            body = message.get('body', b'')
+            headers = MutableHeaders(raw=start_message['headers'])
+            if message.get('more_body', False):
+                # Streaming response: send it as it comes
+                streaming = True
+                await send(start_message)
+                await send(message)
+                return
+
+            used = 'identity'
+            if encoding and len(body) >= self.minimum_size and 'content-encoding' not in headers:
+                body = await run_in_threadpool(compress, body, encoding, self.gzip_level, self.brotli_quality)
+                headers['Content-Encoding'] = encoding
+                headers['Content-Length'] = str(len(body))
+                used = encoding
+            headers.add_vary_header('Accept-Encoding')
+            RESPONSE_BYTES.labels(used).observe(len(body))
+            await send(start_message)
+            await send({'type': 'http.response.body', 'body': body})
+
+        await self.app(scope, receive, send_compressed)
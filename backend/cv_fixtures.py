@@ -0,0 +1,95 @@
+"""
+CV fixtures shared by the manual API scripts, the benchmark suite and the load generator
+Real-world CVs captured from the frontend console logs
+"""
+
+# Simplified CV used to debug the API endpoint
+SIMPLE_CV = {
+    "skills": ["Python", "Java", "React", "Spring Boot", "Docker"],
+    "experience": [],
+    "projects": [
+        {"name": "Test Project", "description": ["Some description"]}
+    ],
+    "education": [
+        {"degree": "Bachelor", "institution": "University", "year": "2023"}
+    ]
+}
+
+# Chloé's CV data from console logs
+CHLOE_CV = {
+    "skills": ["Docker", "Kubernetes", "GitHub", "Microservices", "CI/CD"],
+    "experience": [
+        {
+            "title": "Ingénieur Cloud",
+            "company": "DevOps, je suis passionnée par la création de",
+            "duration": "",
+            "responsibilities": []
+        },
+        {
+            "title": "DevOps, je suis passionnée par la création de",
+            "company": "Scalian",
+            "duration": "05/2019   -   06/2023   Toulon, France",
+            "responsibilities": [
+                "Mise en place et gestion de pipelines CI/CD",
+                "Déploiement et gestion de clusters Kubernetes"
+            ]
+        }
+    ],
+    "projects": [
+        {
+            "name": "Optimisation du Pipeline CI/CD",
+            "description": ["améliorant l'efficacité de 25%."]
+        }
+    ],
+    "education": [
+        {"degree": "Ingénieur Cloud", "institution": "", "year": ""},
+        {"degree": "Master en Informatique", "institution": "Université de la Méditerranée", "year": "2012"}
+    ]
+}
+
+# Nabila's CV data from the console logs
+NABILA_CV = {
+    "skills": ["JavaScript", "Python", "C++", "PHP", "C", "HTML", "CSS", "MySQL", "Git", "GitHub", "Qt", "SQLite", "phpMyAdmin", "MySQL Workbench"],
+    "experience": [],
+    "projects": [
+        {
+            "name": "Application de Gestion des Étudiants de l'ENSAH",
+            "description": [
+                "Application en C (mode console) pour gérer les notes, absences et",
+                "infos étudiantes avec stockage sur fichiers."
+            ]
+        },
+        {
+            "name": "Memory Match Game",
+            "description": [
+                "Jeu de mémoire développé en C++ avec Qt, incluant interface",
+                "graphique, chronomètre, score et base de données SQLite."
+            ]
+        },
+        {
+            "name": "Application de Gestion des Affectations des Enseignements",
+            "description": ["2025", "phpMyAdmin, MySQL"]
+        },
+        {
+            "name": "Workbench",
+            "description": [
+                "Version Control: Git, GitHub",
+                "Operating Systems: Windows,",
+                "Other Competencies: Data",
+                "Structures, Algorithms, Object-",
+                "Oriented Programming",
+                "A C T I V I T É P A R A S C O L A I R E"
+            ]
+        }
+    ],
+    "education": [
+        {"degree": "École Nationale des Sciences Appliquées d'Al Hoceima (ENSAH)", "institution": "", "year": ""},
+        {"degree": "Baccalauréat", "institution": "", "year": ""}
+    ]
+}
+
+CV_FIXTURES = {
+    'simple': SIMPLE_CV,
+    'chloe': CHLOE_CV,
+    'nabila': NABILA_CV,
+}
@@ -0,0 +1,69 @@
+"""
+Deadline-aware (anytime) scoring
+A request may carry a latency budget. Scoring then runs as a sequence of
+stages, each one refining the previous ranking: the skill-bitmap pass, then
+the TF-IDF (or embedding) cosine, then any re-ranking. A numpy stage can't be
+interrupted half way, so before starting one we check that its usual
+duration still fits before the deadline; if not, the best ranking computed
+so far is returned and the response says which stage completed. A stage
+that was never measured doesn't fit: the warm-up queries and requests
+without a deadline run every stage and measure it.
+
+Environment (read by app.py):
+    NEXUS_DEADLINE_MS  default budget of /api/predict-jobs (default 0 = no deadline)
+"""
+
+import time
+from contextlib import contextmanager
+
+try:
+    from . import metrics
+except ImportError:
+    import metrics
+
+DEADLINE_COMPLETED = metrics.Counter(
+    'nexus_deadline_completed_stage_total', 'Last scoring stage completed by requests with a deadline', ['stage'])
+
+
+def deadline_from_budget(budget_ms, start=None):
+    """Absolute perf_counter() deadline `budget_ms` after `start` (now), or None without a budget"""
+    if not budget_ms or budget_ms <= 0:
+        return None
+    return (time.perf_counter() if start is None else start) + budget_ms / 1000
+
+
+class StageCosts:
+    """Moving average of every stage's duration, used to predict whether it fits before a deadline"""
+
+    def __init__(self, alpha=0.2):
+        self.alpha = alpha
+        self._seconds = {}
+
+    def estimate(self, stage, units=1):
+        """Expected seconds of `stage` over `units` items (one CV, or a batch of them); None if never measured"""
+        seconds = self._seconds.get(stage)
+        return None if seconds is None else seconds * units
+
+    def fits(self, stage, deadline, units=1):
+        """True without a deadline, or if `stage` was measured and is expected to finish before it"""
+        if deadline is None:
+            return True
+        estimate = self.estimate(stage, units)
+        return estimate is not None and time.perf_counter() + estimate <= deadline
+
+    def observe(self, stage, seconds, units=1):
+        seconds /= units
+        previous = self._seconds.get(stage)
+        self._seconds[stage] = seconds if previous is None else previous + self.alpha * (seconds - previous)
+
+    @contextmanager
+    def measure(self, stage, units=1):
+        """Time the block; the estimate is kept per unit, so batches of any size share one key"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - start, units)
+
+
+stage_costs = StageCosts()
@@ -0,0 +1,179 @@
+"""
+Near-duplicate job detection with MinHash + LSH
+Scraped and generated job datasets repeat the same posting with tiny
+variations. Every copy is indexed and scored, yet it can only push the same
+job into the top-K several times. Each posting (title, company, description)
+is turned into word shingles. MinHash signatures estimate Jaccard similarity,
+and LSH banding finds candidate pairs without comparing every pair. Postings
+above the threshold are grouped; the first of each group is kept as the
+canonical job and the others are recorded as its aliases.
+
+The alias table is saved next to the job index built from the collapsed
+jobs (on-disk cache, shared index directory), so a restart collapses the
+dataset from it instead of hashing every posting again, and each match
+returns the dataset rows of its aliases.
+"""
+
+import os
+import re
+import time
+import zlib
+
+import numpy as np
+import pandas as pd
+
+DEDUP_COLUMNS = ('Job Title', 'Company', 'Job Description')
+ALIASES_FILE = 'aliases.npy'
+
+# Modulus just above 2^32: (a * h + b) stays below 2^64 for a < 2^31 and 32-bit h
+_HASH_PRIME = np.uint64(4294967311)
+# Signatures computed this many documents at a time, bounds the temporary arrays
+_SIGNATURE_CHUNK_DOCS = 50000
+# Buckets up to this size are verified pair by pair, bigger ones against their first member
+_MAX_PAIRWISE_BUCKET = 64
+
+_TOKEN_PATTERN = re.compile(r'[a-z0-9]+')
+
+
+def shingle_hashes(text, shingle_size=3):
+    """32-bit hashes of the word n-grams of a text (one shingle for very short texts)"""
+    tokens = _TOKEN_PATTERN.findall(str(text).lower())
+    if len(tokens) <= shingle_size:
+        return [zlib.crc32(' '.join(tokens).encode('utf-8'))]
+    return list({zlib.crc32(' '.join(tokens[i:i + shingle_size]).encode('utf-8'))
+                 for i in range(len(tokens) - shingle_size + 1)})
+
+
+def minhash_signatures(texts, num_perm=128, shingle_size=3, seed=42):
+    """(n_texts, num_perm) uint64 MinHash signatures"""
+    rng = np.random.RandomState(seed)
+    a = rng.randint(1, 2 ** 31, size=num_perm).astype(np.uint64)
+    b = rng.randint(0, 2 ** 32, size=num_perm, dtype=np.int64).astype(np.uint64)
+
+    texts = list(texts)
+    signatures = np.empty((len(texts), num_perm), dtype=np.uint64)
+    for start in range(0, len(texts), _SIGNATURE_CHUNK_DOCS):
+        shingles = [shingle_hashes(t, shingle_size) for t in texts[start:start + _SIGNATURE_CHUNK_DOCS]]
+        lengths = np.array([len(s) for s in shingles])
+        offsets = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+        hashes = np.fromiter((h for s in shingles for h in s), dtype=np.uint64, count=int(lengths.sum()))
+        for p in range(num_perm):
+            values = (a[p] * hashes + b[p]) % _HASH_PRIME
+            signatures[start:start + len(shingles), p] = np.minimum.reduceat(values, offsets)
+    return signatures
+
+
+def lsh_params(threshold, num_perm):
+    """
+    (bands, rows) with bands * rows == num_perm whose S-curve midpoint
+    (1/bands)^(1/rows) is the highest one not above the threshold, so true
+    duplicates are rarely missed; candidates are verified afterwards
+    """
+    options = [(num_perm // r, r) for r in range(1, num_perm + 1) if num_perm % r == 0]
+    below = [(b, r) for b, r in options if (1 / b) ** (1 / r) <= threshold]
+    if not below:
+        return options[0]
+    return max(below, key=lambda br: (1 / br[0]) ** (1 / br[1]))
+
+
+def _find(parent, i):
+    while parent[i] != i:
+        parent[i] = parent[parent[i]]
+        i = parent[i]
+    return i
+
+
+def find_duplicates(texts, threshold=0.9, num_perm=128, shingle_size=3, seed=42):
+    """
+    Canonical row of every text: itself, or the first row of its near-duplicate
+    group (estimated Jaccard similarity >= threshold)
+    """
+    signatures = minhash_signatures(texts, num_perm, shingle_size, seed)
+    n = len(signatures)
+    parent = np.arange(n)
+    bands, rows = lsh_params(threshold, num_perm)
+
+    for band in range(bands):
+        keys = np.ascontiguousarray(signatures[:, band * rows:(band + 1) * rows])
+        keys = keys.view(np.dtype((np.void, keys.dtype.itemsize * rows))).ravel()
+        _, bucket_of, counts = np.unique(keys, return_inverse=True, return_counts=True)
+        shared = np.flatnonzero(counts[bucket_of] > 1)
+        if not shared.size:
+            continue
+        order = shared[np.argsort(bucket_of[shared], kind='stable')]
+        boundaries = np.flatnonzero(np.diff(bucket_of[order])) + 1
+        for members in np.split(order, boundaries):
+            pivots = members if len(members) <= _MAX_PAIRWISE_BUCKET else members[:1]
+            for i, first in enumerate(pivots):
+                others = members[i + 1:]
+                similarity = (signatures[others] == signatures[first]).mean(axis=1)
+                for other in others[similarity >= threshold]:
+                    root_a, root_b = _find(parent, first), _find(parent, other)
+                    if root_a != root_b:
+                        # The lower row stays the root, so the first occurrence is canonical
+                        parent[max(root_a, root_b)] = min(root_a, root_b)
+
+    return np.array([_find(parent, i) for i in range(n)])
+
+
+def dedup_jobs(df, threshold=0.9, columns=DEDUP_COLUMNS, num_perm=128, shingle_size=3):
+    """
+    Keep one canonical row per near-duplicate group.
+    Returns (canonical_df, aliases, report): canonical_df is re-indexed 0..n-1,
+    aliases maps every dropped row ('alias', its index label in df) to the
+    position of its canonical job in canonical_df ('canonical').
+    """
+    start = time.perf_counter()
+    columns = [c for c in columns if c in df.columns]
+    texts = df[columns].fillna('').astype(str).agg(' '.join, axis=1) if columns else pd.Series([''] * len(df))
+
+    canonical_of = find_duplicates(texts, threshold, num_perm, shingle_size)
+    keep = np.flatnonzero(canonical_of == np.arange(len(df)))
+    position = np.full(len(df), -1)
+    position[keep] = np.arange(len(keep))
+
+    dropped = np.flatnonzero(canonical_of != np.arange(len(df)))
+    aliases = pd.DataFrame({
+        'alias': df.index[dropped],
+        'canonical': position[canonical_of[dropped]],
+    })
+    group_sizes = np.bincount(canonical_of, minlength=len(df))[keep] if len(df) else np.array([])
+
+    report = {
+        'threshold': threshold,
+        'rows': int(len(df)),
+        'canonical': int(len(keep)),
+        'collapsed': int(len(dropped)),
+        'collapsed_share': round(len(dropped) / len(df), 4) if len(df) else 0.0,
+        'duplicate_groups': int((group_sizes > 1).sum()),
+        'largest_group': int(group_sizes.max()) if len(group_sizes) else 0,
+        'seconds': round(time.perf_counter() - start, 2),
+    }
+    return df.iloc[keep].reset_index(drop=True), aliases, report
+
+
+def save_aliases(aliases, directory):
+    """Write the alias table into a saved index's directory (after JobIndex.save, which replaces it)"""
+    staging = os.path.join(directory, f'.{ALIASES_FILE}')
+    np.save(staging, aliases[['alias', 'canonical']].to_numpy(dtype=np.int64))
+    os.replace(staging, os.path.join(directory, ALIASES_FILE))
+
+
+def load_aliases(directory):
+    """Alias table saved in `directory`, or None if there is none"""
+    try:
+        table = np.load(os.path.join(directory, ALIASES_FILE))
+    except (OSError, ValueError):
+        return None
+    return pd.DataFrame({'alias': table[:, 0], 'canonical': table[:, 1]})
+
+
+def collapse_aliases(df, aliases):
+    """The canonical_df dedup_jobs returned with this alias table: alias rows dropped, re-indexed 0..n-1"""
+    return df.drop(index=aliases['alias']).reset_index(drop=True)
+
+
+def alias_ids(aliases):
+    """{canonical job position: dataset index labels of its aliases}"""
+    return {int(canonical): [int(alias) for alias in group]
+            for canonical, group in aliases.groupby('canonical')['alias']}
@@ -0,0 +1,538 @@
+"""
+Precomputed job index for the trained scoring path
+The job TF-IDF rows and skill flags are computed once per dataset instead of
+on every request. The index can be saved as plain .npy files that every
+uvicorn worker memory-maps read-only, so N workers share one copy of the
+matrices through the OS page cache.
+
+The TF-IDF rows can be stored at reduced precision (NEXUS_INDEX_PRECISION):
+    float64  scikit-learn's default CSR matrix, scored with scipy (reference)
+    float32  half the bytes per weight
+    int8     8-bit weights with one float32 scale per row
+float32 and int8 are stored term-major as postings lists (for each term, the
+jobs that contain it) in blocks of 65536 jobs, so row ids fit in uint16 and
+scoring only touches the postings of the terms the CV actually contains.
+Skill flags are always bit-packed (one bit per job and skill), which is exact.
+
+With a low-rank embedding (fitted by train_model.py, see fit_embedding) the
+index also holds every job projected to a dense k-dimensional unit vector,
+scored with one contiguous matrix-vector product (the "dense" engine).
+
+Built indexes are also cached on disk (see index_cache_dir), keyed by
+content hashes of the dataset and the artifact bundle, so a restart with the
+same files memory-maps the cached index instead of rebuilding it.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from sklearn.preprocessing import normalize
+
+INDEX_FORMAT_VERSION = 2
+META_FILE = 'meta.json'
+PRECISIONS = ('float64', 'float32', 'int8')
+
+
+def unique_skills(skills):
+    """Skill taxonomy without duplicates, in first-seen order (matches set semantics of the old path)"""
+    return list(dict.fromkeys(skills))
+
+
+def skill_flags(texts, skills):
+    """
+    Dense (n_texts, n_skills) uint8 matrix: 1 where the skill name occurs in the text.
+    Same case-insensitive substring rule as extract_skills_from_text.
+    """
+    lowered = pd.Series(texts).fillna('').astype(str).str.lower()
+    flags = np.zeros((len(lowered), len(skills)), dtype=np.uint8)
+    for j, skill in enumerate(skills):
+        flags[:, j] = lowered.str.contains(skill.lower(), regex=False).to_numpy()
+    return flags
+
+
+# Number of set bits in every byte value
+POPCOUNT = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+
+def quantize_rows(data, indptr):
+    """
+    8-bit quantization with a per-row scale: weight ≈ q * scale[row].
+    TF-IDF weights are never negative, so all 256 levels of an unsigned
+    byte are used for the magnitude instead of wasting the sign bit.
+    """
+    n_rows = len(indptr) - 1
+    lengths = np.diff(indptr)
+    row_max = np.zeros(n_rows, dtype=np.float64)
+    non_empty = lengths > 0
+    if data.size:
+        row_max[non_empty] = np.maximum.reduceat(data, indptr[:-1][non_empty])
+    scale = (row_max / 255.0).astype(np.float32)
+    per_entry = np.repeat(np.where(scale > 0, scale, 1.0), lengths)
+    quantized = np.clip(np.rint(data / per_entry), 0, 255).astype(np.uint8)
+    return quantized, scale
+
+
+# Jobs per postings block; local row ids within a block fit in uint16
+POSTINGS_BLOCK_ROWS = np.iinfo(np.uint16).max + 1
+
+
+def csr_to_postings(data, indices, indptr, shape, block_rows=POSTINGS_BLOCK_ROWS):
+    """
+    Term-major copy of a CSR matrix, split in blocks of `block_rows` rows.
+    Returns (data, rows, pointers): postings of term t in block b are
+    data/rows[pointers[b, t]:pointers[b, t + 1]], rows being block-local uint16.
+    """
+    n_rows, n_terms = shape
+    n_blocks = max(1, -(-n_rows // block_rows))
+    pointers = np.zeros((n_blocks, n_terms + 1), dtype=np.int64)
+    block_data, block_rows_ids = [], []
+    offset = 0
+    for b in range(n_blocks):
+        start, stop = b * block_rows, min((b + 1) * block_rows, n_rows)
+        lo, hi = indptr[start], indptr[stop]
+        block = sparse.csr_matrix((data[lo:hi], indices[lo:hi], indptr[start:stop + 1] - lo),
+                                  shape=(stop - start, n_terms)).tocsc()
+        block_data.append(block.data)
+        block_rows_ids.append(block.indices.astype(np.uint16))
+        pointers[b] = block.indptr + offset
+        offset += block.nnz
+    return np.concatenate(block_data), np.concatenate(block_rows_ids), pointers
+
+
+def postings_to_csr(data, rows, pointers, shape, block_rows=POSTINGS_BLOCK_ROWS):
+    """Row-major CSR matrix of postings written by csr_to_postings (values keep their stored dtype)"""
+    n_rows, n_terms = shape
+    blocks = []
+    for b in range(pointers.shape[0]):
+        start, stop = b * block_rows, min((b + 1) * block_rows, n_rows)
+        lo, hi = pointers[b, 0], pointers[b, -1]
+        blocks.append(sparse.csc_matrix((data[lo:hi], rows[lo:hi].astype(np.int32), pointers[b] - lo),
+                                        shape=(stop - start, n_terms)).tocsr())
+    matrix = sparse.vstack(blocks, format='csr') if len(blocks) > 1 else blocks[0]
+    matrix.sort_indices()
+    return matrix
+
+
+def postings_dot(data, rows, pointers, n_rows, terms, weights, block_rows=POSTINGS_BLOCK_ROWS):
+    """
+    Dot product of every job row with a sparse query (`terms`, `weights`),
+    accumulated over the postings of the query terms only
+    """
+    scores = np.zeros(n_rows, dtype=np.float32)
+    for b in range(pointers.shape[0]):
+        starts, ends = pointers[b, terms], pointers[b, terms + 1]
+        lengths = ends - starts
+        total = int(lengths.sum())
+        if not total:
+            continue
+        # Positions of all postings of the query terms, concatenated
+        positions = np.arange(total) + np.repeat(starts - (np.cumsum(lengths) - lengths), lengths)
+        contributions = data[positions] * np.repeat(weights, lengths)
+        block_start = b * block_rows
+        block_len = min(block_rows, n_rows - block_start)
+        scores[block_start:block_start + block_len] = np.bincount(
+            rows[positions], weights=contributions, minlength=block_len)
+    return scores
+
+
+def top_k_indices(scores, top_k):
+    """Indices of the top_k highest scores, best first, without sorting every job"""
+    if top_k is None or not 0 < top_k < len(scores):
+        return np.argsort(scores)[::-1][:top_k]
+    candidates = np.argpartition(scores, -top_k)[-top_k:]
+    return candidates[np.argsort(scores[candidates])[::-1]]
+
+
+def shared_index_dir(name):
+    """Directory for an index shared between processes: /dev/shm when writable, else the temp dir"""
+    shm = '/dev/shm'
+    base = shm if os.path.isdir(shm) and os.access(shm, os.W_OK) else tempfile.gettempdir()
+    return os.path.join(base, name)
+
+
+# Rows projected at a time when embedding jobs, bounds the float64 temporary
+EMBED_CHUNK_ROWS = 65536
+
+
+def fit_embedding(tfidf, n_components=128, random_state=42):
+    """
+    Truncated SVD of the L2-normalised job TF-IDF matrix: a float32
+    (n_components, n_terms) projection into the dense scoring space
+    """
+    from sklearn.decomposition import TruncatedSVD
+
+    n_components = max(1, min(n_components, min(tfidf.shape) - 1))
+    svd = TruncatedSVD(n_components=n_components, random_state=random_state)
+    svd.fit(normalize(tfidf, norm='l2'))
+    return {
+        'components': svd.components_.astype(np.float32),
+        'explained_variance': float(svd.explained_variance_ratio_.sum()),
+    }
+
+
+def fit_embedding_from_gram(gram, column_sums, n_rows, n_components=128):
+    """
+    fit_embedding for data that never sits in memory at once: the top
+    eigenvectors of the accumulated Gram matrix X^T X of the L2-normalised
+    TF-IDF rows are the truncated SVD components. column_sums (X^T 1) and
+    n_rows give the explained variance the same way TruncatedSVD reports it.
+    """
+    n_components = max(1, min(n_components, gram.shape[0] - 1))
+    eigenvalues, eigenvectors = np.linalg.eigh(gram)
+    components = eigenvectors[:, ::-1][:, :n_components].T
+
+    mean = column_sums / max(n_rows, 1)
+    projected_variance = np.einsum('ij,jk,ik->i', components, gram, components) / max(n_rows, 1) - (components @ mean) ** 2
+    total_variance = np.diag(gram).sum() / max(n_rows, 1) - (mean ** 2).sum()
+    return {
+        'components': components.astype(np.float32),
+        'explained_variance': float(projected_variance.sum() / total_variance) if total_variance > 0 else 0.0,
+    }
+
+
+def embed_rows(tfidf, components):
+    """Project L2-normalised TF-IDF rows and re-normalise them: float32 (n_rows, k), C-contiguous"""
+    embeddings = np.empty((tfidf.shape[0], components.shape[0]), dtype=np.float32)
+    for start in range(0, tfidf.shape[0], EMBED_CHUNK_ROWS):
+        chunk = tfidf[start:start + EMBED_CHUNK_ROWS] @ components.T
+        embeddings[start:start + EMBED_CHUNK_ROWS] = normalize(np.asarray(chunk), norm='l2')
+    return embeddings
+
+
+class JobIndex:
+    """
+    Job-side matrices of the trained scoring path:
+      tfidf         (n_jobs, n_terms), rows L2-normalised so cosine == dot product.
+                    float64: CSR data/indices/indptr. float32/int8: postings
+                    data, block-local row ids (indices) and per-block term
+                    pointers (indptr), plus row_scale in int8 mode
+      skill_bits    uint8 (n_jobs, ceil(n_skills / 8)) bit-packed skill occurrence flags
+      skill_counts  float64 (n_jobs,) number of distinct skills per job
+      embeddings    float32 (n_jobs, k) unit rows of the dense engine (optional)
+      components    float32 (k, n_terms) projection used for the CV side (optional)
+    """
+
+    def __init__(self, data, indices, indptr, shape, skill_bits, skill_counts, skills,
+                 precision='float64', row_scale=None, source=None, embeddings=None, components=None):
+        if precision not in PRECISIONS:
+            raise ValueError(f"Unknown index precision '{precision}' (expected one of {PRECISIONS})")
+        self.data = data
+        self.indices = indices
+        self.indptr = indptr
+        self.shape = tuple(shape)
+        self.row_scale = row_scale
+        self.precision = precision
+        self.skill_bits = skill_bits
+        self.skill_counts = skill_counts
+        self.skills = list(skills)
+        self.skill_positions = {skill: i for i, skill in enumerate(self.skills)}
+        self.source = source or {}
+        self.embeddings = embeddings
+        self.components = components
+        self._csr = None
+
+    @property
+    def n_jobs(self):
+        return self.shape[0]
+
+    @property
+    def has_embeddings(self):
+        return self.embeddings is not None
+
+    @property
+    def nbytes(self):
+        return sum(a.nbytes for a in self._arrays().values())
+
+    @property
+    def tfidf_nbytes(self):
+        arrays = [self.data, self.indices, self.indptr]
+        if self.row_scale is not None:
+            arrays.append(self.row_scale)
+        return sum(a.nbytes for a in arrays)
+
+    @property
+    def embedding_nbytes(self):
+        return self.embeddings.nbytes + self.components.nbytes if self.has_embeddings else 0
+
+    @classmethod
+    def build(cls, job_descriptions, vectorizer, skills, source=None, precision='float64',
+              embedding=None, embedding_dim=None):
+        """
+        Transform every job description once. `embedding` is the projection
+        stored with the artifacts; without one, `embedding_dim` fits it here.
+        """
+        descriptions = pd.Series(job_descriptions).fillna('')
+        tfidf = normalize(vectorizer.transform(descriptions), norm='l2', copy=False).tocsr()
+        tfidf.sort_indices()
+        skills = unique_skills(skills)
+        flags = skill_flags(descriptions, skills)
+        skill_counts = flags.sum(axis=1, dtype=np.float64)
+
+        embeddings = components = None
+        if embedding is None and embedding_dim:
+            embedding = fit_embedding(tfidf, embedding_dim)
+        if embedding is not None:
+            components = np.ascontiguousarray(embedding['components'], dtype=np.float32)
+            embeddings = embed_rows(tfidf, components)
+        return cls.from_csr(tfidf, np.packbits(flags, axis=1), skill_counts, skills, precision, source,
+                            embeddings, components)
+
+    @classmethod
+    def from_csr(cls, tfidf, skill_bits, skill_counts, skills, precision='float64', source=None,
+                 embeddings=None, components=None):
+        """Store a float64 CSR matrix at the requested precision"""
+        data, indices, indptr = tfidf.data, tfidf.indices, tfidf.indptr
+        row_scale = None
+        if precision != 'float64':
+            if precision == 'float32':
+                data = data.astype(np.float32)
+            else:
+                data, row_scale = quantize_rows(data, indptr)
+            data, indices, indptr = csr_to_postings(data, indices, indptr, tfidf.shape)
+        return cls(data, indices, indptr, tfidf.shape, skill_bits, skill_counts, skills,
+                   precision, row_scale, source, embeddings, components)
+
+    def with_precision(self, precision):
+        """Copy of a float64 index at another precision (used by the accuracy report)"""
+        if self.precision != 'float64':
+            raise ValueError("Only a float64 index can be converted")
+        return JobIndex.from_csr(self.csr(), self.skill_bits, self.skill_counts, self.skills,
+                                 precision, self.source, self.embeddings, self.components)
+
+    def row_range(self, start, stop):
+        """Index of jobs start..stop-1 at the same precision (see row_ranges)"""
+        return self.row_ranges([(start, stop)])[0]
+
+    def row_ranges(self, bounds):
+        """
+        Indexes of the (start, stop) job ranges at the same precision, sliced
+        from this one (no re-vectorizing). Postings are turned back into rows
+        once for all ranges. int8 rows keep their own scales, so scores are unchanged.
+        """
+        rows = None
+        if self.precision != 'float64':
+            rows = postings_to_csr(self.data, self.indices, self.indptr, self.shape)
+        return [self._rows(rows, start, stop) for start, stop in bounds]
+
+    def _rows(self, rows, start, stop):
+        if rows is None:
+            lo, hi = self.indptr[start], self.indptr[stop]
+            data, indices = self.data[lo:hi], self.indices[lo:hi]
+            indptr = self.indptr[start:stop + 1] - lo
+        else:
+            part = rows[start:stop]
+            data, indices, indptr = csr_to_postings(part.data, part.indices, part.indptr, part.shape)
+        row_scale = self.row_scale[start:stop] if self.row_scale is not None else None
+        embeddings = self.embeddings[start:stop] if self.has_embeddings else None
+        return JobIndex(data, indices, indptr, (stop - start, self.shape[1]), self.skill_bits[start:stop],
+                        self.skill_counts[start:stop], self.skills, self.precision, row_scale,
+                        self.source, embeddings, self.components)
+
+    def csr(self):
+        """float64 index as a scipy CSR matrix (no copy)"""
+        if self.precision != 'float64':
+            raise ValueError(f"{self.precision} index has no scipy representation")
+        if self._csr is None:
+            self._csr = sparse.csr_matrix((self.data, self.indices, self.indptr), shape=self.shape, copy=False)
+        return self._csr
+
+    def tfidf_scores(self, cv_tfidf, rows=None):
+        """
+        Cosine similarity between one CV TF-IDF row and every job, or only the
+        given job rows (postings are laid out by term, so they still walk every job)
+        """
+        cv_vector = normalize(cv_tfidf, norm='l2').toarray().ravel()
+        if self.precision == 'float64':
+            return (self.csr() if rows is None else self.csr()[rows]) @ cv_vector
+        scores = self._postings_scores(cv_vector)
+        return scores if rows is None else scores[rows]
+
+    def tfidf_scores_batch(self, cv_tfidf):
+        """
+        Cosine similarity of several CV TF-IDF rows to every job, (n_cvs, n_jobs).
+        float64 does it in one sparse x dense matrix product; postings are walked per CV.
+        """
+        queries = normalize(cv_tfidf, norm='l2').toarray()
+        if self.precision == 'float64':
+            return (self.csr() @ queries.T).T
+        return np.vstack([self._postings_scores(query) for query in queries])
+
+    def _postings_scores(self, cv_vector):
+        terms = np.flatnonzero(cv_vector)
+        scores = postings_dot(self.data, self.indices, self.indptr, self.n_jobs,
+                              terms, cv_vector[terms].astype(np.float32))
+        if self.row_scale is not None:
+            scores *= self.row_scale
+        return scores
+
+    def embed_queries(self, cv_tfidf):
+        """CV TF-IDF rows in the dense space (not re-normalised, so scores approximate cosine)"""
+        return np.asarray(normalize(cv_tfidf, norm='l2') @ self.components.T, dtype=np.float32)
+
+    def embedding_scores(self, cv_tfidf, rows=None):
+        """Dense-engine similarity of one CV to every job (or the given rows): a single GEMV"""
+        if not self.has_embeddings:
+            raise ValueError("Job index was built without an embedding")
+        embeddings = self.embeddings if rows is None else self.embeddings[rows]
+        return embeddings @ self.embed_queries(cv_tfidf)[0]
+
+    def embedding_scores_batch(self, cv_tfidf):
+        """Dense-engine similarity of several CVs to every job, (n_cvs, n_jobs): a single GEMM"""
+        if not self.has_embeddings:
+            raise ValueError("Job index was built without an embedding")
+        return self.embed_queries(cv_tfidf) @ self.embeddings.T
+
+    def skill_mask(self, cv_skills):
+        """Bit-packed flags of the CV's skills, laid out like one row of skill_bits"""
+        flags = np.zeros(len(self.skills), dtype=np.uint8)
+        for skill in cv_skills:
+            position = self.skill_positions.get(skill)
+            if position is not None:
+                flags[position] = 1
+        return np.packbits(flags)
+
+    def skill_bonus(self, cv_skills, rows=None):
+        """Share of each job's skills (or the given rows') that the CV also has (0 for jobs without skills)"""
+        skill_bits = self.skill_bits if rows is None else self.skill_bits[rows]
+        skill_counts = self.skill_counts if rows is None else self.skill_counts[rows]
+        mask = self.skill_mask(cv_skills)
+        columns = np.flatnonzero(mask)
+        if not columns.size:
+            return np.zeros(len(skill_counts))
+        matched = POPCOUNT[skill_bits[:, columns] & mask[columns]].sum(axis=1, dtype=np.float64)
+        return np.divide(matched, skill_counts, out=np.zeros(len(skill_counts)), where=skill_counts > 0)
+
+    def skill_explanations(self, rows, cv_skills):
+        """
+        (matched, missing) skill names for each of the given job rows: the job's
+        skill bits AND / AND NOT the CV mask, so only the top-K rows are touched
+        """
+        mask = self.skill_mask(cv_skills)
+        job_bits = self.skill_bits[np.asarray(rows, dtype=np.int64)]
+        matched = np.unpackbits(job_bits & mask, axis=1, count=len(self.skills)).astype(bool)
+        missing = np.unpackbits(job_bits & ~mask, axis=1, count=len(self.skills)).astype(bool)
+        skills = np.array(self.skills, dtype=object)
+        return [(skills[m].tolist(), skills[x].tolist()) for m, x in zip(matched, missing)]
+
+    # ==========================================
+    # 💾 SHARING BETWEEN WORKERS
+    # ==========================================
+
+    def _arrays(self):
+        arrays = {
+            'tfidf_data': self.data,
+            'tfidf_indices': self.indices,
+            'tfidf_indptr': self.indptr,
+            'skill_bits': self.skill_bits,
+            'skill_counts': self.skill_counts,
+        }
+        if self.row_scale is not None:
+            arrays['row_scale'] = self.row_scale
+        if self.has_embeddings:
+            arrays['embeddings'] = self.embeddings
+            arrays['components'] = self.components
+        return arrays
+
+    def save(self, directory):
+        """
+        Write the index as .npy files. Files go to a temporary sibling directory
+        that is renamed into place, so readers never see a half-written index.
+        """
+        parent = os.path.dirname(os.path.abspath(directory))
+        os.makedirs(parent, exist_ok=True)
+        staging = tempfile.mkdtemp(prefix='.index-', dir=parent)
+        try:
+            for name, array in self._arrays().items():
+                np.save(os.path.join(staging, f'{name}.npy'), array)
+            meta = {
+                'version': INDEX_FORMAT_VERSION,
+                'shape': list(self.shape),
+                'precision': self.precision,
+                'embedding_dim': self.components.shape[0] if self.has_embeddings else None,
+                'skills': self.skills,
+                'source': self.source,
+                'created': time.time(),
+            }
+            with open(os.path.join(staging, META_FILE), 'w', encoding='utf-8') as f:
+                json.dump(meta, f)
+            if os.path.exists(directory):
+                shutil.rmtree(directory)
+            os.replace(staging, directory)
+        except BaseException:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+        return directory
+
+    @classmethod
+    def load(cls, directory, mmap=True):
+        """Attach to a saved index; with mmap the arrays are shared read-only pages, not copies"""
+        meta = read_index_meta(directory)
+        if meta is None or meta.get('version') != INDEX_FORMAT_VERSION:
+            raise ValueError(f"No compatible job index in {directory}")
+
+        mode = 'r' if mmap else None
+        load = lambda name: np.load(os.path.join(directory, f'{name}.npy'), mmap_mode=mode)
+        row_scale = load('row_scale') if meta['precision'] == 'int8' else None
+        embeddings = components = None
+        if meta.get('embedding_dim'):
+            embeddings, components = load('embeddings'), load('components')
+        return cls(load('tfidf_data'), load('tfidf_indices'), load('tfidf_indptr'), meta['shape'],
+                   load('skill_bits'), load('skill_counts'), meta['skills'],
+                   meta['precision'], row_scale, meta.get('source'), embeddings, components)
+
+
+# (path, size, mtime_ns) -> sha256, so a file is only hashed again once it changes
+_fingerprints = {}
+
+
+def file_fingerprint(path, chunk_bytes=1 << 20):
+    """SHA-256 of a file's content, read in chunks"""
+    stat = os.stat(path)
+    key = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+    if key not in _fingerprints:
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(chunk_bytes), b''):
+                digest.update(block)
+        _fingerprints[key] = digest.hexdigest()
+    return _fingerprints[key]
+
+
+def index_cache_key(source, precision, embedding_dim=None):
+    """Directory name of a cached index: hash of what it was built from and how"""
+    payload = json.dumps({
+        'version': INDEX_FORMAT_VERSION,
+        'source': source,
+        'precision': precision,
+        'embedding_dim': embedding_dim,
+    }, sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:24]
+
+
+def prune_index_cache(cache_dir, keep=3):
+    """Remove all but the `keep` most recently written cached indexes"""
+    try:
+        entries = [os.path.join(cache_dir, name) for name in os.listdir(cache_dir) if not name.startswith('.')]
+    except OSError:
+        return []
+    entries = sorted((e for e in entries if os.path.isdir(e)), key=os.path.getmtime, reverse=True)
+    for stale in entries[keep:]:
+        shutil.rmtree(stale, ignore_errors=True)
+    return entries[keep:]
+
+
+def read_index_meta(directory):
+    """Metadata of a saved index, or None if there is no readable index there"""
+    try:
+        with open(os.path.join(directory, META_FILE), encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
@@ -0,0 +1,452 @@
+"""
+Concurrent load generator for the Nexus API
+Drives /api/predict-jobs and /api/analyze-cv with configurable concurrency,
+request rate, endpoint mix and CV mix, then reports throughput, latency
+histograms, error rates and the saturation point
+
+Usage (from the backend/ directory):
+    python load_test.py --in-process --synthetic-jobs 5000 --concurrency 1,4,16
+    python load_test.py --url http://localhost:8000 --concurrency 8 --rate 20 --duration 30
+    python load_test.py --in-process --cv-mix chloe:3,nabila:1,synthetic:1 --endpoint-mix predict-jobs:1
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import numpy as np
+
+from cv_fixtures import CV_FIXTURES
+
+ENDPOINTS = {
+    'predict-jobs': '/api/predict-jobs',
+    'analyze-cv': '/api/analyze-cv',
+}
+
+# Latency histogram bucket upper bounds (ms)
+HISTOGRAM_BUCKETS_MS = [5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000]
+
+# ==========================================
+# 🔌 TRANSPORTS
+# ==========================================
+
+class InProcessTransport:
+    """Call the FastAPI app directly through the ASGI interface (no network)"""
+
+    def __init__(self, asgi_app):
+        self.app = asgi_app
+        self._lifespan_task = None
+        self._lifespan_queue = None
+
+    async def start(self):
+        """Run the lifespan startup handlers, like uvicorn does before serving"""
+        self._lifespan_queue = asyncio.Queue()
+        startup_done = asyncio.get_running_loop().create_future()
+
+        async def receive():
+            return await self._lifespan_queue.get()
+
+        async def send(message):
+            if message['type'] == 'lifespan.startup.complete' and not startup_done.done():
+                startup_done.set_result(True)
+            elif message['type'] == 'lifespan.startup.failed' and not startup_done.done():
+                startup_done.set_exception(RuntimeError(message.get('message', 'startup failed')))
+
+        scope = {'type': 'lifespan', 'asgi': {'version': '3.0'}, 'state': {}}
+        self._lifespan_task = asyncio.create_task(self.app(scope, receive, send))
+        await self._lifespan_queue.put({'type': 'lifespan.startup'})
+        await startup_done
+
+    async def close(self):
+        if self._lifespan_task is not None:
+            await self._lifespan_queue.put({'type': 'lifespan.shutdown'})
+            try:
+                await asyncio.wait_for(self._lifespan_task, timeout=5)
+            except asyncio.TimeoutError:
+                self._lifespan_task.cancel()
+
+    async def post(self, path, payload):
+        body = json.dumps(payload).encode('utf-8')
+        response_done = asyncio.Event()
+        status = None
+        chunks = []
+        body_sent = False
+
+        async def receive():
+            nonlocal body_sent
+            if not body_sent:
+                body_sent = True
+                return {'type': 'http.request', 'body': body, 'more_body': False}
+            await response_done.wait()
+            return {'type': 'http.disconnect'}
+
+        async def send(message):
+            nonlocal status
+            if message['type'] == 'http.response.start':
+                status = message['status']
+            elif message['type'] == 'http.response.body':
+                chunks.append(message.get('body', b''))
+                if not message.get('more_body', False):
+                    response_done.set()
+
+        scope = {
+            'type': 'http',
+            'asgi': {'version': '3.0'},
+            'http_version': '1.1',
+            'method': 'POST',
+            'scheme': 'http',
+            'path': path,
+            'raw_path': path.encode('utf-8'),
+            'query_string': b'',
+            'root_path': '',
+            'headers': [
+                (b'host', b'testserver'),
+                (b'content-type', b'application/json'),
+                (b'content-length', str(len(body)).encode('ascii')),
+            ],
+            'client': ('127.0.0.1', 50000),
+            'server': ('testserver', 80),
+        }
+        await self.app(scope, receive, send)
+        response_done.set()
+        return status, b''.join(chunks)
+
+
+class HTTPTransport:
+    """Send real HTTP requests with a pool of requests.Session threads"""
+
+    def __init__(self, base_url, max_workers, timeout=30):
+        import requests
+
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.executor = ThreadPoolExecutor(max_workers=max_workers)
+        self.session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    async def start(self, ready_timeout=300):
+        """Wait until the server reports ready, so the first step doesn't measure 503s"""
+        import requests
+
+        loop = asyncio.get_running_loop()
+        deadline = time.monotonic() + ready_timeout
+        while True:
+            try:
+                response = await loop.run_in_executor(
+                    self.executor, lambda: self.session.get(self.base_url + '/ready', timeout=self.timeout))
+                # 404: a server without a readiness probe
+                if response.status_code in (200, 404):
+                    return
+            except requests.RequestException:
+                pass
+            if time.monotonic() > deadline:
+                raise RuntimeError(f"{self.base_url} not ready after {ready_timeout}s")
+            await asyncio.sleep(1)
+
+    async def close(self):
+        self.executor.shutdown(wait=False)
+        self.session.close()
+
+    def _post(self, path, payload):
+        response = self.session.post(self.base_url + path, json=payload, timeout=self.timeout)
+        return response.status_code, response.content
+
+    async def post(self, path, payload):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, self._post, path, payload)
+
+# ==========================================
+# 🎯 WORKLOAD
+# ==========================================
+
+def parse_mix(text):
+    """Parse 'name:weight,name:weight' into a dict of weights"""
+    mix = {}
+    for item in text.split(','):
+        if not item.strip():
+            continue
+        name, _, weight = item.partition(':')
+        mix[name.strip()] = float(weight) if weight else 1.0
+    return mix
+
+
+class Workload:
+    """Weighted random choice of endpoint and CV for each request"""
+
+    def __init__(self, endpoint_mix, cv_mix, top_k, seed):
+        self.rng = random.Random(seed)
+        unknown = set(endpoint_mix) - set(ENDPOINTS)
+        if unknown:
+            raise ValueError(f"Unknown endpoints: {sorted(unknown)}")
+
+        self.cvs = {}
+        for name in cv_mix:
+            if name == 'synthetic':
+                from benchmark import generate_synthetic_cvs
+                self.cvs[name] = generate_synthetic_cvs(50, seed)
+            elif name in CV_FIXTURES:
+                self.cvs[name] = [CV_FIXTURES[name]]
+            else:
+                raise ValueError(f"Unknown CV fixture '{name}' (available: {sorted(CV_FIXTURES)} + synthetic)")
+
+        self.endpoints = list(endpoint_mix)
+        self.endpoint_weights = list(endpoint_mix.values())
+        self.cv_names = list(cv_mix)
+        self.cv_weights = list(cv_mix.values())
+        self.top_k = top_k
+
+    def next_request(self):
+        endpoint = self.rng.choices(self.endpoints, self.endpoint_weights)[0]
+        cv_name = self.rng.choices(self.cv_names, self.cv_weights)[0]
+        cv_data = self.rng.choice(self.cvs[cv_name])
+        payload = {'cvData': cv_data}
+        if endpoint == 'predict-jobs':
+            payload['topK'] = self.top_k
+        return endpoint, payload
+
+# ==========================================
+# 🚀 LOAD STEPS
+# ==========================================
+
+async def run_step(transport, workload, concurrency, duration, rate, max_requests):
+    """
+    Run one load level. Closed loop (each worker fires back to back) when
+    rate is 0, otherwise open loop with Poisson arrivals capped at `concurrency`
+    in-flight requests.
+    """
+    results = []
+    deadline = time.perf_counter() + duration
+    issued = 0
+
+    async def fire():
+        endpoint, payload = workload.next_request()
+        start = time.perf_counter()
+        try:
+            status, _ = await transport.post(ENDPOINTS[endpoint], payload)
+        except Exception as e:
+            status = type(e).__name__
+        results.append((endpoint, status, time.perf_counter() - start))
+
+    def budget_left():
+        return time.perf_counter() < deadline and (not max_requests or issued < max_requests)
+
+    started = time.perf_counter()
+    if rate <= 0:
+        async def worker():
+            nonlocal issued
+            while budget_left():
+                issued += 1
+                await fire()
+
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+    else:
+        slots = asyncio.Semaphore(concurrency)
+        in_flight = set()
+        dropped = 0
+
+        async def guarded():
+            try:
+                await fire()
+            finally:
+                slots.release()
+
+        while budget_left():
+            await asyncio.sleep(workload.rng.expovariate(rate))
+            if slots.locked():
+                # Client-side saturation: the server can't keep up with the offered rate
+                dropped += 1
+                continue
+            await slots.acquire()
+            issued += 1
+            task = asyncio.create_task(guarded())
+            in_flight.add(task)
+            task.add_done_callback(in_flight.discard)
+        if in_flight:
+            await asyncio.gather(*in_flight)
+        if dropped:
+            results.extend(('client', 'dropped', 0.0) for _ in range(dropped))
+    elapsed = time.perf_counter() - started
+
+    return summarize_step(results, elapsed, concurrency, rate)
+
+
+def summarize_step(results, elapsed, concurrency, rate):
+    completed = [r for r in results if r[1] != 'dropped']
+    ok = [r for r in completed if r[1] == 200]
+    latencies_ms = np.array([r[2] * 1000 for r in ok]) if ok else np.array([0.0])
+
+    errors = {}
+    for _, status, _ in results:
+        if status != 200:
+            errors[str(status)] = errors.get(str(status), 0) + 1
+
+    histogram = {}
+    lower = 0
+    for upper in HISTOGRAM_BUCKETS_MS + [float('inf')]:
+        label = f"<={upper}ms" if upper != float('inf') else f">{HISTOGRAM_BUCKETS_MS[-1]}ms"
+        histogram[label] = int(((latencies_ms > lower) & (latencies_ms <= upper)).sum()) if ok else 0
+        lower = upper
+
+    per_endpoint = {}
+    for endpoint in sorted(set(r[0] for r in ok)):
+        values = np.array([r[2] * 1000 for r in ok if r[0] == endpoint])
+        per_endpoint[endpoint] = {
+            'requests': len(values),
+            'p50_ms': float(np.percentile(values, 50)),
+            'p99_ms': float(np.percentile(values, 99)),
+        }
+
+    return {
+        'concurrency': concurrency,
+        'offered_rate': rate or None,
+        'requests': len(completed),
+        'duration_s': round(elapsed, 3),
+        'throughput_rps': len(ok) / elapsed if elapsed > 0 else 0.0,
+        'error_rate': (len(results) - len(ok)) / len(results) if results else 0.0,
+        'errors': errors,
+        'latency_ms': {
+            'p50': float(np.percentile(latencies_ms, 50)),
+            'p90': float(np.percentile(latencies_ms, 90)),
+            'p95': float(np.percentile(latencies_ms, 95)),
+            'p99': float(np.percentile(latencies_ms, 99)),
+            'max': float(latencies_ms.max()),
+            'mean': float(latencies_ms.mean()),
+        },
+        'histogram': histogram,
+        'endpoints': per_endpoint,
+    }
+
+
+def find_saturation(steps, min_gain=0.10):
+    """
+    First load level whose throughput gain over the previous level is below
+    `min_gain` while p95 latency keeps rising, i.e. extra load only queues.
+    """
+    for previous, current in zip(steps, steps[1:]):
+        if previous['throughput_rps'] <= 0:
+            continue
+        gain = current['throughput_rps'] / previous['throughput_rps'] - 1
+        if gain < min_gain and current['latency_ms']['p95'] > previous['latency_ms']['p95']:
+            return {
+                'concurrency': previous['concurrency'],
+                'throughput_rps': previous['throughput_rps'],
+                'p95_ms': previous['latency_ms']['p95'],
+            }
+    return None
+
+# ==========================================
+# 📊 REPORTING
+# ==========================================
+
+def print_step(step):
+    lat = step['latency_ms']
+    print(f"\n📊 concurrency={step['concurrency']}"
+          + (f" rate={step['offered_rate']}/s" if step['offered_rate'] else "")
+          + f" — {step['requests']} requests in {step['duration_s']:.1f}s")
+    print(f"   throughput: {step['throughput_rps']:.2f} req/s   errors: {step['error_rate']:.1%} {step['errors'] or ''}")
+    print(f"   latency ms: p50={lat['p50']:.1f} p90={lat['p90']:.1f} p95={lat['p95']:.1f} "
+          f"p99={lat['p99']:.1f} max={lat['max']:.1f}")
+    total = sum(step['histogram'].values()) or 1
+    for label, count in step['histogram'].items():
+        if count:
+            print(f"   {label:>10} {'█' * max(1, int(40 * count / total))} {count}")
+    for endpoint, stats in step['endpoints'].items():
+        print(f"   {endpoint:<14} n={stats['requests']:<6} p50={stats['p50_ms']:.1f}ms p99={stats['p99_ms']:.1f}ms")
+
+
+async def run(args):
+    if args.in_process:
+        # Load during startup instead of in the background, so the app is ready (or failed) once started
+        os.environ.setdefault('NEXUS_BACKGROUND_LOAD', '0')
+        import app as nexus_app
+
+        transport = InProcessTransport(nexus_app.app)
+        await transport.start()
+        if args.synthetic_jobs:
+            from benchmark import generate_jobs_corpus
+            nexus_app.jobs_df = generate_jobs_corpus(args.synthetic_jobs, args.seed)
+            print(f"🧪 Using {args.synthetic_jobs:,} synthetic jobs")
+            if not nexus_app.readiness.ready:
+                # The synthetic corpus stands in for a dataset that failed to load
+                nexus_app.readiness.enter('ready')
+        if nexus_app.jobs_df is None:
+            print("⚠️ No jobs dataset loaded, predict-jobs requests will fail (use --synthetic-jobs)")
+    else:
+        transport = HTTPTransport(args.url, max_workers=max(args.concurrency), timeout=args.timeout)
+        await transport.start()
+
+    workload = Workload(parse_mix(args.endpoint_mix), parse_mix(args.cv_mix), args.top_k, args.seed)
+    steps = []
+    try:
+        for concurrency in args.concurrency:
+            step = await run_step(transport, workload, concurrency, args.duration, args.rate, args.requests)
+            print_step(step)
+            steps.append(step)
+    finally:
+        await transport.close()
+
+    saturation = find_saturation(steps)
+    if saturation:
+        print(f"\n🔥 Saturation at concurrency {saturation['concurrency']}: "
+              f"{saturation['throughput_rps']:.2f} req/s, p95 {saturation['p95_ms']:.1f} ms")
+    elif len(steps) > 1:
+        print("\n✅ No saturation detected in the tested range")
+
+    return {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'target': 'in-process' if args.in_process else args.url,
+        'config': {
+            'endpoint_mix': args.endpoint_mix,
+            'cv_mix': args.cv_mix,
+            'duration_s': args.duration,
+            'rate': args.rate,
+            'top_k': args.top_k,
+            'seed': args.seed,
+        },
+        'steps': steps,
+        'saturation': saturation,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the Nexus API")
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument('--url', default='http://localhost:8000', help="Base URL of a running server")
+    target.add_argument('--in-process', action='store_true', help="Drive the ASGI app in this process")
+    parser.add_argument('--synthetic-jobs', type=int, default=0,
+                        help="In-process only: replace the dataset with N synthetic jobs")
+    parser.add_argument('--concurrency', default='1,4,16',
+                        type=lambda s: [int(c) for c in s.split(',')], help="Comma-separated load levels")
+    parser.add_argument('--rate', type=float, default=0,
+                        help="Offered requests/second (0 = closed loop, as fast as possible)")
+    parser.add_argument('--duration', type=float, default=15, help="Seconds per load level")
+    parser.add_argument('--requests', type=int, default=0, help="Max requests per load level (0 = unlimited)")
+    parser.add_argument('--endpoint-mix', default='predict-jobs:3,analyze-cv:1')
+    parser.add_argument('--cv-mix', default='chloe:1,nabila:1,simple:1')
+    parser.add_argument('--top-k', type=int, default=10)
+    parser.add_argument('--timeout', type=float, default=30)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help="Write the report as JSON")
+    args = parser.parse_args()
+
+    print("="*70)
+    print("🔥 NEXUS LOAD TEST")
+    print("="*70)
+    report = asyncio.run(run(args))
+
+    if args.output:
+        os.makedirs(os.path.dirname(args.output) or '.', exist_ok=True)
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"\n💾 Report written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+"""
+Structured, non-blocking logging for the Nexus API
+Records are formatted as JSON (or text) and handed to a bounded queue that a
+background listener drains to stdout and backend_error.log, so request
+handlers never wait on I/O. When the queue is full, records are dropped and
+counted instead of blocking.
+
+Environment:
+    NEXUS_LOG_LEVEL        DEBUG / INFO / WARNING / ERROR (default INFO)
+    NEXUS_LOG_FORMAT       json or text (default json)
+    NEXUS_LOG_SAMPLE_RATE  fraction of high-volume records kept (default 0.1)
+    NEXUS_LOG_QUEUE_SIZE   max records waiting to be written (default 10000)
+    NEXUS_ERROR_LOG        error log path (default backend_error.log, empty to disable)
+"""
+
+import copy
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import uuid
+from contextvars import ContextVar
+from datetime import datetime, timezone
+
+try:
+    from . import metrics
+except ImportError:
+    import metrics
+
+LOGGER_NAME = 'nexus'
+REQUEST_ID_HEADER = b'x-request-id'
+
+correlation_id = ContextVar('nexus_correlation_id', default='-')
+
+LOG_RECORDS_DROPPED = metrics.Counter(
+    'nexus_log_records_dropped_total', 'Log records dropped because the log queue was full')
+LOG_RECORDS_SAMPLED_OUT = metrics.Counter(
+    'nexus_log_records_sampled_out_total', 'High-volume log records skipped by sampling')
+
+# Attributes every LogRecord has; anything else came from `extra=` and is emitted as a field
+_STANDARD_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', None, None))) | {'message', 'asctime'}
+
+_listener = None
+_exception_formatter = logging.Formatter()
+
+
+def get_logger(name=None):
+    return logging.getLogger(f"{LOGGER_NAME}.{name}" if name else LOGGER_NAME)
+
+
+class CorrelationIdFilter(logging.Filter):
+    """Attach the current request's correlation ID to every record"""
+
+    def filter(self, record):
+        record.correlation_id = correlation_id.get()
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keep only `rate` of the records logged with extra={'sampled': True}.
+    Warnings and errors are never sampled out.
+    """
+
+    def __init__(self, rate):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record):
+        if not getattr(record, 'sampled', False) or record.levelno >= logging.WARNING:
+            return True
+        if self.rate >= 1 or random.random() < self.rate:
+            return True
+        LOG_RECORDS_SAMPLED_OUT.inc()
+        return False
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: timestamp, level, logger, message, correlation ID and extra fields"""
+
+    def format(self, record):
+        payload = {
+            'ts': datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage(),
+            'correlation_id': getattr(record, 'correlation_id', '-'),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _STANDARD_ATTRS and key not in payload and key != 'sampled':
+                payload[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            payload['exc_info'] = record.exc_text
+        return json.dumps(payload, default=str, ensure_ascii=False)
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that drops (and counts) records instead of blocking when the queue is full"""
+
+    def prepare(self, record):
+        # Resolve the message and traceback in the caller's thread, while the
+        # arguments and frames are still what they were, and ship a plain record
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg, record.args = record.message, None
+        if record.exc_info:
+            record.exc_text = _exception_formatter.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            LOG_RECORDS_DROPPED.inc()
+
+
+def setup_logging(level=None, fmt=None, sample_rate=None, queue_size=None, error_log=None):
+    """Configure the 'nexus' logger with a queue handler and start the background listener (idempotent)"""
+    global _listener
+
+    if _listener is not None:
+        return get_logger()
+
+    level = (level or os.environ.get('NEXUS_LOG_LEVEL', 'INFO')).upper()
+    fmt = fmt or os.environ.get('NEXUS_LOG_FORMAT', 'json')
+    sample_rate = float(sample_rate if sample_rate is not None else os.environ.get('NEXUS_LOG_SAMPLE_RATE', 0.1))
+    queue_size = int(queue_size or os.environ.get('NEXUS_LOG_QUEUE_SIZE', 10000))
+    error_log = error_log if error_log is not None else os.environ.get('NEXUS_ERROR_LOG', 'backend_error.log')
+
+    if fmt == 'json':
+        formatter = JsonFormatter()
+    else:
+        formatter = logging.Formatter('%(asctime)s %(levelname)s %(name)s [%(correlation_id)s] %(message)s')
+
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(formatter)
+    handlers = [stream_handler]
+
+    if error_log:
+        file_handler = logging.handlers.RotatingFileHandler(
+            error_log, maxBytes=10 * 1024 * 1024, backupCount=3, encoding='utf-8', delay=True)
+        file_handler.setLevel(logging.ERROR)
+        file_handler.setFormatter(JsonFormatter())
+        handlers.append(file_handler)
+
+    log_queue = queue.Queue(maxsize=queue_size)
+    queue_handler = NonBlockingQueueHandler(log_queue)
+    queue_handler.addFilter(CorrelationIdFilter())
+    queue_handler.addFilter(SamplingFilter(sample_rate))
+
+    logger = get_logger()
+    logger.setLevel(level)
+    logger.handlers[:] = [queue_handler]
+    logger.propagate = False
+
+    _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    return logger
+
+
+def shutdown_logging():
+    """Flush queued records and stop the listener thread"""
+    global _listener
+
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+class CorrelationIdMiddleware:
+    """
+    Pure ASGI middleware: reuse the caller's X-Request-ID or generate one,
+    expose it to logs through `correlation_id` and echo it in the response
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            return await self.app(scope, receive, send)
+
+        request_id = None
+        for name, value in scope.get('headers', ()):
+            if name == REQUEST_ID_HEADER:
+                request_id = value.decode('latin-1')[:64]
+                break
+        request_id = request_id or uuid.uuid4().hex
+
+        async def send_with_request_id(message):
+            if message['type'] == 'http.response.start':
+                message['headers'] = list(message['headers']) + [(REQUEST_ID_HEADER, request_id.encode('latin-1'))]
+            await send(message)
+
+        token = correlation_id.set(request_id)
+        try:
+            await self.app(scope, receive, send_with_request_id)
+        finally:
+            correlation_id.reset(token)
@@ -0,0 +1,223 @@
+"""
+Memory accounting
+Breaks the process's memory down by what the app holds: the jobs DataFrame
+(per column), the TF-IDF vectorizer (vocabulary, idf, stop words), each
+loaded model, the job index arrays and the in-process caches. Sizes are the
+bytes owned by each component's objects and arrays; objects reachable from
+several components are counted once, under the first. Memory-mapped index
+arrays are reported apart: their pages are shared and only resident once
+touched. What remains of the RSS is the interpreter, libraries and
+allocator overhead. The breakdown is logged at startup and served by
+GET /admin/memory (header `X-Nexus-Admin: <NEXUS_ADMIN_TOKEN>`).
+
+Per-request peaks: a sampled share of requests runs with tracemalloc on and
+reports the peak bytes allocated (numpy buffers included) while it ran. One
+request is sampled at a time and tracemalloc is process-wide, so requests
+running concurrently add to the figure; read it as an upper bound.
+
+Environment (read by app.py):
+    NEXUS_MEMORY_SAMPLE   fraction of requests whose peak allocation is measured (default 0)
+    NEXUS_MEMORY_REPORT   set to 0 to skip the breakdown logged at startup
+"""
+
+import mmap
+import random
+import sys
+import threading
+import tracemalloc
+import types
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+from sklearn.tree._tree import Tree
+
+try:
+    from . import metrics
+except ImportError:
+    import metrics
+
+REQUEST_PEAK_BYTES = metrics.Histogram(
+    'nexus_request_peak_alloc_bytes', 'Peak bytes allocated while a sampled request ran (tracemalloc)', ['endpoint'],
+    buckets=(1 << 16, 1 << 18, 1 << 20, 4 << 20, 16 << 20, 64 << 20, 256 << 20, 1 << 30))
+
+# Not walked: code and modules are shared by the whole process
+_SKIPPED_TYPES = (type, types.ModuleType, types.FunctionType, types.BuiltinFunctionType, types.MethodType)
+
+
+class Sizer:
+    """Owned and memory-mapped bytes of object graphs, counting every object once"""
+
+    def __init__(self):
+        self.seen = set()
+
+    def size(self, obj):
+        """(owned, mapped) bytes reachable from obj that no earlier call counted"""
+        if obj is None or id(obj) in self.seen or isinstance(obj, _SKIPPED_TYPES):
+            return 0, 0
+        self.seen.add(id(obj))
+
+        if isinstance(obj, np.ndarray):
+            return self._array(obj)
+        if isinstance(obj, (pd.DataFrame, pd.Series, pd.Index)):
+            usage = obj.memory_usage(deep=True)
+            return int(usage.sum() if isinstance(usage, pd.Series) else usage), 0
+        if isinstance(obj, Tree):
+            state = obj.__getstate__()
+            return sys.getsizeof(obj) + state['nodes'].nbytes + state['values'].nbytes, 0
+        if isinstance(obj, mmap.mmap):
+            return 0, len(obj)
+
+        owned, mapped = sys.getsizeof(obj), 0
+        if isinstance(obj, dict):
+            children = [item for pair in obj.items() for item in pair]
+        elif isinstance(obj, (list, tuple, set, frozenset)):
+            children = obj
+        elif hasattr(obj, '__dict__'):
+            children = [vars(obj)]
+        else:
+            children = ()
+        for child in children:
+            child_owned, child_mapped = self.size(child)
+            owned += child_owned
+            mapped += child_mapped
+        return owned, mapped
+
+    def _array(self, array):
+        header = sys.getsizeof(array) - (array.nbytes if array.base is None else 0)
+        if isinstance(array, np.memmap) or isinstance(array.base, mmap.mmap):
+            self.size(array.base)
+            return header, array.nbytes
+        if array.base is not None:
+            # A view: the memory belongs to the array it was taken from
+            owned, mapped = self.size(array.base)
+            return header + owned, mapped
+        owned = header + array.nbytes
+        if array.dtype == object:
+            owned += sum(self.size(item)[0] for item in array.ravel())
+        return owned, 0
+
+
+def process_memory():
+    """Resident and peak resident bytes of this process (None where /proc is unavailable)"""
+    usage = {'rss_bytes': None, 'peak_rss_bytes': None}
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                key, _, value = line.partition(':')
+                if key in ('VmRSS', 'VmHWM'):
+                    usage['rss_bytes' if key == 'VmRSS' else 'peak_rss_bytes'] = int(value.split()[0]) * 1024
+    except OSError:
+        try:
+            import resource
+            usage['peak_rss_bytes'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+        except (ImportError, OSError):
+            pass
+    return usage
+
+
+def component_usage(obj, sizer):
+    """
+    (owned, mapped, detail) of one component: DataFrames are broken down per
+    column (and index), other objects per attribute, largest first
+    """
+    if isinstance(obj, pd.DataFrame):
+        usage = obj.memory_usage(deep=True, index=True)
+        owned, mapped = sizer.size(obj)
+        return owned, mapped, {str(column): int(nbytes) for column, nbytes in usage.sort_values(ascending=False).items()}
+    if not hasattr(obj, '__dict__') or isinstance(obj, _SKIPPED_TYPES):
+        return (*sizer.size(obj), None)
+
+    sizer.seen.add(id(obj))
+    owned, mapped, detail = sys.getsizeof(obj), 0, {}
+    for name, value in vars(obj).items():
+        value_owned, value_mapped = sizer.size(value)
+        owned += value_owned
+        mapped += value_mapped
+        if value_owned or value_mapped:
+            detail[name] = value_owned + value_mapped
+    return owned, mapped, dict(sorted(detail.items(), key=lambda item: -item[1]))
+
+
+def memory_report(components, caches=None):
+    """
+    Memory breakdown of named components and caches, largest first. They are
+    sized in the order given: an object shared by two components is counted
+    under the first one only.
+    """
+    sizer = Sizer()
+    rows = []
+    for kind, named in (('component', components), ('cache', caches or {})):
+        for name, obj in named.items():
+            if obj is None or id(obj) in sizer.seen:
+                continue
+            owned, mapped, detail = component_usage(obj, sizer)
+            rows.append({'name': name, 'kind': kind, 'type': type(obj).__name__,
+                         'bytes': owned, 'mapped_bytes': mapped, 'detail': detail})
+
+    usage = process_memory()
+    accounted = sum(row['bytes'] for row in rows)
+    return {
+        **usage,
+        'accounted_bytes': accounted,
+        'mapped_bytes': sum(row['mapped_bytes'] for row in rows),
+        'unaccounted_bytes': usage['rss_bytes'] - accounted if usage['rss_bytes'] is not None else None,
+        'components': sorted(rows, key=lambda row: -(row['bytes'] + row['mapped_bytes'])),
+    }
+
+
+class PeakAllocation:
+    """Peak bytes allocated during one sampled request (None when it was not sampled)"""
+
+    def __init__(self):
+        self.peak_bytes = None
+
+
+class RequestMemorySampler:
+    """Measures the peak allocations of a sampled share of requests with tracemalloc"""
+
+    def __init__(self, sample=0.0, history=20):
+        self.sample = sample
+        self.history = history
+        # endpoint -> {'samples', 'max_bytes', 'recent_bytes'}
+        self.peaks = {}
+        self._busy = threading.Lock()
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def track(self, endpoint):
+        allocation = PeakAllocation()
+        # tracemalloc's peak is process-wide: measure a single request at a time
+        if self.sample <= 0 or random.random() >= self.sample or not self._busy.acquire(blocking=False):
+            yield allocation
+            return
+
+        # Already tracing (PYTHONTRACEMALLOC): measure from the current level and leave it running
+        started = not tracemalloc.is_tracing()
+        if started:
+            tracemalloc.start(1)
+        else:
+            tracemalloc.reset_peak()
+        baseline = tracemalloc.get_traced_memory()[0]
+        try:
+            yield allocation
+        finally:
+            peak = tracemalloc.get_traced_memory()[1] - baseline
+            if started:
+                tracemalloc.stop()
+            self._busy.release()
+            allocation.peak_bytes = peak
+            self.record(endpoint, peak)
+
+    def record(self, endpoint, peak_bytes):
+        REQUEST_PEAK_BYTES.labels(endpoint).observe(peak_bytes)
+        with self._lock:
+            stats = self.peaks.setdefault(endpoint, {'samples': 0, 'max_bytes': 0, 'recent_bytes': []})
+            stats['samples'] += 1
+            stats['max_bytes'] = max(stats['max_bytes'], peak_bytes)
+            stats['recent_bytes'] = (stats['recent_bytes'] + [peak_bytes])[-self.history:]
+
+    def report(self):
+        with self._lock:
+            return {endpoint: {**stats, 'recent_bytes': list(stats['recent_bytes'])}
+                    for endpoint, stats in self.peaks.items()}
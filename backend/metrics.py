@@ -0,0 +1,276 @@
+"""
+Lightweight in-process metrics for the Nexus API
+Counters, gauges and histograms rendered in the Prometheus text format,
+plus timing spans around each stage of the matching pipeline
+
+Set NEXUS_METRICS=0 to skip the timing histograms; spans then cost one
+context-variable lookup and only counters keep counting.
+"""
+
+import bisect
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+ENABLED = os.environ.get('NEXUS_METRICS', '1') != '0'
+
+# Seconds; covers sub-millisecond stages up to multi-second fallback fits
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _format_labels(names, values, extra=None):
+    pairs = list(zip(names, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ''
+    escaped = (str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, v in pairs)
+    return '{' + ','.join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + '}'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    metric_type = None
+
+    def __init__(self, name, documentation, labelnames=(), registry=None):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+        self._lock = threading.Lock()
+        (registry if registry is not None else REGISTRY).register(self)
+
+    def labels(self, *values):
+        """Child metric for one combination of label values"""
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}, got {values}")
+            with self._lock:
+                child = self._children.setdefault(values, self._new_child())
+        return child
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.metric_type}"]
+        for values, child in sorted(self._children.items()):
+            lines.extend(child.render(self.name, self.labelnames, values))
+        return lines
+
+
+class _CounterChild:
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1):
+        with self._lock:
+            self.value += amount
+
+    def render(self, name, labelnames, values):
+        return [f"{name}{_format_labels(labelnames, values)} {_format_value(self.value)}"]
+
+
+class Counter(_Metric):
+    """Monotonically increasing count"""
+    metric_type = 'counter'
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount=1):
+        self.labels().inc(amount)
+
+
+class _GaugeChild:
+    def __init__(self):
+        self.value = 0.0
+        self.function = None
+
+    def set(self, value):
+        self.value = value
+
+    def set_function(self, function):
+        """Evaluate `function` at scrape time instead of storing a value"""
+        self.function = function
+
+    def render(self, name, labelnames, values):
+        value = self.function() if self.function is not None else self.value
+        return [f"{name}{_format_labels(labelnames, values)} {_format_value(value)}"]
+
+
+class Gauge(_Metric):
+    """Value that can go up and down"""
+    metric_type = 'gauge'
+
+    def _new_child(self):
+        return _GaugeChild()
+
+    def set(self, value):
+        self.labels().set(value)
+
+    def set_function(self, function):
+        self.labels().set_function(function)
+
+
+class _HistogramChild:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+
+    def render(self, name, labelnames, values):
+        lines = []
+        cumulative = 0
+        for upper, count in zip(self.buckets + (float('inf'),), self.counts):
+            cumulative += count
+            labels = _format_labels(labelnames, values, ('le', _format_value(float(upper))))
+            lines.append(f"{name}_bucket{labels} {cumulative}")
+        labels = _format_labels(labelnames, values)
+        lines.append(f"{name}_sum{labels} {_format_value(self.sum)}")
+        lines.append(f"{name}_count{labels} {cumulative}")
+        return lines
+
+
+class Histogram(_Metric):
+    """Bucketed distribution of observed values"""
+    metric_type = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS, registry=None):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames, registry)
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value):
+        self.labels().observe(value)
+
+
+class Registry:
+    """Collection of metrics rendered together at /metrics"""
+
+    def __init__(self):
+        self._metrics = {}
+
+    def register(self, metric):
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} already registered")
+        self._metrics[metric.name] = metric
+
+    def render(self):
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+# Starlette appends '; charset=utf-8' to text/* media types
+CONTENT_TYPE = 'text/plain; version=0.0.4'
+
+# ==========================================
+# 📈 NEXUS METRICS
+# ==========================================
+
+STAGE_SECONDS = Histogram(
+    'nexus_stage_duration_seconds', 'Time spent in each matching pipeline stage', ['path', 'stage'])
+REQUEST_SECONDS = Histogram(
+    'nexus_request_duration_seconds', 'End-to-end handler time per endpoint', ['endpoint'])
+REQUEST_ERRORS = Counter(
+    'nexus_request_errors_total', 'Requests that ended in an error, per endpoint', ['endpoint'])
+SCORING_PATH = Counter(
+    'nexus_predictions_total', 'Predictions served per scoring path (trained or fallback)', ['path'])
+CACHE_LOOKUPS = Counter(
+    'nexus_cache_lookups_total', 'Cache lookups per cache and result (hit or miss)', ['cache', 'result'])
+DATASET_JOBS = Gauge('nexus_dataset_jobs', 'Jobs in the loaded dataset')
+DATASET_DUPLICATES = Gauge(
+    'nexus_dataset_duplicate_jobs', 'Near-duplicate jobs collapsed into an alias of a canonical job at load time')
+MODEL_LOADED = Gauge('nexus_model_loaded', 'Whether a trained model is loaded (1) or the fallback is used (0)')
+
+
+def record_cache_lookup(cache, hit):
+    CACHE_LOOKUPS.labels(cache, 'hit' if hit else 'miss').inc()
+
+# ==========================================
+# ⏱️ SPANS
+# ==========================================
+
+class SpanCollector:
+    """Per-call record of stage timings, filled by every span inside collect_spans()"""
+
+    def __init__(self):
+        self.stages = {}
+
+    def start(self, stage):
+        pass
+
+    def stop(self, stage, seconds):
+        self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+
+
+_collector = ContextVar('nexus_span_collector', default=None)
+
+
+@contextmanager
+def collect_spans(collector=None):
+    """Record the stages run inside the block into `collector` (a SpanCollector)"""
+    collector = collector if collector is not None else SpanCollector()
+    token = _collector.set(collector)
+    try:
+        yield collector
+    finally:
+        _collector.reset(token)
+
+
+@contextmanager
+def span(stage, path='-'):
+    """Time a pipeline stage into nexus_stage_duration_seconds{path, stage}"""
+    collector = _collector.get()
+    if not ENABLED and collector is None:
+        yield
+        return
+    if collector is not None:
+        collector.start(stage)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        if ENABLED:
+            STAGE_SECONDS.labels(path, stage).observe(elapsed)
+        if collector is not None:
+            collector.stop(stage, elapsed)
+
+
+@contextmanager
+def timed_request(endpoint):
+    """Time a whole handler and count it as an error if it raises"""
+    if not ENABLED:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    except BaseException:
+        REQUEST_ERRORS.labels(endpoint).inc()
+        raise
+    finally:
+        REQUEST_SECONDS.labels(endpoint).observe(time.perf_counter() - start)
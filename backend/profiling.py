@@ -0,0 +1,221 @@
+"""
+Sampled request profiling and slow-request capture
+A sampled share of requests, or any request sent with the admin header
+`X-Nexus-Profile: <NEXUS_ADMIN_TOKEN>`, runs its compute under cProfile. The
+stats are written to NEXUS_PROFILE_DIR as <time>_<endpoint>_<request id>.prof,
+readable with `python -m pstats` or snakeviz.
+
+Requests slower than NEXUS_SLOW_REQUEST_MS are appended to a JSONL file in
+NEXUS_SLOW_REQUEST_DIR. Each record holds the per-stage timings, the request
+parameters and an anonymized summary of the CV. The summary keeps only the
+taxonomy skills, the counts of TF-IDF vocabulary words, section sizes and
+text length; free text, names and companies are dropped. `benchmark.py
+--replay <file>` turns the summaries back into CVs with the same skills and
+vocabulary, so slow inputs can be timed offline.
+
+Environment (read by app.py):
+    NEXUS_PROFILE_SAMPLE     fraction of requests profiled (default 0)
+    NEXUS_PROFILE_DIR        where .prof files go (default profiles/)
+    NEXUS_ADMIN_TOKEN        value of X-Nexus-Profile that profiles a request (unset = header ignored)
+    NEXUS_SLOW_REQUEST_MS    latency above which a request is recorded (default 0 = off)
+    NEXUS_SLOW_REQUEST_DIR   where slow-request JSONL files go (default slow_requests/)
+    NEXUS_SLOW_REQUEST_MAX   records written per process at most (default 1000)
+"""
+
+import cProfile
+import hmac
+import json
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from datetime import datetime, timezone
+
+try:
+    from . import metrics
+    from .logging_config import correlation_id, get_logger
+except ImportError:
+    import metrics
+    from logging_config import correlation_id, get_logger
+
+logger = get_logger('profiling')
+
+PROFILE_HEADER = 'x-nexus-profile'
+# Non-vocabulary word padding replayed CVs to their recorded text length
+REPLAY_FILLER = 'redacted'
+
+PROFILED_REQUESTS = metrics.Counter(
+    'nexus_profiled_requests_total', 'Requests run under the profiler, by trigger (sampled or header)', ['trigger'])
+SLOW_REQUESTS = metrics.Counter(
+    'nexus_slow_requests_total', 'Requests slower than NEXUS_SLOW_REQUEST_MS', ['endpoint'])
+
+# Set for the duration of a profiled request; read by profiled_call in the worker thread
+_profile_path = ContextVar('nexus_profile_path', default=None)
+
+
+def profiling_requested():
+    """True inside a request that runs under the profiler"""
+    return _profile_path.get() is not None
+
+
+def profiled_call(fn, *args):
+    """
+    fn(*args), under cProfile when the current request is profiled. Meant to
+    run in the worker thread (run_in_threadpool copies the request context).
+    """
+    path = _profile_path.get()
+    if path is None:
+        return fn(*args)
+
+    profile = cProfile.Profile()
+    try:
+        profile.enable()
+    except ValueError:
+        # Another profiler is already active (Python 3.12+ allows a single one)
+        return fn(*args)
+    try:
+        return fn(*args)
+    finally:
+        profile.disable()
+        try:
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+            profile.dump_stats(path)
+            logger.info("🔬 Profile written", extra={'path': path})
+        except OSError as e:
+            logger.warning(f"⚠️ Profile not written: {e}", extra={'path': path})
+
+
+class RequestObserver:
+    """Decides which requests are profiled and records the slow ones"""
+
+    def __init__(self, profile_sample=0.0, profile_dir='profiles', admin_token=None, slow_ms=0,
+                 slow_dir='slow_requests', max_slow_records=1000, summarize_cv=None, memory_sampler=None):
+        self.profile_sample = profile_sample
+        self.profile_dir = profile_dir
+        self.admin_token = admin_token
+        self.slow_ms = slow_ms
+        self.slow_dir = slow_dir
+        self.max_slow_records = max_slow_records
+        # cv_data -> anonymized summary, supplied by the app (it owns the vectorizer)
+        self.summarize_cv = summarize_cv
+        # Per-request peak allocations (memory.RequestMemorySampler), optional
+        self.memory_sampler = memory_sampler
+        self.slow_records = 0
+        self._lock = threading.Lock()
+
+    def profile_trigger(self, http_request):
+        """'header', 'sampled' or None for an incoming request"""
+        header = http_request.headers.get(PROFILE_HEADER)
+        if header and self.admin_token and hmac.compare_digest(header.encode(), self.admin_token.encode()):
+            return 'header'
+        if self.profile_sample > 0 and random.random() < self.profile_sample:
+            return 'sampled'
+        return None
+
+    @contextmanager
+    def observe(self, endpoint, http_request, cv_data, params=None):
+        """
+        Wrap one request: arm the profiler when it is selected and collect its
+        stage timings, then record it if it ran longer than the threshold
+        """
+        trigger = self.profile_trigger(http_request)
+        path = None
+        if trigger is not None:
+            PROFILED_REQUESTS.labels(trigger).inc()
+            stamp = datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%S%f')
+            path = os.path.join(self.profile_dir, f"{stamp}_{endpoint}_{correlation_id.get()}.prof")
+        token = _profile_path.set(path)
+
+        memory = self.memory_sampler.track(endpoint) if self.memory_sampler is not None else nullcontext()
+        start = time.perf_counter()
+        try:
+            with metrics.collect_spans() as collector, memory as allocation:
+                yield
+        finally:
+            _profile_path.reset(token)
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            if self.slow_ms > 0 and elapsed_ms >= self.slow_ms:
+                peak_bytes = getattr(allocation, 'peak_bytes', None)
+                self.record_slow(endpoint, elapsed_ms, collector.stages, cv_data, params, peak_bytes)
+
+    def record_slow(self, endpoint, elapsed_ms, stages, cv_data, params, peak_bytes=None):
+        SLOW_REQUESTS.labels(endpoint).inc()
+        with self._lock:
+            if self.slow_records >= self.max_slow_records:
+                return
+            self.slow_records += 1
+        try:
+            summary = self.summarize_cv(cv_data) if self.summarize_cv else None
+        except Exception as e:
+            summary = {'error': f"{type(e).__name__}: {e}"}
+        record = {
+            'ts': datetime.now(timezone.utc).isoformat(timespec='milliseconds'),
+            'request_id': correlation_id.get(),
+            'endpoint': endpoint,
+            'total_ms': round(elapsed_ms, 3),
+            'threshold_ms': self.slow_ms,
+            # Micro-batched requests are scored in a shared batch, outside the request's spans
+            'stages_ms': {stage: round(seconds * 1000, 3) for stage, seconds in stages.items()},
+            'params': params or {},
+            'peak_alloc_bytes': peak_bytes,  # when the request was also sampled for memory
+            'cv': summary,
+        }
+        path = os.path.join(self.slow_dir, f"slow_requests_{datetime.now(timezone.utc):%Y%m%d}.jsonl")
+        try:
+            os.makedirs(self.slow_dir, exist_ok=True)
+            with self._lock, open(path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(record, ensure_ascii=False) + '\n')
+        except OSError as e:
+            logger.warning(f"⚠️ Slow request not recorded: {e}", extra={'path': path})
+            return
+        logger.warning("🐢 Slow request recorded", extra={
+            'endpoint': endpoint, 'total_ms': round(elapsed_ms, 1), 'path': path, 'sampled': True})
+
+
+def anonymized_cv_summary(cv_data, cv_text, skills, analyzer, vocabulary):
+    """
+    What scoring depends on, without the CV's own words: taxonomy skills,
+    counts of TF-IDF vocabulary words, section sizes and text length
+    """
+    words = {}
+    for term in analyzer(cv_text):
+        # Unigrams only: replayed text re-creates the bigrams it can
+        if ' ' not in term and term in vocabulary:
+            words[term] = words.get(term, 0) + 1
+    return {
+        'skills': sorted(skills),
+        'vocabulary_words': dict(sorted(words.items())),
+        'sections': {key: len(value) for key, value in cv_data.items() if isinstance(value, list)},
+        'text_chars': len(cv_text),
+        'experienceLevel': cv_data.get('experienceLevel'),
+        'workType': cv_data.get('workType'),
+    }
+
+
+def replay_cv(summary):
+    """cvData with the summary's skills and vocabulary words, padded to the recorded text length"""
+    words = [word for word, count in summary.get('vocabulary_words', {}).items() for _ in range(count)]
+    text = ' '.join(words)
+    used = len(' '.join(summary.get('skills', []))) + len(text) + 2
+    padding = max(0, summary.get('text_chars', 0) - used) // (len(REPLAY_FILLER) + 1)
+    cv = {
+        'skills': list(summary.get('skills', [])),
+        'projects': [{'name': 'replay', 'description': [text + (' ' + REPLAY_FILLER) * padding]}],
+    }
+    for key in ('experienceLevel', 'workType'):
+        if summary.get(key):
+            cv[key] = summary[key]
+    return cv
+
+
+def load_slow_requests(path):
+    """(name, cvData, record) of every recorded slow request in a JSONL file"""
+    replays = []
+    with open(path, encoding='utf-8') as f:
+        for i, line in enumerate(f):
+            record = json.loads(line)
+            if isinstance(record.get('cv'), dict) and 'skills' in record['cv']:
+                replays.append((f"slow_{record.get('request_id', i)}", replay_cv(record['cv']), record))
+    return replays
@@ -0,0 +1,335 @@
+"""
+Ranking quality vs speed harness for the optimized scoring paths
+Every optimized way of ranking jobs (index precisions, dense embedding,
+micro-batching, shards, retrieve-then-rerank) must keep the semantics of the
+original exhaustive scorer. That scorer computes the cosine similarity
+between the CV and every job description, plus 30% skill overlap. A fixed
+query set (the real CV fixtures plus seeded synthetic CVs) is ranked by that
+reference and by each alternative, through the same
+predict_job_matches code the API runs. The harness reports:
+  recall@K      share of the returned jobs that belong in the reference top K
+                (jobs tied with the reference K-th score count)
+  NDCG@K        returned order graded by the reference scores
+  max Δ pts     largest matchScore difference from the reference score, in points
+  p50 / p95 ms  latency of one query
+It exits with status 1 when an alternative falls below its thresholds.
+
+Usage (from the backend/ directory):
+    python ranking_quality.py                                    # served dataset, default thresholds
+    python ranking_quality.py --synthetic-jobs 200k --alternatives sparse,int8,dense
+    python ranking_quality.py --min-recall 0.95 --min-ndcg 0.99   # same thresholds for every alternative
+    python ranking_quality.py --shards 2                          # also check scatter-gather scoring
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+from sklearn.metrics.pairwise import cosine_similarity
+
+import app
+from benchmark import build_cv_set, environment_info, generate_jobs_corpus, parse_size
+from job_index import JobIndex
+from rerank import RerankPipeline, parse_rerankers
+
+# (min recall@K, min NDCG@K, max score deviation in points); None disables a check
+EXACT = (1.0, 1.0, 1e-6)
+DEFAULT_THRESHOLDS = {
+    'sparse': EXACT,
+    'batched': EXACT,
+    'sharded': EXACT,
+    'rerank': EXACT,  # TF-IDF reranker over TF-IDF candidates must equal the exhaustive path
+    'float32': (0.99, 0.999, 0.001),
+    'int8': (0.9, 0.98, 0.5),
+    # Skill-bitmap candidates miss jobs tied on skills but not on text: gate on ranking quality only
+    'skills_candidates': (None, 0.95, 1e-6),
+    'dense': (0.5, 0.8, None),
+}
+DEFAULT_ALTERNATIVES = 'sparse,float32,int8,dense,batched,rerank,skills_candidates'
+
+# ==========================================
+# 🎯 REFERENCE SCORER
+# ==========================================
+
+class ReferenceScorer:
+    """
+    The original trained-path semantics, written independently of JobIndex:
+    0.7 x cosine(CV TF-IDF, job TF-IDF) + 0.3 x |CV skills ∩ job skills| / |job skills|
+    The job side is transformed once instead of on every query.
+    """
+
+    def __init__(self, jobs_df, vectorizer):
+        descriptions = jobs_df['Job Description'].fillna('')
+        self.vectorizer = vectorizer
+        self.jobs_tfidf = vectorizer.transform(descriptions)
+        self.job_skills = [set(app.extract_skills_from_text(desc)) for desc in descriptions]
+
+    def scores(self, cv_data):
+        cv_text = app.extract_cv_features(cv_data)
+        cv_tfidf = self.vectorizer.transform([cv_text])
+        cv_skills = set(app.extract_skills_from_text(cv_text))
+        similarity = cosine_similarity(cv_tfidf, self.jobs_tfidf)[0]
+        bonus = np.array([len(cv_skills & skills) / len(skills) if skills else 0 for skills in self.job_skills])
+        return 0.7 * similarity + 0.3 * bonus
+
+# ==========================================
+# 📏 AGREEMENT METRICS
+# ==========================================
+
+def recall_at_k(reference_scores, rows, k):
+    """Share of the k returned rows scoring at least the reference k-th score (tie order is arbitrary)"""
+    kth_score = np.sort(reference_scores)[-k]
+    return float(np.mean(reference_scores[rows[:k]] >= kth_score - 1e-12))
+
+
+def ndcg_at_k(reference_scores, rows, k):
+    """NDCG of the returned order, using the reference scores as graded relevance"""
+    discounts = 1 / np.log2(np.arange(2, k + 2))
+    ideal = np.sort(reference_scores)[::-1][:k]
+    idcg = float(ideal @ discounts[:len(ideal)])
+    gains = reference_scores[rows[:k]]
+    return float(gains @ discounts[:len(gains)]) / idcg if idcg > 0 else 1.0
+
+
+def max_deviation_points(reference_scores, rows, scores):
+    """Largest |returned score - reference score| of the returned jobs, in matchScore points"""
+    if not len(rows):
+        return 0.0
+    return 100 * float(np.abs(reference_scores[rows] - scores).max())
+
+# ==========================================
+# 🔀 ALTERNATIVES
+# ==========================================
+
+@contextmanager
+def app_config(**overrides):
+    """Set app module globals for the duration of the block"""
+    saved = {name: getattr(app, name) for name in overrides}
+    for name, value in overrides.items():
+        setattr(app, name, value)
+    try:
+        yield
+    finally:
+        for name, value in saved.items():
+            setattr(app, name, value)
+
+
+def ranked(result):
+    """(job rows, scores in [0, 1]) of a predict_job_matches result"""
+    matches = result['matches']
+    return (np.array([match.jobId for match in matches], dtype=np.int64),
+            np.array([match.matchScore / 100 for match in matches]))
+
+
+def run_single(cvs, top_k, engine='sparse'):
+    """Rank every CV with predict_job_matches, one request at a time"""
+    rankings, timings = [], []
+    for cv in cvs:
+        start = time.perf_counter()
+        result = app.predict_job_matches(cv, top_k, engine)
+        timings.append(time.perf_counter() - start)
+        rankings.append(ranked(result))
+    return rankings, timings
+
+
+def run_batched(cvs, top_k, batch_size=8):
+    """Rank the CVs in micro-batches; every query is charged its batch's time divided by its size"""
+    rankings, timings = [], []
+    for start_row in range(0, len(cvs), batch_size):
+        batch = cvs[start_row:start_row + batch_size]
+        start = time.perf_counter()
+        results = app.predict_batch_with_trained_model([(cv, top_k, 'sparse', False, None) for cv in batch])
+        elapsed = time.perf_counter() - start
+        timings += [elapsed / len(batch)] * len(batch)
+        rankings += [ranked(result) for result in results]
+    return rankings, timings
+
+
+def run_alternative(name, cvs, top_k, base_index, shards):
+    """Rankings and per-query latencies of one alternative, or None when it can't run here"""
+    index_config = {'job_index': base_index, 'indexed_jobs_df': app.jobs_df, 'RERANK_CANDIDATES': 0}
+    candidates = max(10 * top_k, 100)
+
+    if name == 'sparse':
+        with app_config(**index_config):
+            return run_single(cvs, top_k)
+    if name in ('float32', 'int8'):
+        with app_config(**{**index_config, 'job_index': base_index.with_precision(name)}):
+            return run_single(cvs, top_k)
+    if name == 'dense':
+        if not base_index.has_embeddings:
+            return None
+        with app_config(**index_config):
+            return run_single(cvs, top_k, 'dense')
+    if name == 'batched':
+        with app_config(**index_config):
+            return run_batched(cvs, top_k)
+    if name in ('rerank', 'skills_candidates'):
+        generator = 'tfidf' if name == 'rerank' else 'skills'
+        with app_config(**{**index_config, 'RERANK_CANDIDATES': candidates, 'CANDIDATE_GENERATOR': generator,
+                           'rerank_pipeline': RerankPipeline(parse_rerankers('tfidf:1'))}):
+            return run_single(cvs, top_k)
+    if name == 'sharded':
+        if shards < 2:
+            return None
+        with app_config(**index_config):
+            app.start_shard_pool(shards)
+            try:
+                return run_single(cvs, top_k)
+            finally:
+                app.stop_shard_pool()
+    raise ValueError(f"Unknown alternative '{name}'")
+
+
+def evaluate(reference_scores, rankings, timings, top_k):
+    """Agreement and latency summary of one alternative over the query set"""
+    recalls = [recall_at_k(ref, rows, top_k) for ref, (rows, _) in zip(reference_scores, rankings)]
+    ndcgs = [ndcg_at_k(ref, rows, top_k) for ref, (rows, _) in zip(reference_scores, rankings)]
+    deviations = [max_deviation_points(ref, rows, scores) for ref, (rows, scores) in zip(reference_scores, rankings)]
+    ms = np.array(timings) * 1000
+    return {
+        'mean_recall_at_k': float(np.mean(recalls)),
+        'min_recall_at_k': float(np.min(recalls)),
+        'mean_ndcg_at_k': float(np.mean(ndcgs)),
+        'min_ndcg_at_k': float(np.min(ndcgs)),
+        'max_deviation_points': float(np.max(deviations)),
+        'p50_ms': float(np.percentile(ms, 50)),
+        'p95_ms': float(np.percentile(ms, 95)),
+    }
+
+
+def check_thresholds(stats, thresholds):
+    """Failure messages of an alternative against (min recall, min NDCG, max deviation)"""
+    min_recall, min_ndcg, max_deviation = thresholds
+    failures = []
+    if min_recall is not None and stats['mean_recall_at_k'] < min_recall - 1e-12:
+        failures.append(f"recall@K {stats['mean_recall_at_k']:.4f} < {min_recall}")
+    if min_ndcg is not None and stats['mean_ndcg_at_k'] < min_ndcg - 1e-12:
+        failures.append(f"NDCG@K {stats['mean_ndcg_at_k']:.4f} < {min_ndcg}")
+    if max_deviation is not None and stats['max_deviation_points'] > max_deviation:
+        failures.append(f"max Δ {stats['max_deviation_points']:.6f} pts > {max_deviation}")
+    return failures
+
+# ==========================================
+# 📊 REPORTING
+# ==========================================
+
+def print_report(n_jobs, n_queries, top_k, reference_stats, report):
+    print(f"\n🎯 Ranking quality vs exhaustive reference — {n_jobs:,} jobs, {n_queries} CVs, K={top_k}")
+    print(f"   {'scorer':<19}{'recall@K':>9}{'min':>6}{'NDCG@K':>9}{'min':>6}{'max Δ pts':>11}"
+          f"{'p50 ms':>9}{'p95 ms':>9}  result")
+    print(f"   {'reference':<19}{'':>9}{'':>6}{'':>9}{'':>6}{'':>11}"
+          f"{reference_stats['p50_ms']:>9.2f}{reference_stats['p95_ms']:>9.2f}")
+    for name, stats in report.items():
+        if stats is None:
+            print(f"   {name:<19}{'(unavailable)':>50}")
+            continue
+        status = '✅' if not stats['failures'] else '❌ ' + '; '.join(stats['failures'])
+        print(f"   {name:<19}{stats['mean_recall_at_k']:>9.4f}{stats['min_recall_at_k']:>6.2f}"
+              f"{stats['mean_ndcg_at_k']:>9.4f}{stats['min_ndcg_at_k']:>6.2f}"
+              f"{stats['max_deviation_points']:>11.6f}{stats['p50_ms']:>9.2f}{stats['p95_ms']:>9.2f}  {status}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check optimized scoring paths against the exhaustive scorer")
+    parser.add_argument('--dataset', help="Jobs CSV (default: the dataset the API serves)")
+    parser.add_argument('--synthetic-jobs', help="Rank a synthetic corpus of this size instead, e.g. 200k")
+    parser.add_argument('--alternatives', default=DEFAULT_ALTERNATIVES,
+                        help=f"Comma-separated scorers to check, from {', '.join(DEFAULT_THRESHOLDS)}")
+    parser.add_argument('--shards', type=int, default=0, help="Also check scatter-gather over this many shards")
+    parser.add_argument('--synthetic-cvs', type=int, default=50, help="Seeded synthetic CVs added to the fixtures")
+    parser.add_argument('--top-k', type=int, default=10)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--min-recall', type=float, help="Override every alternative's minimum mean recall@K")
+    parser.add_argument('--min-ndcg', type=float, help="Override every alternative's minimum mean NDCG@K")
+    parser.add_argument('--max-deviation', type=float, help="Override every alternative's max Δ in points")
+    parser.add_argument('--output', help="JSON output path (default: benchmarks/quality_<timestamp>.json)")
+    args = parser.parse_args()
+
+    print("="*70)
+    print("🎯 NEXUS RANKING QUALITY CHECK")
+    print("="*70)
+
+    if not app.load_latest_model():
+        print("❌ No trained model available: the trained scoring paths can't be checked")
+        sys.exit(2)
+    if args.synthetic_jobs:
+        app.jobs_df = generate_jobs_corpus(parse_size(args.synthetic_jobs), args.seed)
+    elif args.dataset:
+        app.dataset_path = args.dataset
+        app.jobs_df = pd.read_csv(args.dataset, encoding='utf-8')
+    elif not app.load_jobs_dataset():
+        print("❌ No jobs dataset found")
+        sys.exit(2)
+
+    alternatives = [name.strip() for name in args.alternatives.split(',') if name.strip()]
+    if args.shards > 1 and 'sharded' not in alternatives:
+        alternatives.append('sharded')
+    unknown = [name for name in alternatives if name not in DEFAULT_THRESHOLDS]
+    if unknown:
+        parser.error(f"Unknown alternatives {unknown}")
+
+    cvs = [cv for _, cv in build_cv_set(args.synthetic_cvs, args.seed)]
+    print(f"📂 {len(app.jobs_df):,} jobs, {len(cvs)} CVs")
+
+    start = time.perf_counter()
+    reference = ReferenceScorer(app.jobs_df, app.tfidf_vectorizer)
+    base_index = JobIndex.build(app.jobs_df['Job Description'], app.tfidf_vectorizer, app.all_skills,
+                                embedding=app.embedding,
+                                embedding_dim=None if app.embedding else app.EMBEDDING_DIM)
+    print(f"   ✅ Reference and float64 index built in {time.perf_counter() - start:.1f}s")
+
+    timings = []
+    reference_scores = []
+    for cv in cvs:
+        start = time.perf_counter()
+        reference_scores.append(reference.scores(cv))
+        timings.append(time.perf_counter() - start)
+    ms = np.array(timings) * 1000
+    reference_stats = {'p50_ms': float(np.percentile(ms, 50)), 'p95_ms': float(np.percentile(ms, 95))}
+
+    report = {}
+    for name in alternatives:
+        # One unrecorded pass warms up lazy state (job attributes, shard workers' page cache)
+        run_alternative(name, cvs[:1], args.top_k, base_index, args.shards)
+        outcome = run_alternative(name, cvs, args.top_k, base_index, args.shards)
+        if outcome is None:
+            report[name] = None
+            continue
+        stats = evaluate(reference_scores, *outcome, args.top_k)
+        defaults = DEFAULT_THRESHOLDS[name]
+        thresholds = tuple(default if override is None else override for default, override in
+                           zip(defaults, (args.min_recall, args.min_ndcg, args.max_deviation)))
+        stats['thresholds'] = dict(zip(('min_recall_at_k', 'min_ndcg_at_k', 'max_deviation_points'), thresholds))
+        stats['failures'] = check_thresholds(stats, thresholds)
+        report[name] = stats
+
+    print_report(len(app.jobs_df), len(cvs), args.top_k, reference_stats, report)
+
+    output = args.output or os.path.join(
+        'benchmarks', f"quality_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump({
+            'environment': environment_info(),
+            'config': {'n_jobs': len(app.jobs_df), 'n_cvs': len(cvs), 'top_k': args.top_k, 'seed': args.seed},
+            'reference': reference_stats,
+            'alternatives': report,
+        }, f, indent=2)
+    print(f"\n💾 Results written to {output}")
+
+    failed = [name for name, stats in report.items() if stats is not None and stats['failures']]
+    if failed:
+        print(f"\n❌ Below thresholds: {', '.join(failed)}")
+        sys.exit(1)
+    print("\n✅ Every alternative meets its thresholds")
+
+
+if __name__ == "__main__":
+    main()
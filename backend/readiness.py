@@ -0,0 +1,108 @@
+"""
+Liveness and readiness
+The model, dataset and job index load in the background once the server is
+up, so the process answers health checks within a second of starting. `/`
+is the liveness probe: it only says the process is serving. `/ready` turns
+200 once the index is built and warmed up by synthetic queries (the first
+queries pay for lazy imports, page faults on memory-mapped indexes and
+BLAS thread start-up); until then it and the scoring endpoints answer 503
+with Retry-After, so orchestrators route traffic to ready instances only.
+
+Phases: starting -> loading -> warming -> ready, or failed when the dataset
+can't be loaded (the instance then never becomes ready). A warm-up query
+that raises is logged and skipped; it doesn't keep the instance unready.
+/api/analyze-cv only needs the model artifacts (skill taxonomy), so it is
+served as soon as model loading is over, whatever happens to the dataset.
+
+Environment (read by app.py):
+    NEXUS_BACKGROUND_LOAD   set to 0 to load before the server accepts connections
+    NEXUS_WARMUP_ROUNDS     passes over the warm-up queries (default 2, 0 = no warm-up)
+"""
+
+import threading
+import time
+
+try:
+    from . import metrics
+    from .logging_config import get_logger
+except ImportError:
+    import metrics
+    from logging_config import get_logger
+
+logger = get_logger('readiness')
+
+PHASES = ('starting', 'loading', 'warming', 'ready', 'failed')
+
+READY = metrics.Gauge('nexus_ready', 'Whether the instance is ready to serve scoring requests (1) or not yet (0)')
+PHASE_SECONDS = metrics.Gauge('nexus_startup_phase_seconds', 'Seconds spent in each start-up phase', ['phase'])
+WARMUP_SECONDS = metrics.Histogram('nexus_warmup_query_seconds', 'Latency of the synthetic warm-up queries', ['query'])
+
+
+class Readiness:
+    """Start-up phase of the instance, set by the loader and read by the probes"""
+
+    def __init__(self):
+        self.phase = 'starting'
+        self.error = None
+        # Set once model loading is over (loaded or not), independently of the dataset
+        self.models_loaded = False
+        self.started = time.monotonic()
+        self.phase_started = self.started
+        self._lock = threading.Lock()
+        READY.set_function(lambda: 1 if self.ready else 0)
+
+    @property
+    def ready(self):
+        return self.phase == 'ready'
+
+    def mark_models_loaded(self):
+        self.models_loaded = True
+
+    def enter(self, phase, error=None):
+        if phase not in PHASES:
+            raise ValueError(f"Unknown phase '{phase}' (expected one of {PHASES})")
+        with self._lock:
+            now = time.monotonic()
+            PHASE_SECONDS.labels(self.phase).set(now - self.phase_started)
+            previous, self.phase, self.phase_started, self.error = self.phase, phase, now, error
+        logger.info(f"🚥 {previous} -> {phase}", extra={
+            'phase': phase,
+            'since_start_s': round(now - self.started, 3),
+            'error': error,
+        })
+
+    def status(self):
+        with self._lock:
+            now = time.monotonic()
+            return {
+                'ready': self.phase == 'ready',
+                'phase': self.phase,
+                'modelsLoaded': self.models_loaded,
+                'phaseSeconds': round(now - self.phase_started, 3),
+                'uptimeSeconds': round(now - self.started, 3),
+                'error': self.error,
+            }
+
+
+def warm_up(queries, rounds=2):
+    """
+    Run every (name, fn) query `rounds` times. Returns each query's latency
+    in the last round in milliseconds, and {name: error} of the queries that
+    raised (those are not run again).
+    """
+    latencies, failures = {}, {}
+    for _ in range(rounds):
+        for name, query in queries:
+            if name in failures:
+                continue
+            start = time.perf_counter()
+            try:
+                query()
+            except Exception as e:
+                failures[name] = f"{type(e).__name__}: {e}"
+                logger.exception(f"⚠️ Warm-up query {name} failed: {e}", extra={'query': name})
+                continue
+            elapsed = time.perf_counter() - start
+            WARMUP_SECONDS.labels(name).observe(elapsed)
+            latencies[name] = round(elapsed * 1000, 2)
+    return latencies, failures
@@ -0,0 +1,193 @@
+"""
+Retrieve-then-rerank
+Scoring every job with every signal doesn't scale once costlier signals are
+added. A cheap candidate generator picks the best N jobs, by skill-bitmap
+overlap or by the TF-IDF inverted index, and a pipeline of rerankers
+scores only those candidates. Each reranker returns a signal in [0, 1] and
+the final score is their weighted mean:
+  tfidf          the 70% cosine + 30% skill blend of the exhaustive path
+  domain         probability the trained classifier gives the job's domain for this CV
+  compatibility  experience level distance and work-type preference
+
+Environment (read by app.py):
+    NEXUS_CANDIDATES           candidates passed to the rerankers (default 0 = score every job, no reranking)
+    NEXUS_CANDIDATE_GENERATOR  'tfidf' (default) or 'skills'
+    NEXUS_RERANKERS            name:weight list (default tfidf:0.8,domain:0.1,compatibility:0.1)
+"""
+
+import numpy as np
+import pandas as pd
+
+try:
+    from . import metrics
+except ImportError:
+    import metrics
+
+CANDIDATE_GENERATORS = ('tfidf', 'skills')
+DEFAULT_RERANKERS = 'tfidf:0.8,domain:0.1,compatibility:0.1'
+
+# Ordered from least to most senior; distance between levels drives compatibility
+EXPERIENCE_LEVELS = ('Entry Level', 'Junior', 'Mid-Level', 'Senior', 'Lead', 'Principal')
+
+
+def estimate_experience_level(cv_data):
+    """CV's stated experienceLevel, else a guess from its number of experience entries"""
+    stated = cv_data.get('experienceLevel')
+    if stated in EXPERIENCE_LEVELS:
+        return stated
+    positions = len(cv_data.get('experience', []) or [])
+    return EXPERIENCE_LEVELS[min(positions, 4)]
+
+
+class JobAttributes:
+    """Per-job columns the rerankers read, decoded once per dataset"""
+
+    def __init__(self, jobs_df, domain_encoder=None):
+        self.jobs_df = jobs_df
+        level = {name: i for i, name in enumerate(EXPERIENCE_LEVELS)}
+        self.experience = jobs_df.get('Experience Level', pd.Series(index=jobs_df.index, dtype=object)) \
+            .map(level).fillna(-1).to_numpy(dtype=np.int64)
+        self.work_types = jobs_df.get('Work Type', pd.Series(index=jobs_df.index, dtype=object)) \
+            .fillna('Full-time').to_numpy(dtype=object)
+
+        self.domains = np.full(len(jobs_df), -1, dtype=np.int64)
+        if domain_encoder is not None and 'Domain' in jobs_df.columns:
+            codes = {name: i for i, name in enumerate(domain_encoder.classes_)}
+            self.domains = jobs_df['Domain'].fillna('Not specified').map(codes).fillna(-1).to_numpy(dtype=np.int64)
+
+
+class RerankContext:
+    """Everything the rerankers may need about one request"""
+
+    def __init__(self, index, attributes, cv_data, cv_tfidf, cv_skills, engine='sparse', base_scores=None,
+                 model=None, domain_encoder=None, exp_encoder=None, work_encoder=None):
+        self.index = index
+        self.attributes = attributes
+        self.cv_data = cv_data
+        self.cv_tfidf = cv_tfidf
+        self.cv_skills = cv_skills
+        self.engine = engine
+        # Blended scores of the candidates when the generator already computed them
+        self.base_scores = base_scores
+        self.model = model
+        self.domain_encoder = domain_encoder
+        self.exp_encoder = exp_encoder
+        self.work_encoder = work_encoder
+
+
+class Reranker:
+    """One ranking signal in [0, 1] for candidate rows; score() returns None when unavailable"""
+    name = None
+
+    def __init__(self, weight):
+        self.weight = weight
+
+    def score(self, context, rows):
+        raise NotImplementedError
+
+
+class TfidfReranker(Reranker):
+    """70% cosine + 30% skill bonus, computed for the candidates only"""
+    name = 'tfidf'
+
+    def score(self, context, rows):
+        if context.base_scores is not None:
+            return context.base_scores
+        index = context.index
+        if context.engine == 'dense':
+            similarity = index.embedding_scores(context.cv_tfidf, rows)
+        else:
+            similarity = index.tfidf_scores(context.cv_tfidf, rows)
+        return 0.7 * similarity + 0.3 * index.skill_bonus(context.cv_skills, rows)
+
+
+class DomainReranker(Reranker):
+    """Probability the trained domain classifier assigns to each candidate's domain"""
+    name = 'domain'
+
+    def score(self, context, rows):
+        model, encoder = context.model, context.domain_encoder
+        if model is None or encoder is None or not hasattr(model, 'predict_proba'):
+            return None
+        features = cv_feature_row(model, context.cv_data, context.cv_tfidf, context.cv_skills, context.index.skills,
+                                  context.exp_encoder, context.work_encoder)
+        proba = model.predict_proba(features)[0]
+        by_domain = np.zeros(len(encoder.classes_) + 1)
+        by_domain[model.classes_.astype(np.int64)] = proba
+        # Unknown job domains (-1) read the trailing 0
+        return by_domain[context.attributes.domains[rows]]
+
+
+def cv_feature_row(model, cv_data, cv_tfidf, cv_skills, skills, exp_encoder=None, work_encoder=None):
+    """The CV as one row of the training feature matrix: TF-IDF, skill flags, experience, work type"""
+    row = [cv_tfidf.toarray().ravel(),
+           np.array([1.0 if skill in cv_skills else 0.0 for skill in skills])]
+    extra = model.n_features_in_ - sum(len(part) for part in row)
+    categorical = []
+    if exp_encoder is not None:
+        categorical.append(exp_encoder.transform([estimate_experience_level(cv_data)])[0])
+    if work_encoder is not None:
+        work_type = cv_data.get('workType') or 'Full-time'
+        known = work_type in work_encoder.classes_
+        categorical.append(work_encoder.transform([work_type if known else 'Full-time'])[0])
+    categorical = (categorical + [0] * extra)[:max(extra, 0)]
+    row.append(np.array(categorical, dtype=np.float64))
+
+    features = np.concatenate(row)[None, :]
+    names = getattr(model, 'feature_names_in_', None)
+    return pd.DataFrame(features, columns=names) if names is not None else features
+
+
+class CompatibilityReranker(Reranker):
+    """Experience level closeness, and the CV's preferred work type when it states one"""
+    name = 'compatibility'
+
+    def score(self, context, rows):
+        attributes = context.attributes
+        cv_level = EXPERIENCE_LEVELS.index(estimate_experience_level(context.cv_data))
+        job_levels = attributes.experience[rows]
+        experience = np.where(job_levels >= 0,
+                              1 - np.abs(job_levels - cv_level) / (len(EXPERIENCE_LEVELS) - 1), 0.5)
+
+        preferred = context.cv_data.get('workType')
+        if not preferred:
+            return experience
+        work = (attributes.work_types[rows] == preferred).astype(np.float64)
+        return 0.5 * experience + 0.5 * work
+
+
+RERANKERS = {reranker.name: reranker for reranker in (TfidfReranker, DomainReranker, CompatibilityReranker)}
+
+
+def parse_rerankers(spec):
+    """'tfidf:0.8,domain:0.2' -> [TfidfReranker(0.8), DomainReranker(0.2)]"""
+    rerankers = []
+    for part in filter(None, (p.strip() for p in spec.split(','))):
+        name, _, weight = part.partition(':')
+        if name not in RERANKERS:
+            raise ValueError(f"Unknown reranker '{name}' (expected one of {tuple(RERANKERS)})")
+        rerankers.append(RERANKERS[name](float(weight) if weight else 1.0))
+    return rerankers
+
+
+class RerankPipeline:
+    """Weighted mean of the rerankers' signals; unavailable signals drop out of the mean"""
+
+    def __init__(self, rerankers):
+        self.rerankers = rerankers
+
+    @property
+    def names(self):
+        return [reranker.name for reranker in self.rerankers]
+
+    def rerank(self, context, rows, path='trained'):
+        """Final scores of the candidate rows, each reranker timed as its own span"""
+        total = np.zeros(len(rows))
+        weights = 0.0
+        for reranker in self.rerankers:
+            with metrics.span(f'rerank_{reranker.name}', path):
+                signal = reranker.score(context, rows)
+            if signal is not None:
+                total += reranker.weight * np.asarray(signal, dtype=np.float64)
+                weights += reranker.weight
+        return total / weights if weights else total
@@ -0,0 +1,81 @@
+"""
+Multi-worker launcher that shares one job index between uvicorn workers
+Loads the model and dataset once, writes the job index to a shared
+directory (/dev/shm when available) and starts uvicorn workers that
+memory-map it instead of each building their own copy. BLAS/OpenMP
+threads are capped per worker so N workers don't oversubscribe cores.
+The shared directory is removed when the master exits, so /dev/shm
+doesn't keep a copy of the index after shutdown.
+
+Usage (from the backend/ directory):
+    python serve.py --workers 4 --port 8000
+    python serve.py --workers 4 --blas-threads 1 --index-dir /dev/shm/nexus-index
+"""
+
+import argparse
+import os
+import shutil
+
+BLAS_ENV_VARS = ('OMP_NUM_THREADS', 'OPENBLAS_NUM_THREADS', 'MKL_NUM_THREADS', 'NUMEXPR_NUM_THREADS')
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the Nexus API with N workers sharing one job index")
+    parser.add_argument('--workers', type=int, default=int(os.environ.get('WEB_CONCURRENCY', 1)))
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=int(os.environ.get('PORT', 8000)))
+    parser.add_argument('--index-dir', default=os.environ.get('NEXUS_INDEX_DIR'),
+                        help="Shared index directory (default: nexus-job-index in /dev/shm, else the temp dir)")
+    parser.add_argument('--blas-threads', type=int,
+                        help="BLAS/OpenMP threads per worker (default: cores // workers)")
+    args = parser.parse_args()
+
+    blas_threads = args.blas_threads or max(1, (os.cpu_count() or 1) // args.workers)
+
+    # Must be set before numpy is imported here and inherited by the spawned workers
+    for name in BLAS_ENV_VARS:
+        os.environ[name] = str(blas_threads)
+    os.environ['NEXUS_BLAS_THREADS'] = str(blas_threads)
+
+    import uvicorn
+    import app
+    from job_index import shared_index_dir
+    from logging_config import setup_logging, shutdown_logging
+
+    # Resolved here: job_index imports numpy, which has to wait for the BLAS variables above
+    args.index_dir = args.index_dir or shared_index_dir('nexus-job-index')
+
+    logger = setup_logging()
+    logger.info("🚀 Preloading shared job index", extra={
+        'workers': args.workers,
+        'blas_threads': blas_threads,
+        'index_dir': args.index_dir,
+    })
+
+    written_index_dir = None
+    if app.load_latest_model() and app.load_jobs_dataset():
+        # Reuses the on-disk index cache when the dataset and artifacts are unchanged
+        index = app.load_or_build_job_index()
+        index.save(args.index_dir)
+        app.store_job_aliases(args.index_dir)
+        written_index_dir = args.index_dir
+        os.environ['NEXUS_INDEX_DIR'] = args.index_dir
+        logger.info("💾 Shared job index written", extra={
+            'jobs': index.n_jobs,
+            'index_mb': round(index.nbytes / (1024 * 1024), 1),
+        })
+    else:
+        logger.warning("⚠️ Could not preload the job index, each worker will build its own")
+
+    # Workers are spawned as fresh processes and attach to the index on disk
+    try:
+        uvicorn.run('app:app', host=args.host, port=args.port, workers=args.workers)
+    finally:
+        if written_index_dir:
+            shutil.rmtree(written_index_dir, ignore_errors=True)
+            logger.info("🧹 Removed shared job index", extra={'index_dir': written_index_dir})
+        shutdown_logging()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,207 @@
+"""
+Sharded scatter-gather scoring across worker processes
+The job index is split into N contiguous row ranges. Each range is saved as
+its own index and memory-mapped by a worker process. A query goes to every
+shard; each shard scores its jobs and returns only its local top-K. The
+coordinator merges those into the global top-K, so one request is spread
+over N cores instead of scanning the whole corpus on one.
+
+Shards are row ranges of the already built index (JobIndex.row_ranges), not
+rebuilt from the job descriptions. Queries carry a sequence number and each
+shard's replies are routed back by it, so concurrent requests are scattered
+at the same time: a shard works through its queue while the others are busy.
+A query whose replies don't all arrive in time (a hung worker, or the
+request's deadline) raises RuntimeError, and the caller scores in-process.
+
+Environment (read by app.py):
+    NEXUS_SHARDS             number of shard processes (default 0 = score in-process)
+    NEXUS_SHARD_DIR          where shard indexes are written (default /dev/shm/nexus-shards-<pid>)
+    NEXUS_SHARD_TIMEOUT_MS   longest wait for the shards' replies (default 5000)
+"""
+
+import itertools
+import multiprocessing
+import os
+import shutil
+import threading
+from concurrent.futures import Future, wait
+
+import numpy as np
+from scipy import sparse
+
+try:
+    from .job_index import JobIndex, top_k_indices
+except ImportError:
+    from job_index import JobIndex, top_k_indices
+
+
+def shard_bounds(n_rows, n_shards):
+    """(start, stop) row ranges of `n_shards` nearly equal shards"""
+    edges = np.linspace(0, n_rows, n_shards + 1).astype(int)
+    return [(int(start), int(stop)) for start, stop in zip(edges[:-1], edges[1:])]
+
+
+def score_shard(index, cv_tfidf, cv_skills, top_k, engine='sparse'):
+    """
+    Local top-K of one shard: (row positions within the shard, final scores).
+    Same 70% similarity / 30% skill bonus blend as predict_with_trained_model.
+    """
+    if engine == 'dense':
+        similarity = index.embedding_scores(cv_tfidf)
+    else:
+        similarity = index.tfidf_scores(cv_tfidf)
+    final_scores = 0.7 * similarity + 0.3 * index.skill_bonus(cv_skills)
+    top = top_k_indices(final_scores, top_k)
+    return top, final_scores[top]
+
+
+def _shard_worker(directory, connection):
+    """Worker process: attach to one shard and answer queries until told to stop (None)"""
+    index = JobIndex.load(directory, mmap=True)
+    connection.send('ready')
+    while True:
+        query = connection.recv()
+        if query is None:
+            break
+        sequence, terms, weights, n_terms, cv_skills, top_k, engine = query
+        cv_tfidf = sparse.csr_matrix((weights, terms, [0, len(terms)]), shape=(1, n_terms))
+        try:
+            connection.send((sequence, 'ok', score_shard(index, cv_tfidf, cv_skills, top_k, engine)))
+        except Exception as e:
+            connection.send((sequence, 'error', f"{type(e).__name__}: {e}"))
+    connection.close()
+
+
+class ShardChannel:
+    """
+    Pipe to one shard worker shared by concurrent queries: sends are
+    serialised, and a reader thread hands every (sequence, status, payload)
+    reply to the future of the query that sent it
+    """
+
+    def __init__(self, connection, name):
+        self.connection = connection
+        self._send_lock = threading.Lock()
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._reader = threading.Thread(target=self._read, name=f'{name}-reader', daemon=True)
+
+    def start(self):
+        self._reader.start()
+
+    def submit(self, sequence, query):
+        future = Future()
+        with self._lock:
+            self._pending[sequence] = future
+        try:
+            with self._send_lock:
+                self.connection.send((sequence, *query))
+        except (OSError, ValueError) as e:
+            with self._lock:
+                self._pending.pop(sequence, None)
+            raise RuntimeError(f"Shard worker unreachable: {e}")
+        return future
+
+    def forget(self, sequence):
+        """Stop waiting for a reply: it is dropped if it arrives later"""
+        with self._lock:
+            self._pending.pop(sequence, None)
+
+    def _read(self):
+        try:
+            while True:
+                sequence, status, payload = self.connection.recv()
+                with self._lock:
+                    future = self._pending.pop(sequence, None)
+                if future is not None:
+                    future.set_result((status, payload))
+        except (EOFError, OSError):
+            # Worker exited: fail whatever is still waiting on it
+            with self._lock:
+                pending, self._pending = self._pending, {}
+            for future in pending.values():
+                future.set_exception(RuntimeError("Shard worker exited"))
+
+    def close(self):
+        try:
+            with self._send_lock:
+                self.connection.send(None)
+        except OSError:
+            pass
+
+    def join(self):
+        self._reader.join(timeout=5)
+        self.connection.close()
+
+
+class ShardPool:
+    """Worker processes that each own one shard, queried concurrently over sequence-tagged channels"""
+
+    def __init__(self, shards, directory):
+        self.directory = directory
+        self.bounds = []
+        self._channels = []
+        self._processes = []
+        self._sequence = itertools.count()
+
+        # Spawned, not forked: the API process runs threads (thread pool, log listener)
+        context = multiprocessing.get_context('spawn')
+        start = 0
+        for i, shard in enumerate(shards):
+            shard_dir = shard.save(os.path.join(directory, f'shard_{i}'))
+            self.bounds.append((start, start + shard.n_jobs))
+            start += shard.n_jobs
+
+            parent_end, child_end = context.Pipe()
+            process = context.Process(target=_shard_worker, args=(shard_dir, child_end),
+                                      name=f'nexus-shard-{i}', daemon=True)
+            process.start()
+            child_end.close()
+            self._channels.append(ShardChannel(parent_end, f'nexus-shard-{i}'))
+            self._processes.append(process)
+
+        for channel in self._channels:
+            channel.connection.recv()
+            channel.start()
+
+    @property
+    def n_shards(self):
+        return len(self._processes)
+
+    def top_k(self, cv_tfidf, cv_skills, top_k, engine='sparse', timeout=None):
+        """
+        Global (job rows, final scores) of the top_k jobs, best first.
+        RuntimeError if a shard fails or not every shard replied within `timeout` seconds.
+        """
+        row = cv_tfidf.tocsr()
+        query = (row.indices, row.data, row.shape[1], list(cv_skills), top_k, engine)
+
+        sequence = next(self._sequence)
+        futures = [channel.submit(sequence, query) for channel in self._channels]
+        _, late = wait(futures, timeout=timeout)
+        if late:
+            for channel in self._channels:
+                channel.forget(sequence)
+            raise RuntimeError(f"{len(late)} of {self.n_shards} shards did not reply within {timeout:.3f}s")
+        replies = [future.result() for future in futures]
+
+        for status, payload in replies:
+            if status != 'ok':
+                raise RuntimeError(f"Shard failed: {payload}")
+
+        rows = np.concatenate([top + start for (_, (top, _)), (start, _) in zip(replies, self.bounds)])
+        scores = np.concatenate([shard_scores for _, (_, shard_scores) in replies])
+        order = top_k_indices(scores, top_k)
+        return rows[order], scores[order]
+
+    def close(self):
+        for channel in self._channels:
+            channel.close()
+        for process in self._processes:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+        # The workers closed their ends, so the readers see EOF
+        for channel in self._channels:
+            channel.join()
+        shutil.rmtree(self.directory, ignore_errors=True)
@@ -0,0 +1,93 @@
+"""
+Single-flight deduplication of identical in-flight requests
+A double-submit or a frontend retry sends the same cvData while the first
+request is still being scored. The first caller for a key runs the
+computation; identical callers that arrive before it finishes await the
+same result instead of computing it again.
+
+Set NEXUS_SINGLE_FLIGHT=0 (read by app.py) to turn it off.
+"""
+
+import asyncio
+import hashlib
+import json
+import time
+
+try:
+    from . import metrics
+except ImportError:
+    import metrics
+
+SINGLE_FLIGHT_REQUESTS = metrics.Counter(
+    'nexus_singleflight_requests_total',
+    'Requests that ran a computation (leader) or joined an identical in-flight one (shared)', ['result'])
+SINGLE_FLIGHT_SAVED_SECONDS = metrics.Counter(
+    'nexus_singleflight_saved_seconds_total', 'Compute time not spent because callers joined an in-flight computation')
+
+
+def request_key(*parts):
+    """Hash of JSON-serialisable request parts; dict key order and JSON formatting don't matter"""
+    payload = json.dumps(parts, sort_keys=True, separators=(',', ':'), ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class _Flight:
+    def __init__(self):
+        self.task = None
+        self.seconds = 0.0
+        # Callers awaiting the task; when the last one is cancelled, so is the task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    In-flight computations keyed by request_key(). The shared task is shielded,
+    so a caller that disconnects doesn't cancel the work for the others; once
+    every caller has gone away (e.g. all clients disconnected) it is cancelled.
+    """
+
+    def __init__(self):
+        # Only touched from the event loop thread, so no lock is needed
+        self._flights = {}
+
+    @property
+    def in_flight(self):
+        return len(self._flights)
+
+    async def run(self, key, compute):
+        """Result of `await compute()`, shared with concurrent calls for the same key"""
+        flight = self._flights.get(key)
+        if flight is not None:
+            SINGLE_FLIGHT_REQUESTS.labels('shared').inc()
+            result = await self._wait(key, flight)
+            SINGLE_FLIGHT_SAVED_SECONDS.inc(flight.seconds)
+            return result
+
+        SINGLE_FLIGHT_REQUESTS.labels('leader').inc()
+        flight = _Flight()
+        self._flights[key] = flight
+        flight.task = asyncio.ensure_future(self._compute(key, flight, compute))
+        return await self._wait(key, flight)
+
+    async def _wait(self, key, flight):
+        flight.waiters += 1
+        try:
+            return await asyncio.shield(flight.task)
+        finally:
+            flight.waiters -= 1
+            if flight.waiters == 0 and not flight.task.done():
+                # Nobody is left to read the result: stop the work, and let new callers start afresh
+                flight.task.cancel()
+                self._forget(key, flight)
+
+    def _forget(self, key, flight):
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+
+    async def _compute(self, key, flight, compute):
+        start = time.perf_counter()
+        try:
+            return await compute()
+        finally:
+            flight.seconds = time.perf_counter() - start
+            self._forget(key, flight)
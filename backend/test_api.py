@@ -4,17 +4,10 @@ Test script to debug the API endpoint
 import requests
 import json
 
+from cv_fixtures import SIMPLE_CV
+
 # Test CV data (simplified)
-cv_data = {
-    "skills": ["Python", "Java", "React", "Spring Boot", "Docker"],
-    "experience": [],
-    "projects": [
-        {"name": "Test Project", "description": ["Some description"]}
-    ],
-    "education": [
-        {"degree": "Bachelor", "institution": "University", "year": "2023"}
-    ]
-}
+cv_data = SIMPLE_CV
 
 # Test the API
 url = "http://localhost:8000/api/predict-jobs"
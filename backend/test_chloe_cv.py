@@ -1,37 +1,10 @@
 import requests
 import json
 
+from cv_fixtures import CHLOE_CV
+
 # Chloé's CV data from console logs
-cv_data = {
-    "skills": ["Docker", "Kubernetes", "GitHub", "Microservices", "CI/CD"],
-    "experience": [
-        {
-            "title": "Ingénieur Cloud",
-            "company": "DevOps, je suis passionnée par la création de",
-            "duration": "",
-            "responsibilities": []
-        },
-        {
-            "title": "DevOps, je suis passionnée par la création de",
-            "company": "Scalian",
-            "duration": "05/2019   -   06/2023   Toulon, France",
-            "responsibilities": [
-                "Mise en place et gestion de pipelines CI/CD",
-                "Déploiement et gestion de clusters Kubernetes"
-            ]
-        }
-    ],
-    "projects": [
-        {
-            "name": "Optimisation du Pipeline CI/CD",
-            "description": ["améliorant l'efficacité de 25%."]
-        }
-    ],
-    "education": [
-        {"degree": "Ingénieur Cloud", "institution": "", "year": ""},
-        {"degree": "Master en Informatique", "institution": "Université de la Méditerranée", "year": "2012"}
-    ]
-}
+cv_data = CHLOE_CV
 
 print("🧪 Testing Chloé's CV with backend...")
 print(f"📊 CV Skills: {cv_data['skills']}")
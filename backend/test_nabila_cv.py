@@ -1,46 +1,10 @@
 import requests
 import json
 
+from cv_fixtures import NABILA_CV
+
 # Nabila's CV data from the console logs
-cv_data = {
-    "skills": ["JavaScript", "Python", "C++", "PHP", "C", "HTML", "CSS", "MySQL", "Git", "GitHub", "Qt", "SQLite", "phpMyAdmin", "MySQL Workbench"],
-    "experience": [],
-    "projects": [
-        {
-            "name": "Application de Gestion des Étudiants de l'ENSAH",
-            "description": [
-                "Application en C (mode console) pour gérer les notes, absences et",
-                "infos étudiantes avec stockage sur fichiers."
-            ]
-        },
-        {
-            "name": "Memory Match Game",
-            "description": [
-                "Jeu de mémoire développé en C++ avec Qt, incluant interface",
-                "graphique, chronomètre, score et base de données SQLite."
-            ]
-        },
-        {
-            "name": "Application de Gestion des Affectations des Enseignements",
-            "description": ["2025", "phpMyAdmin, MySQL"]
-        },
-        {
-            "name": "Workbench",
-            "description": [
-                "Version Control: Git, GitHub",
-                "Operating Systems: Windows,",
-                "Other Competencies: Data",
-                "Structures, Algorithms, Object-",
-                "Oriented Programming",
-                "A C T I V I T É P A R A S C O L A I R E"
-            ]
-        }
-    ],
-    "education": [
-        {"degree": "École Nationale des Sciences Appliquées d'Al Hoceima (ENSAH)", "institution": "", "year": ""},
-        {"degree": "Baccalauréat", "institution": "", "year": ""}
-    ]
-}
+cv_data = NABILA_CV
 
 print("🧪 Testing Nabila's CV with backend...")
 print(f"📊 CV Skills: {cv_data['skills']}")
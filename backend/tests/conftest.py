@@ -0,0 +1,53 @@
+"""
+Shared fixtures. The backend modules are imported flat, as when the app runs
+from backend/, and the job index is built from a small synthetic corpus so
+the tests don't need the dataset or the trained artifacts.
+"""
+
+import os
+import sys
+
+import numpy as np
+import pytest
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+from job_index import JobIndex  # noqa: E402
+
+SKILLS = ['python', 'sql', 'docker', 'react', 'java', 'aws', 'kubernetes', 'excel', 'figma', 'spark']
+WORDS = SKILLS + [
+    'engineer', 'developer', 'analyst', 'designer', 'senior', 'junior', 'backend', 'frontend', 'data',
+    'cloud', 'platform', 'product', 'team', 'remote', 'startup', 'finance', 'health', 'retail', 'api',
+    'pipeline', 'dashboard', 'testing', 'security', 'mobile', 'machine', 'learning', 'reporting', 'ux',
+]
+
+
+def random_texts(n, seed, length=(8, 30)):
+    rng = np.random.default_rng(seed)
+    return [' '.join(rng.choice(WORDS, size=rng.integers(*length))) for _ in range(n)]
+
+
+@pytest.fixture(scope='session')
+def job_texts():
+    return random_texts(600, seed=7)
+
+
+@pytest.fixture(scope='session')
+def vectorizer(job_texts):
+    return TfidfVectorizer().fit(job_texts)
+
+
+@pytest.fixture(scope='session')
+def job_index(job_texts, vectorizer):
+    """float64 reference index (CSR)"""
+    return JobIndex.build(job_texts, vectorizer, SKILLS)
+
+
+@pytest.fixture(scope='session')
+def queries(vectorizer):
+    """(CV TF-IDF row, CV skills) pairs"""
+    texts = random_texts(20, seed=11, length=(5, 20))
+    return [(vectorizer.transform([text]), [skill for skill in SKILLS if skill in text]) for text in texts]
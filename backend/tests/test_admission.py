@@ -0,0 +1,163 @@
+"""Admission paths of the scoring endpoints: queue full, rate limited, client gone"""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException, Response
+
+import app as api
+from admission import ADMISSION_REJECTED, AdmissionController, RateLimiter
+from readiness import Readiness
+
+ENDPOINT = 'predict-jobs'
+
+
+class FakeRequest:
+    """What admitted() reads from a Starlette request"""
+
+    def __init__(self, host='10.0.0.1', headers=None, disconnected=False):
+        self.client = SimpleNamespace(host=host)
+        self.headers = headers or {}
+        self.disconnected = disconnected
+
+    async def is_disconnected(self):
+        return self.disconnected
+
+
+def rejected(reason):
+    return ADMISSION_REJECTED.labels(ENDPOINT, reason).value
+
+
+@pytest.fixture
+def serving(monkeypatch):
+    """app module in the ready state, without admission control or rate limit"""
+    readiness = Readiness()
+    readiness.mark_models_loaded()
+    readiness.enter('ready')
+    monkeypatch.setattr(api, 'readiness', readiness)
+    monkeypatch.setattr(api, 'admission', None)
+    monkeypatch.setattr(api, 'rate_limiter', None)
+    return api
+
+
+def test_queue_full_answers_503_with_retry_after(serving, monkeypatch):
+    async def scenario():
+        monkeypatch.setattr(serving, 'admission', AdmissionController(max_concurrent=1, max_queue=0))
+        release = asyncio.Event()
+
+        async def slow():
+            await release.wait()
+            return 'first'
+
+        response = Response()
+        first = asyncio.ensure_future(serving.admitted(FakeRequest(), response, ENDPOINT, slow))
+        while serving.admission.active == 0:
+            await asyncio.sleep(0.001)
+
+        async def never_run():
+            raise AssertionError('a refused request must not compute')
+
+        with pytest.raises(HTTPException) as refused:
+            await serving.admitted(FakeRequest(), Response(), ENDPOINT, never_run)
+        release.set()
+        return await first, response, refused.value
+
+    before = rejected('queue_full')
+    result, response, refused = asyncio.run(scenario())
+    assert result == 'first'
+    assert 'queue;dur=' in response.headers['Server-Timing']
+    assert refused.status_code == 503
+    assert int(refused.headers['Retry-After']) >= 1
+    assert rejected('queue_full') - before == 1
+
+
+def test_queued_request_runs_once_a_slot_frees(serving, monkeypatch):
+    async def scenario():
+        monkeypatch.setattr(serving, 'admission', AdmissionController(max_concurrent=1, max_queue=1))
+        order = []
+
+        async def compute(name):
+            order.append(f'{name} start')
+            await asyncio.sleep(0.01)
+            order.append(f'{name} end')
+            return name
+
+        results = await asyncio.gather(
+            serving.admitted(FakeRequest(), Response(), ENDPOINT, lambda: compute('a')),
+            serving.admitted(FakeRequest(), Response(), ENDPOINT, lambda: compute('b')))
+        return results, order
+
+    results, order = asyncio.run(scenario())
+    assert results == ['a', 'b']
+    assert order == ['a start', 'a end', 'b start', 'b end']
+
+
+def test_rate_limited_client_gets_429(serving, monkeypatch):
+    monkeypatch.setattr(serving, 'rate_limiter', RateLimiter(rate=1, burst=1))
+
+    async def compute():
+        return 'ok'
+
+    async def scenario():
+        first = await serving.admitted(FakeRequest(), Response(), ENDPOINT, compute)
+        with pytest.raises(HTTPException) as limited:
+            await serving.admitted(FakeRequest(), Response(), ENDPOINT, compute)
+        # Buckets are per client
+        other = await serving.admitted(FakeRequest(host='10.0.0.2'), Response(), ENDPOINT, compute)
+        return first, limited.value, other
+
+    before = rejected('rate_limited')
+    first, limited, other = asyncio.run(scenario())
+    assert first == other == 'ok'
+    assert limited.status_code == 429
+    assert limited.headers['Retry-After'] == '1'
+    assert rejected('rate_limited') - before == 1
+
+
+def test_rate_limit_keys_on_first_forwarded_hop(serving, monkeypatch):
+    monkeypatch.setattr(serving, 'rate_limiter', RateLimiter(rate=1, burst=1))
+
+    async def compute():
+        return 'ok'
+
+    async def scenario():
+        proxied = {'x-forwarded-for': '203.0.113.7, 10.0.0.1'}
+        await serving.admitted(FakeRequest(headers=proxied), Response(), ENDPOINT, compute)
+        return await serving.admitted(FakeRequest(), Response(), ENDPOINT, compute)
+
+    assert asyncio.run(scenario()) == 'ok'
+
+
+def test_disconnected_client_gets_499_and_work_is_cancelled(serving, monkeypatch):
+    async def scenario():
+        monkeypatch.setattr(serving, 'admission', AdmissionController(max_concurrent=1, max_queue=1))
+        cancelled = asyncio.Event()
+
+        async def compute():
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        with pytest.raises(HTTPException) as gone:
+            await serving.admitted(FakeRequest(disconnected=True), Response(), ENDPOINT, compute)
+        await asyncio.wait_for(cancelled.wait(), 1)
+        return gone.value, serving.admission.active
+
+    before = rejected('disconnected')
+    gone, active = asyncio.run(scenario())
+    assert gone.status_code == 499
+    assert active == 0
+    assert rejected('disconnected') - before == 1
+
+
+def test_controller_estimates_retry_after_from_the_queue():
+    async def scenario():
+        controller = AdmissionController(max_concurrent=1, max_queue=0, retry_after=1.0)
+        controller._compute_seconds = 4.0
+        controller.queued = 3
+        return controller.estimated_wait()
+
+    assert asyncio.run(scenario()) == 12.0
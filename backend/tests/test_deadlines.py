@@ -0,0 +1,117 @@
+"""Deadline gate of the anytime scoring stages"""
+
+import time
+
+import numpy as np
+import pytest
+
+import app as api
+from deadlines import StageCosts
+
+
+def test_unmeasured_stage_only_runs_without_deadline():
+    costs = StageCosts()
+    assert costs.estimate('similarity') is None
+    assert costs.fits('similarity', None)
+    assert not costs.fits('similarity', time.perf_counter() + 60)
+
+
+def test_estimate_is_a_moving_average_per_unit():
+    costs = StageCosts(alpha=0.5)
+    costs.observe('similarity_batch', 0.4, units=4)
+    costs.observe('similarity_batch', 0.3, units=1)
+    assert costs.estimate('similarity_batch') == pytest.approx(0.2)
+    assert costs.estimate('similarity_batch', units=8) == pytest.approx(1.6)
+
+    deadline = time.perf_counter() + 1.0
+    assert costs.fits('similarity_batch', deadline, units=2)
+    assert not costs.fits('similarity_batch', deadline, units=8)
+
+
+def test_measure_records_the_block_duration():
+    costs = StageCosts()
+    with costs.measure('rerank', units=2):
+        time.sleep(0.02)
+    assert 0.01 <= costs.estimate('rerank') < 0.05
+
+
+@pytest.fixture
+def trained(monkeypatch, job_index, vectorizer):
+    """Trained scoring path over the synthetic index, returning (top rows, completed stage)"""
+    def finish(index, top_indices, final_scores, cv_skills, engine, stage, *args, **kwargs):
+        return top_indices, stage
+
+    monkeypatch.setattr(api, 'get_job_index', lambda: job_index)
+    monkeypatch.setattr(api, 'tfidf_vectorizer', vectorizer)
+    monkeypatch.setattr(api, 'jobs_df', object())
+    monkeypatch.setattr(api, 'RERANK_CANDIDATES', 0)
+    monkeypatch.setattr(api, 'stage_costs', StageCosts())
+    monkeypatch.setattr(api, 'finish_trained_prediction', finish)
+    monkeypatch.setattr(api, 'extract_cv_features', lambda cv_data: cv_data['text'])
+    monkeypatch.setattr(api, 'extract_skills_from_text', lambda text: set(text.split()) & set(job_index.skills))
+    return api
+
+
+def run(api, cv_text, cv_skills, deadline):
+    return api.predict_with_trained_model({}, cv_text, 5, 'sparse', cv_skills, deadline=deadline)
+
+
+def run_batch(api, deadlines):
+    requests = [({'text': 'python sql engineer'}, 5, 'sparse', False, deadline) for deadline in deadlines]
+    return [stage for _, stage in api.predict_batch_with_trained_model(requests)]
+
+
+def test_tight_deadline_with_shards_returns_skill_ranking(trained, monkeypatch, job_index):
+    class SlowShards:
+        def top_k(self, *args):
+            raise AssertionError('scatter-gather does not fit the deadline')
+
+    def full_cosine(*args, **kwargs):
+        raise AssertionError('no in-process cosine over every job when shards are on')
+
+    monkeypatch.setattr(trained, 'shard_pool', SlowShards())
+    monkeypatch.setattr(trained, 'sharded_jobs_df', trained.jobs_df)
+    monkeypatch.setattr(job_index, 'tfidf_scores', full_cosine)
+    trained.stage_costs.observe('scatter_gather', 10.0)
+    assert trained.single_cv_dispatch(time.perf_counter() + 0.05)
+
+    top_indices, stage = run(trained, 'python sql docker engineer', {'python', 'sql', 'docker'},
+                             time.perf_counter() + 0.05)
+    assert stage == 'skills'
+    expected = job_index.skill_bonus({'python', 'sql', 'docker'})
+    np.testing.assert_array_equal(np.sort(expected[top_indices]), np.sort(expected)[-5:])
+
+
+def test_unmeasured_similarity_falls_back_to_skills(trained):
+    _, stage = run(trained, 'python engineer', {'python'}, time.perf_counter() + 60)
+    assert stage == 'skills'
+
+    # Measured by a request without deadline, then it fits
+    _, stage = run(trained, 'python engineer', {'python'}, None)
+    assert stage == 'tfidf'
+    _, stage = run(trained, 'python engineer', {'python'}, time.perf_counter() + 60)
+    assert stage == 'tfidf'
+
+
+def test_batched_similarity_is_gated_on_its_own_batch_cost(trained):
+    # One CV is quick, but the batched product was measured at 1 s per CV
+    trained.stage_costs.observe('similarity', 0.001)
+    trained.stage_costs.observe('similarity_batch', 1.0)
+    assert run_batch(trained, [time.perf_counter() + 0.5] * 3) == ['skills'] * 3
+
+    # Requests without a deadline run it, and it is measured per CV
+    assert run_batch(trained, [None] * 4) == ['tfidf'] * 4
+    assert trained.stage_costs.estimate('similarity_batch') < 1.0
+    assert trained.stage_costs.estimate('similarity') == 0.001
+
+
+def test_failed_scatter_gather_scores_in_process(trained, monkeypatch):
+    class HungShards:
+        def top_k(self, *args, timeout=None):
+            assert timeout == trained.SHARD_TIMEOUT_MS / 1000
+            raise RuntimeError('1 of 2 shards did not reply')
+
+    monkeypatch.setattr(trained, 'shard_pool', HungShards())
+    monkeypatch.setattr(trained, 'sharded_jobs_df', trained.jobs_df)
+    _, stage = run(trained, 'python engineer', {'python'}, None)
+    assert stage == 'tfidf'
@@ -0,0 +1,47 @@
+"""Near-duplicate collapsing and the alias table saved with the job index"""
+
+import pandas as pd
+
+import app as api
+from conftest import random_texts
+from dedup import alias_ids, collapse_aliases, dedup_jobs, load_aliases, save_aliases
+
+
+def jobs_with_copies():
+    """200 distinct postings, the first 20 of them repeated after the end"""
+    descriptions = random_texts(200, seed=13, length=(20, 40))
+    df = pd.DataFrame({
+        'Job Title': [f'Job {i}' for i in range(200)],
+        'Company': [f'Company {i}' for i in range(200)],
+        'Job Description': descriptions,
+    })
+    return pd.concat([df, df.iloc[:20]], ignore_index=True)
+
+
+def test_saved_aliases_collapse_the_dataset_like_dedup(tmp_path):
+    df = jobs_with_copies()
+    canonical_df, aliases, report = dedup_jobs(df, threshold=0.9)
+    assert report['collapsed'] == len(aliases) == 20
+
+    save_aliases(aliases, str(tmp_path))
+    loaded = load_aliases(str(tmp_path))
+    pd.testing.assert_frame_equal(loaded, aliases[['alias', 'canonical']].astype('int64'))
+    pd.testing.assert_frame_equal(collapse_aliases(df, loaded), canonical_df)
+
+    ids = alias_ids(loaded)
+    assert ids == {i: [200 + i] for i in range(20)}
+    assert all(canonical_df.loc[canonical, 'Job Title'] == df.loc[rows[0], 'Job Title']
+               for canonical, rows in ids.items())
+
+
+def test_no_saved_aliases(tmp_path):
+    assert load_aliases(str(tmp_path)) is None
+
+
+def test_matches_carry_their_alias_ids(monkeypatch):
+    df, _, _ = dedup_jobs(jobs_with_copies(), threshold=0.9)
+    monkeypatch.setattr(api, 'jobs_df', df.assign(Location='Remote', **{'LinkedIn URL': ''}))
+    monkeypatch.setattr(api, 'job_alias_ids', {3: [203]})
+
+    matches = api.build_matches_response([3, 150], [0.0] * 3 + [0.5] * 197, 'test')
+    assert [match.aliasIds for match in matches] == [[203], None]
@@ -0,0 +1,44 @@
+"""Domain classifier: streaming training picks a probabilistic model, the API refuses one without predict_proba"""
+
+import numpy as np
+import pandas as pd
+from sklearn.linear_model import SGDClassifier
+
+import app as api
+from conftest import random_texts
+from train_model import StreamingJobMatchingMLTrainer
+
+DOMAINS = {'Data': 'sql spark python data', 'Web': 'react frontend ux figma', 'Cloud': 'aws docker kubernetes cloud'}
+
+
+def test_streaming_best_model_has_predict_proba(tmp_path, capsys):
+    rng = np.random.default_rng(3)
+    domains = rng.choice(list(DOMAINS), size=300)
+    jobs = pd.DataFrame({
+        'Job Description': [f"{DOMAINS[domain]} {text}" for domain, text in zip(domains, random_texts(300, seed=5))],
+        'Domain': domains,
+        'Experience Level': rng.choice(['Junior', 'Mid-Level', 'Senior'], size=300),
+        'Work Type': rng.choice(['Full-time', 'Remote'], size=300),
+    })
+    path = tmp_path / 'jobs.csv'
+    jobs.to_csv(path, index=False)
+
+    trainer = StreamingJobMatchingMLTrainer(str(path), chunk_rows=100, embedding_dim=4)
+    trainer.load_data()
+    assert trainer.feature_engineering()
+    results = trainer.train_models()
+
+    assert {'Linear SVM', 'Passive Aggressive'} <= set(results)
+    assert trainer.best_model_name not in ('Linear SVM', 'Passive Aggressive')
+    assert hasattr(trainer.best_model, 'predict_proba')
+    assert 'not eligible as best model' in capsys.readouterr().out
+
+
+def test_domain_model_without_predict_proba_is_not_served(monkeypatch):
+    hinge = SGDClassifier(loss='hinge', random_state=0).fit(np.eye(4), [0, 1, 0, 1])
+    monkeypatch.setattr(api, 'trained_model', hinge)
+    monkeypatch.setattr(api, 'DOMAIN_MODEL', 'best')
+    monkeypatch.setattr(api, 'domain_model', 'previous')
+
+    api.load_domain_model('unused', 'unused')
+    assert api.domain_model is None
@@ -0,0 +1,88 @@
+"""Job index scoring: reduced precision against float64, batches and row ranges"""
+
+import numpy as np
+import pytest
+from scipy import sparse
+
+import job_index as job_index_module
+from job_index import JobIndex, top_k_indices
+
+TOP_K = 10
+
+
+def final_scores(index, cv_tfidf, cv_skills):
+    return 0.7 * index.tfidf_scores(cv_tfidf) + 0.3 * index.skill_bonus(cv_skills)
+
+
+def overlap_at_k(reference, scores, k, tolerance):
+    """Share of the top k by `scores` that belong in the reference top k (ties count as in)"""
+    kth = np.sort(reference)[-k]
+    return float(np.mean(reference[top_k_indices(scores, k)] >= kth - tolerance))
+
+
+
+
+@pytest.mark.parametrize('precision, max_deviation, min_overlap', [
+    ('float32', 1e-6, 1.0),
+    ('int8', 1e-2, 0.9),
+])
+def test_reduced_precision_top_k_matches_float64(job_index, queries, precision, max_deviation, min_overlap):
+    reduced = job_index.with_precision(precision)
+    assert reduced.tfidf_nbytes < job_index.tfidf_nbytes
+
+    overlaps = []
+    for cv_tfidf, cv_skills in queries:
+        reference = final_scores(job_index, cv_tfidf, cv_skills)
+        scores = final_scores(reduced, cv_tfidf, cv_skills)
+        assert np.max(np.abs(scores - reference)) <= max_deviation
+        overlaps.append(overlap_at_k(reference, scores, TOP_K, max_deviation))
+    assert min(overlaps) >= min_overlap
+
+
+@pytest.mark.parametrize('precision', ['float64', 'int8'])
+def test_saved_index_loads_identical(job_index, queries, tmp_path, precision):
+    index = job_index if precision == 'float64' else job_index.with_precision(precision)
+    loaded = JobIndex.load(index.save(str(tmp_path / precision)), mmap=True)
+    cv_tfidf, cv_skills = queries[0]
+    np.testing.assert_array_equal(final_scores(loaded, cv_tfidf, cv_skills), final_scores(index, cv_tfidf, cv_skills))
+
+
+@pytest.mark.parametrize('precision', ['float64', 'float32', 'int8'])
+def test_batch_scores_match_single(job_index, queries, precision):
+    index = job_index if precision == 'float64' else job_index.with_precision(precision)
+    batch = index.tfidf_scores_batch(sparse.vstack([cv_tfidf for cv_tfidf, _ in queries]))
+    for row, (cv_tfidf, _) in zip(batch, queries):
+        np.testing.assert_allclose(row, index.tfidf_scores(cv_tfidf), rtol=1e-6, atol=1e-7)
+
+
+@pytest.mark.parametrize('precision', ['float64', 'float32', 'int8'])
+def test_row_range_scores_like_the_full_index(job_index, queries, precision):
+    index = job_index if precision == 'float64' else job_index.with_precision(precision)
+    start, stop = 150, 420
+    rows = index.row_range(start, stop)
+    assert rows.n_jobs == stop - start
+    assert rows.precision == precision
+    for cv_tfidf, cv_skills in queries:
+        np.testing.assert_array_equal(rows.tfidf_scores(cv_tfidf), index.tfidf_scores(cv_tfidf)[start:stop])
+        np.testing.assert_array_equal(rows.skill_bonus(cv_skills), index.skill_bonus(cv_skills)[start:stop])
+
+
+@pytest.mark.parametrize('precision', ['float64', 'int8'])
+def test_row_ranges_convert_postings_once(job_index, queries, monkeypatch, precision):
+    index = job_index if precision == 'float64' else job_index.with_precision(precision)
+    calls = []
+    to_csr = job_index_module.postings_to_csr
+    monkeypatch.setattr(job_index_module, 'postings_to_csr', lambda *args: calls.append(1) or to_csr(*args))
+
+    bounds = [(0, 200), (200, 400), (400, index.n_jobs)]
+    shards = index.row_ranges(bounds)
+    assert len(calls) == (0 if precision == 'float64' else 1)
+    cv_tfidf, _ = queries[0]
+    np.testing.assert_array_equal(np.concatenate([shard.tfidf_scores(cv_tfidf) for shard in shards]),
+                                  index.tfidf_scores(cv_tfidf))
+
+
+def test_top_k_indices_best_first():
+    scores = np.array([0.2, 0.9, 0.1, 0.5, 0.7])
+    assert top_k_indices(scores, 3).tolist() == [1, 4, 3]
+    assert top_k_indices(scores, 10).tolist() == [1, 4, 3, 0, 2]
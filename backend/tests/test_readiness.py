@@ -0,0 +1,137 @@
+"""Start-up phases, the /ready probe and what each phase lets through"""
+
+import asyncio
+
+import httpx
+import pandas as pd
+import pytest
+from fastapi import HTTPException, Response
+
+import app as api
+from admission import ADMISSION_REJECTED
+from readiness import READY, Readiness, warm_up
+
+
+@pytest.fixture
+def starting(monkeypatch):
+    """app module freshly started: nothing loaded, loading stubbed out"""
+    monkeypatch.setattr(api, 'readiness', Readiness())
+    monkeypatch.setattr(api, 'jobs_df', None)
+    monkeypatch.setattr(api, 'WARMUP_ROUNDS', 1)
+    monkeypatch.setattr(api, 'MEMORY_REPORT', False)
+    monkeypatch.setattr(api, 'warmup_queries', lambda: [('ok', lambda: None)])
+    return api
+
+
+def stub_loading(monkeypatch, data_loaded=True):
+    def load_serving_state():
+        api.readiness.mark_models_loaded()
+        if data_loaded:
+            api.jobs_df = pd.DataFrame({'title': ['a', 'b', 'c']})
+        return True, data_loaded
+    monkeypatch.setattr(api, 'load_serving_state', load_serving_state)
+
+
+async def get_ready():
+    transport = httpx.ASGITransport(app=api.app)
+    async with httpx.AsyncClient(transport=transport, base_url='http://test') as client:
+        return await client.get('/ready')
+
+
+def test_phases_and_status():
+    readiness = Readiness()
+    assert readiness.status()['phase'] == 'starting'
+    assert not readiness.ready and READY.labels().function() == 0
+
+    for phase in ('loading', 'warming', 'ready'):
+        readiness.enter(phase)
+        assert readiness.phase == phase
+    assert readiness.ready and READY.labels().function() == 1
+
+    readiness.enter('failed', 'boom')
+    status = readiness.status()
+    assert (status['ready'], status['phase'], status['error']) == (False, 'failed', 'boom')
+    with pytest.raises(ValueError):
+        readiness.enter('sleeping')
+
+
+def test_warm_up_skips_failing_queries():
+    calls = []
+
+    def broken():
+        calls.append('broken')
+        raise RuntimeError('no index')
+
+    latencies, failures = warm_up([('ok', lambda: calls.append('ok')), ('broken', broken)], rounds=3)
+    assert calls.count('ok') == 3 and calls.count('broken') == 1
+    assert set(latencies) == {'ok'}
+    assert failures == {'broken': 'RuntimeError: no index'}
+
+
+def test_ready_turns_200_once_loaded_and_warmed(starting, monkeypatch):
+    stub_loading(monkeypatch)
+
+    async def scenario():
+        before = await get_ready()
+        await api.load_in_background()
+        return before, await get_ready()
+
+    before, after = asyncio.run(scenario())
+    assert before.status_code == 503
+    assert before.headers['Retry-After'] == str(api.NOT_READY_RETRY_AFTER)
+    assert before.json()['phase'] == 'starting'
+    assert after.status_code == 200
+    assert after.json()['ready'] and after.json()['totalJobs'] == 3
+    api.require_ready('predict-jobs')
+
+
+def test_scoring_answers_503_before_ready(starting):
+    async def compute():
+        raise AssertionError('must not compute before ready')
+
+    rejected = ADMISSION_REJECTED.labels('predict-jobs', 'not_ready')
+    before = rejected.value
+    with pytest.raises(HTTPException) as unready:
+        # Refused before the request is even looked at
+        asyncio.run(api.admitted(None, Response(), 'predict-jobs', compute))
+    assert unready.value.status_code == 503
+    assert unready.value.headers['Retry-After'] == str(api.NOT_READY_RETRY_AFTER)
+    assert rejected.value - before == 1
+
+
+def test_failing_warm_up_query_still_becomes_ready(starting, monkeypatch):
+    stub_loading(monkeypatch)
+
+    def broken():
+        raise RuntimeError('warm-up failure')
+    monkeypatch.setattr(api, 'warmup_queries', lambda: [('broken', broken)])
+
+    asyncio.run(api.load_in_background())
+    assert api.readiness.ready
+
+
+def test_missing_dataset_fails_but_serves_analyze_cv(starting, monkeypatch):
+    stub_loading(monkeypatch, data_loaded=False)
+
+    asyncio.run(api.load_in_background())
+    response = asyncio.run(get_ready())
+    assert response.status_code == 503
+    assert response.json()['phase'] == 'failed' and response.json()['modelsLoaded']
+
+    # analyze-cv only needs the model artifacts; scoring needs the dataset
+    api.require_ready('analyze-cv', models_only=True)
+    with pytest.raises(HTTPException) as unready:
+        api.require_ready('predict-jobs')
+    assert unready.value.status_code == 503
+
+
+def test_loading_error_marks_failed(starting, monkeypatch):
+    def load_serving_state():
+        raise OSError('disk gone')
+    monkeypatch.setattr(api, 'load_serving_state', load_serving_state)
+
+    asyncio.run(api.load_in_background())
+    assert api.readiness.phase == 'failed'
+    assert api.readiness.error == 'OSError: disk gone'
+    with pytest.raises(HTTPException):
+        api.require_ready('analyze-cv', models_only=True)
@@ -0,0 +1,65 @@
+"""Sharded top-K against the unsharded index"""
+
+import os
+import signal
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+from sharding import ShardPool, score_shard, shard_bounds
+
+TOP_K = 10
+
+
+def test_shard_bounds_cover_every_row():
+    bounds = shard_bounds(10, 3)
+    assert bounds[0][0] == 0 and bounds[-1][1] == 10
+    assert all(stop == start for (_, stop), (start, _) in zip(bounds, bounds[1:]))
+    assert max(stop - start for start, stop in bounds) - min(stop - start for start, stop in bounds) <= 1
+
+
+@pytest.mark.parametrize('precision', ['float64', 'int8'])
+def test_merged_shards_equal_unsharded_top_k(job_index, queries, tmp_path, precision):
+    index = job_index if precision == 'float64' else job_index.with_precision(precision)
+    shards = index.row_ranges(shard_bounds(index.n_jobs, 3))
+    pool = ShardPool(shards, str(tmp_path))
+    try:
+        assert pool.n_shards == 3
+        for cv_tfidf, cv_skills in queries:
+            all_scores = 0.7 * index.tfidf_scores(cv_tfidf) + 0.3 * index.skill_bonus(cv_skills)
+            _, expected_scores = score_shard(index, cv_tfidf, cv_skills, TOP_K)
+            rows, scores = pool.top_k(cv_tfidf, cv_skills, TOP_K)
+            np.testing.assert_array_equal(scores, expected_scores)
+            # Global rows point at the jobs that scored that (rows can only differ between ties)
+            np.testing.assert_array_equal(all_scores[rows], scores)
+
+        # Concurrent queries each get their own replies
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            results = list(executor.map(lambda query: pool.top_k(query[0], query[1], TOP_K), queries * 3))
+        for (cv_tfidf, cv_skills), (rows, scores) in zip(queries * 3, results):
+            np.testing.assert_array_equal(scores, score_shard(index, cv_tfidf, cv_skills, TOP_K)[1])
+    finally:
+        pool.close()
+
+
+def test_hung_shard_times_out_and_its_late_reply_is_dropped(job_index, queries, tmp_path):
+    pool = ShardPool(job_index.row_ranges(shard_bounds(job_index.n_jobs, 2)), str(tmp_path))
+    try:
+        cv_tfidf, cv_skills = queries[0]
+        expected = score_shard(job_index, cv_tfidf, cv_skills, TOP_K)[1]
+        hung = pool._processes[1].pid
+        os.kill(hung, signal.SIGSTOP)
+        try:
+            with pytest.raises(RuntimeError, match='did not reply'):
+                pool.top_k(cv_tfidf, cv_skills, TOP_K, timeout=0.2)
+        finally:
+            os.kill(hung, signal.SIGCONT)
+
+        # The late reply of the timed-out query doesn't answer the next one
+        other_tfidf, other_skills = queries[1]
+        _, scores = pool.top_k(other_tfidf, other_skills, TOP_K, timeout=5)
+        np.testing.assert_array_equal(scores, score_shard(job_index, other_tfidf, other_skills, TOP_K)[1])
+        np.testing.assert_array_equal(pool.top_k(cv_tfidf, cv_skills, TOP_K, timeout=5)[1], expected)
+    finally:
+        pool.close()
@@ -0,0 +1,111 @@
+"""Single-flight sharing, counters and cancellation"""
+
+import asyncio
+
+import pytest
+
+from singleflight import SINGLE_FLIGHT_REQUESTS, SINGLE_FLIGHT_SAVED_SECONDS, SingleFlight, request_key
+
+
+def counts():
+    return (SINGLE_FLIGHT_REQUESTS.labels('leader').value, SINGLE_FLIGHT_REQUESTS.labels('shared').value,
+            SINGLE_FLIGHT_SAVED_SECONDS.labels().value)
+
+
+def test_request_key_ignores_key_order():
+    assert request_key({'a': 1, 'b': [1, 2]}, 5) == request_key({'b': [1, 2], 'a': 1}, 5)
+    assert request_key({'a': 1}, 5) != request_key({'a': 1}, 6)
+
+
+def test_identical_calls_share_one_computation():
+    async def scenario():
+        flights = SingleFlight()
+        calls = []
+
+        async def compute():
+            calls.append(1)
+            await asyncio.sleep(0.02)
+            return {'jobs': [1, 2, 3]}
+
+        results = await asyncio.gather(*(flights.run('same', compute) for _ in range(5)))
+        other = await flights.run('other', compute)
+        return results, other, calls, flights.in_flight
+
+    leaders, shared, saved = counts()
+    results, other, calls, in_flight = asyncio.run(scenario())
+
+    assert len(calls) == 2
+    assert all(result is results[0] for result in results)
+    assert other == {'jobs': [1, 2, 3]}
+    assert in_flight == 0
+    assert SINGLE_FLIGHT_REQUESTS.labels('leader').value - leaders == 2
+    assert SINGLE_FLIGHT_REQUESTS.labels('shared').value - shared == 4
+    assert SINGLE_FLIGHT_SAVED_SECONDS.labels().value - saved >= 4 * 0.02 * 0.9
+
+
+def test_errors_reach_every_caller_and_are_not_cached():
+    async def scenario():
+        flights = SingleFlight()
+        attempts = []
+
+        async def compute():
+            attempts.append(1)
+            await asyncio.sleep(0.01)
+            if len(attempts) == 1:
+                raise ValueError('boom')
+            return 'ok'
+
+        first = await asyncio.gather(flights.run('k', compute), flights.run('k', compute), return_exceptions=True)
+        return first, await flights.run('k', compute)
+
+    first, retry = asyncio.run(scenario())
+    assert all(isinstance(result, ValueError) for result in first)
+    assert retry == 'ok'
+
+
+def test_leaving_caller_does_not_cancel_the_others():
+    async def scenario():
+        flights = SingleFlight()
+
+        async def compute():
+            await asyncio.sleep(0.05)
+            return 'done'
+
+        leaver = asyncio.ensure_future(flights.run('k', compute))
+        stayer = asyncio.ensure_future(flights.run('k', compute))
+        await asyncio.sleep(0.01)
+        leaver.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leaver
+        return await stayer
+
+    assert asyncio.run(scenario()) == 'done'
+
+
+def test_last_waiter_leaving_cancels_the_computation():
+    async def scenario():
+        flights = SingleFlight()
+        started, cancelled = asyncio.Event(), asyncio.Event()
+
+        async def compute():
+            started.set()
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        callers = [asyncio.ensure_future(flights.run('k', compute)) for _ in range(2)]
+        await started.wait()
+        for caller in callers:
+            caller.cancel()
+        await asyncio.gather(*callers, return_exceptions=True)
+        await asyncio.wait_for(cancelled.wait(), 1)
+        in_flight = flights.in_flight
+
+        # A new caller starts afresh instead of joining the cancelled task
+        async def fresh():
+            return 'fresh'
+        return in_flight, await flights.run('k', fresh)
+
+    assert asyncio.run(scenario()) == (0, 'fresh')
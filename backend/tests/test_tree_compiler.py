@@ -0,0 +1,81 @@
+"""Compiled tree ensembles against scikit-learn's predict_proba"""
+
+import numpy as np
+import pytest
+from sklearn.datasets import make_classification
+from sklearn.ensemble import ExtraTreesClassifier, GradientBoostingClassifier, RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+
+from tree_compiler import CompiledBoosting, CompiledForest, CompiledTrees, compile_model, leaf_fractions
+
+
+@pytest.fixture(scope='module')
+def dataset():
+    X, y = make_classification(n_samples=400, n_features=20, n_informative=8, n_classes=4,
+                               random_state=0)
+    return X, y
+
+
+@pytest.mark.parametrize('model_class', [RandomForestClassifier, ExtraTreesClassifier])
+def test_forest_predict_proba_identical(dataset, model_class):
+    X, y = dataset
+    model = model_class(n_estimators=25, max_depth=8, random_state=0).fit(X, y)
+    compiled = compile_model(model)
+    assert isinstance(compiled, CompiledForest)
+    np.testing.assert_array_equal(compiled.predict_proba(X), model.predict_proba(X))
+    # A single row goes through the same path as a batch
+    np.testing.assert_array_equal(compiled.predict_proba(X[0]), model.predict_proba(X[:1]))
+
+
+def test_forest_with_class_counts_in_leaves(dataset):
+    """scikit-learn < 1.4 stores weighted class counts in the leaves instead of fractions"""
+    X, y = dataset
+    model = RandomForestClassifier(n_estimators=10, random_state=0).fit(X, y)
+    expected = model.predict_proba(X)
+    for estimator in model.estimators_:
+        n_node_samples = estimator.tree_.n_node_samples.astype(np.float64)
+        estimator.tree_.value[:] *= n_node_samples[:, None, None]
+    assert not np.allclose(model.estimators_[0].tree_.value.sum(axis=2), 1.0)
+
+    np.testing.assert_allclose(CompiledForest(model).predict_proba(X), expected, rtol=1e-12, atol=1e-15)
+
+
+def test_leaf_fractions_keeps_fraction_rows_bit_for_bit():
+    value = np.array([[0.1, 0.2, 0.7], [3.0, 1.0, 0.0], [0.0, 0.0, 0.0]])
+    fractions = leaf_fractions(value)
+    np.testing.assert_array_equal(fractions[0], value[0])
+    np.testing.assert_array_equal(fractions[1], [0.75, 0.25, 0.0])
+    np.testing.assert_array_equal(fractions[2], value[2])
+
+
+def test_forest_missing_values_follow_sklearn():
+    X, y = make_classification(n_samples=300, n_features=8, random_state=1)
+    X[np.random.default_rng(1).random(X.shape) < 0.1] = np.nan
+    model = RandomForestClassifier(n_estimators=15, random_state=0).fit(X, y)
+    np.testing.assert_array_equal(CompiledForest(model).predict_proba(X), model.predict_proba(X))
+
+
+@pytest.mark.parametrize('n_classes', [2, 3])
+def test_boosting_predict_proba_matches(n_classes):
+    X, y = make_classification(n_samples=300, n_features=10, n_informative=5, n_classes=n_classes,
+                               random_state=2)
+    model = GradientBoostingClassifier(n_estimators=20, max_depth=3, random_state=0).fit(X, y)
+    compiled = compile_model(model)
+    assert isinstance(compiled, CompiledBoosting)
+    np.testing.assert_allclose(compiled.decision_function(X), model.decision_function(X).reshape(len(X), -1),
+                               rtol=1e-12, atol=1e-12)
+    np.testing.assert_allclose(compiled.predict_proba(X), model.predict_proba(X), rtol=1e-12, atol=1e-12)
+
+
+def test_apply_matches_sklearn_leaves(dataset):
+    X, y = dataset
+    model = RandomForestClassifier(n_estimators=5, random_state=0).fit(X, y)
+    trees = CompiledTrees([estimator.tree_ for estimator in model.estimators_])
+    leaves = trees.apply(np.ascontiguousarray(X, dtype=np.float32)) - trees.roots
+    np.testing.assert_array_equal(leaves, model.apply(X))
+
+
+def test_compile_model_rejects_other_models(dataset):
+    X, y = dataset
+    with pytest.raises(TypeError):
+        compile_model(LogisticRegression(max_iter=200).fit(X, y))
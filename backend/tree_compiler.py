@@ -0,0 +1,145 @@
+"""
+Compiled tree-ensemble inference
+scikit-learn's predict_proba costs milliseconds for a single row: input
+validation, a joblib dispatch and one Cython call per tree. The fitted trees
+are flattened here into contiguous node arrays (feature, threshold,
+children, leaf values) shared by all trees. A batch of rows walks every tree
+at once, one vectorized step per tree level.
+
+The arithmetic is the same as scikit-learn's: X is cast to float32 and
+compared with the float64 thresholds, and tree outputs are added in estimator
+order. Probabilities are therefore identical to predict_proba. (A forest
+predicting with n_jobs > 1 sums its trees in thread order, so it agrees only
+to the last bit.)
+
+Environment (read by app.py):
+    NEXUS_DOMAIN_MODEL   'best' (default), 'random_forest' or 'gradient_boosting' model of the loaded run
+    NEXUS_COMPILE_TREES  set to 0 to predict with scikit-learn instead
+"""
+
+import numpy as np
+
+from sklearn.dummy import DummyClassifier
+from sklearn.ensemble import ExtraTreesClassifier, GradientBoostingClassifier, RandomForestClassifier
+
+
+class CompiledTrees:
+    """Node arrays of several trees; leaves are their own children so walking past them is a no-op"""
+
+    def __init__(self, trees):
+        offsets = np.cumsum([0] + [tree.node_count for tree in trees])
+        self.roots = offsets[:-1].astype(np.int64)
+        self.n_nodes = int(offsets[-1])
+        self.depth = max(tree.max_depth for tree in trees)
+
+        nodes = np.arange(self.n_nodes, dtype=np.int64)
+        left = np.concatenate([tree.children_left + offset for tree, offset in zip(trees, offsets)])
+        right = np.concatenate([tree.children_right + offset for tree, offset in zip(trees, offsets)])
+        leaf = np.concatenate([tree.children_left == -1 for tree in trees])
+        self.left = np.where(leaf, nodes, left)
+        self.right = np.where(leaf, nodes, right)
+        self.feature = np.where(leaf, 0, np.concatenate([tree.feature for tree in trees])).astype(np.int64)
+        self.threshold = np.concatenate([tree.threshold for tree in trees]).astype(np.float64)
+        self.missing_left = np.concatenate([
+            np.asarray(getattr(tree, 'missing_go_to_left', np.zeros(tree.node_count)), dtype=bool)
+            for tree in trees])
+        # (n_nodes, n_values): class counts (scikit-learn < 1.4) or fractions for classifiers,
+        # the single output for regressors
+        self.value = np.concatenate([tree.value[:, 0, :] for tree in trees]).astype(np.float64)
+
+    @property
+    def n_trees(self):
+        return len(self.roots)
+
+    def apply(self, X):
+        """(n_rows, n_trees) leaf of every row in every tree; X is a C-contiguous float32 matrix"""
+        n_rows, n_features = X.shape
+        flat = X.ravel()
+        has_nan = np.isnan(flat).any()
+        # One (row, tree) walk per element; walks that reached their leaf drop out of `active`
+        node = np.tile(self.roots, n_rows)
+        offset = np.repeat(np.arange(n_rows, dtype=np.int64) * n_features, self.n_trees)
+        active = np.arange(len(node))
+        for _ in range(self.depth):
+            current = node[active]
+            x = flat[offset[active] + self.feature[current]]
+            # float32 feature vs float64 threshold, as in sklearn's Tree.apply
+            go_left = x <= self.threshold[current]
+            if has_nan:
+                go_left = np.where(np.isnan(x), self.missing_left[current], go_left)
+            following = np.where(go_left, self.left[current], self.right[current])
+            node[active] = following
+            active = active[following != current]
+            if not len(active):
+                break
+        return node.reshape(n_rows, self.n_trees)
+
+
+def leaf_fractions(value):
+    """
+    Class fractions of every node. scikit-learn < 1.4 stores weighted class
+    counts and divides by their sum in predict_proba; later versions store the
+    fractions already, and those rows are kept as they are (bit for bit).
+    """
+    totals = value.sum(axis=1, keepdims=True)
+    counts = ~np.isclose(totals, 1.0, rtol=0, atol=1e-9) & (totals > 0)
+    return np.where(counts, value / np.where(counts, totals, 1.0), value)
+
+
+def as_float32(X):
+    return np.ascontiguousarray(np.asarray(X, dtype=np.float32).reshape(-1, np.shape(X)[-1]))
+
+
+class CompiledForest:
+    """predict_proba of a RandomForest / ExtraTrees classifier: mean of the trees' class fractions"""
+
+    def __init__(self, model):
+        self.classes_ = model.classes_
+        self.n_features_in_ = model.n_features_in_
+        self.source = type(model).__name__
+        self.trees = CompiledTrees([estimator.tree_ for estimator in model.estimators_])
+        self.trees.value = leaf_fractions(self.trees.value)
+
+    def predict_proba(self, X):
+        leaves = self.trees.apply(as_float32(X))
+        per_tree = self.trees.value[leaves]  # (n_rows, n_trees, n_classes)
+        # cumsum adds in tree order, like the forest's running sum
+        proba = np.cumsum(per_tree, axis=1)[:, -1]
+        proba /= self.trees.n_trees
+        return proba
+
+
+class CompiledBoosting:
+    """predict_proba of a GradientBoostingClassifier: init + learning_rate x tree outputs, then the loss link"""
+
+    def __init__(self, model):
+        if not (model.init_ == 'zero' or isinstance(model.init_, DummyClassifier)):
+            raise TypeError(f"Can't compile a {type(model.init_).__name__} init estimator")
+        self.classes_ = model.classes_
+        self.n_features_in_ = model.n_features_in_
+        self.source = type(model).__name__
+        self.learning_rate = model.learning_rate
+        self.n_stages, self.n_outputs = model.estimators_.shape
+        self.loss = model._loss
+        # A prior (or zero) init doesn't depend on X
+        self.raw_init = model._raw_predict_init(np.zeros((1, self.n_features_in_), dtype=np.float32))[0]
+        # Stage-major: tree s * n_outputs + k adds to raw output k
+        self.trees = CompiledTrees([estimator.tree_ for estimator in model.estimators_.ravel()])
+
+    def decision_function(self, X):
+        leaves = self.trees.apply(as_float32(X))
+        steps = self.learning_rate * self.trees.value[leaves, 0].reshape(len(leaves), self.n_stages, self.n_outputs)
+        init = np.broadcast_to(self.raw_init, (len(leaves), 1, self.n_outputs))
+        return np.cumsum(np.concatenate([init, steps], axis=1), axis=1)[:, -1]
+
+    def predict_proba(self, X):
+        return self.loss.predict_proba(self.decision_function(X))
+
+
+def compile_model(model):
+    """Compiled equivalent of a fitted tree-ensemble classifier; TypeError for other models"""
+    if isinstance(model, (RandomForestClassifier, ExtraTreesClassifier)) and model.n_outputs_ == 1:
+        return CompiledForest(model)
+    if isinstance(model, GradientBoostingClassifier):
+        return CompiledBoosting(model)
+    raise TypeError(f"Can't compile a {type(model).__name__}")